@@ -1,3 +1,14 @@
+import os
+from math import gcd
+import numpy as np
+import pydub
+import soundfile as sf
+from scipy.signal import resample_poly
+
+# Formats build_csv picks up; all are decoded in-process by libsndfile
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".opus", ".mp3")
+
+
 def detect_leading_silence(sound, chunk_size=10):
     """
     sound is a pydub Sound
@@ -25,3 +36,91 @@ def trim_leading_and_lagging_silence(audioSegment):
     duration = len(sound)
     trimmed_sound = sound[start_trim : duration - end_trim]
     return trimmed_sound
+
+
+def segment_to_array(audioSegment):
+    """
+    Convert a pydub AudioSegment to a float64 array scaled to [-1, 1), the same
+    values parselmouth.Sound reads from the exported WAV.
+
+    Returns:
+        tuple: (array of shape (channels, samples), sample rate)
+    """
+    samples = np.array(audioSegment.get_array_of_samples(), dtype=np.float64)
+    samples = samples.reshape(-1, audioSegment.channels).T
+    samples /= float(1 << (8 * audioSegment.sample_width - 1))
+    return samples, audioSegment.frame_rate
+
+
+def resample_array(samples, sample_rate, target_rate=16000):
+    """
+    Downmix to mono and resample, e.g. to the 16 kHz float32 input Whisper expects.
+
+    Args:
+        samples (numpy.ndarray): Array of shape (channels, samples) or (samples,).
+        sample_rate (int): Sample rate of samples.
+        target_rate (int): Sample rate to resample to.
+
+    Returns:
+        numpy.ndarray: float32 mono array at target_rate.
+    """
+    mono = samples.mean(axis=0) if samples.ndim == 2 else samples
+    if sample_rate != target_rate:
+        g = gcd(int(sample_rate), int(target_rate))
+        mono = resample_poly(mono, target_rate // g, int(sample_rate) // g)
+    return mono.astype(np.float32)
+
+
+def detect_audio_format(path):
+    """
+    Detect the container format of an audio file from its first bytes, falling back
+    to the file extension.
+
+    Returns:
+        str: One of "wav", "flac", "ogg", "opus", "mp3".
+    """
+    with open(path, "rb") as f:
+        header = f.read(64)
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:4] == b"OggS":
+        return "opus" if b"OpusHead" in header else "ogg"
+    if header[:3] == b"ID3" or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return os.path.splitext(path)[1].lower().lstrip(".")
+
+
+def load_audio_segment(path):
+    """
+    Decode an audio file of any supported format into a pydub AudioSegment without
+    writing intermediate files.
+
+    WAV goes through pydub as before; FLAC/OGG/Opus/MP3 are decoded by libsndfile
+    (via soundfile), falling back to pydub's ffmpeg pipe if libsndfile lacks the codec.
+    """
+    fmt = detect_audio_format(path)
+    if fmt == "wav":
+        return pydub.AudioSegment.from_file(path, format="wav")
+    try:
+        info = sf.info(path)
+        dtype = "int16" if info.subtype in ("PCM_S8", "PCM_U8", "PCM_16") else "int32"
+        data, sample_rate = sf.read(path, dtype=dtype, always_2d=True)
+    except (RuntimeError, sf.LibsndfileError):
+        return pydub.AudioSegment.from_file(path, format="ogg" if fmt == "opus" else fmt)
+    return pydub.AudioSegment(
+        data=data.tobytes(),
+        sample_width=data.dtype.itemsize,
+        frame_rate=sample_rate,
+        channels=data.shape[1],
+    )
+
+
+def is_audio_file(filename):
+    """
+    True for supported audio files that are not pipeline outputs.
+    """
+    return filename.lower().endswith(AUDIO_EXTENSIONS) and not filename.endswith(
+        "_preprocessed.wav"
+    )
@@ -0,0 +1,201 @@
+"""
+Cheap recording-quality screen run on the decoded samples before any heavy stage.
+
+Per file: SNR (loud frames against the noise floor of 20 ms frame energies),
+clipping ratio, speech-activity ratio, DC offset, level and sample rate. Rules then
+reject the file (it is not processed) or flag it (processed, status kept in the
+metrics and the quality report).
+
+The noise floor is the 10th percentile of the frame levels, which assumes at least
+10% of the frames are pauses, as in connected speech and DDK. Continuous recordings
+(the "phonation" profile's sustained vowels) have no pauses, so their SNR and speech
+ratio are meaningless; DEFAULT_RULES["profiles"] gives them rules without those
+measures (see rules_for_profile).
+"""
+import os
+import json
+import operator
+import numpy as np
+import pandas as pd
+
+FRAME_SECONDS = 0.02
+# samples at or above this fraction of full scale count as clipped
+CLIP_LEVEL = 0.999
+# frames this far above the noise floor (and above SILENCE_DBFS) count as speech
+SPEECH_MARGIN_DB = 10.0
+SILENCE_DBFS = -60.0
+NOISE_PERCENTILE = 10
+SPEECH_PERCENTILE = 95
+
+# action -> metric -> (comparison, threshold); a file matching any reject rule is skipped
+DEFAULT_RULES = {
+    "reject": {
+        "snr_db": ("<", 3.0),
+        "clipping_ratio": (">", 0.1),
+        "speech_ratio": ("<", 0.02),
+        "sample_rate": ("<", 8000),
+    },
+    "flag": {
+        "snr_db": ("<", 15.0),
+        "clipping_ratio": (">", 0.001),
+        "speech_ratio": ("<", 0.2),
+        "dc_offset": (">", 0.05),
+        "sample_rate": ("<", 16000),
+    },
+}
+# pipeline profile -> rules replacing the top-level ones for files of that profile
+DEFAULT_RULES["profiles"] = {
+    "phonation": {
+        "reject": {
+            "clipping_ratio": (">", 0.1),
+            "sample_rate": ("<", 8000),
+        },
+        "flag": {
+            "clipping_ratio": (">", 0.001),
+            "dc_offset": (">", 0.05),
+            "sample_rate": ("<", 16000),
+        },
+    },
+}
+
+_COMPARISONS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _db(x):
+    return 20 * np.log10(np.maximum(x, 1e-10))
+
+
+def quality_metrics(samples, sample_rate):
+    """
+    Quality measures of a recording.
+
+    Args:
+        samples (numpy.ndarray): Array of shape (channels, samples) or (samples,) scaled
+            to [-1, 1), as returned by audio_preprocessing.segment_to_array.
+        sample_rate (int): Sample rate in Hz.
+
+    Returns:
+        dict: duration (s), sample_rate, snr_db, clipping_ratio, speech_ratio,
+        dc_offset (absolute mean), peak_dbfs and rms_dbfs.
+    """
+    samples = np.atleast_2d(samples)
+    mono = samples.mean(axis=0)
+    dc_offset = float(mono.mean()) if len(mono) else 0.0
+    centered = mono - dc_offset
+    frame = max(1, int(FRAME_SECONDS * sample_rate))
+    n_frames = len(centered) // frame
+    frame_db = _db(
+        np.sqrt(np.mean(centered[: n_frames * frame].reshape(n_frames, frame) ** 2, axis=1))
+    )
+    if n_frames:
+        noise_db = np.percentile(frame_db, NOISE_PERCENTILE)
+        snr_db = float(np.percentile(frame_db, SPEECH_PERCENTILE) - noise_db)
+        active = (frame_db > noise_db + SPEECH_MARGIN_DB) & (frame_db > SILENCE_DBFS)
+        speech_ratio = float(active.mean())
+    else:
+        snr_db, speech_ratio = 0.0, 0.0
+    return {
+        "duration": samples.shape[1] / sample_rate,
+        "sample_rate": sample_rate,
+        "snr_db": snr_db,
+        "clipping_ratio": float(np.mean(np.any(np.abs(samples) >= CLIP_LEVEL, axis=0)))
+        if samples.shape[1]
+        else 0.0,
+        "speech_ratio": speech_ratio,
+        "dc_offset": abs(dc_offset),
+        "peak_dbfs": float(_db(np.max(np.abs(samples)))) if samples.size else SILENCE_DBFS,
+        "rms_dbfs": float(_db(np.sqrt(np.mean(centered**2)))) if len(centered) else SILENCE_DBFS,
+    }
+
+
+def rules_for_profile(rules, profile):
+    """
+    The rules that apply to a file of the given pipeline profile: rules["profiles"]
+    [profile] if present, else DEFAULT_RULES["profiles"][profile] (so custom rules
+    without profiles do not apply the SNR and speech rules to sustained phonation),
+    else rules itself.
+    """
+    if rules is None:
+        rules = DEFAULT_RULES
+    profiles = {**DEFAULT_RULES["profiles"], **rules.get("profiles", {})}
+    return profiles.get(profile, rules)
+
+
+def evaluate_rules(metrics, rules=None):
+    """
+    Apply reject/flag rules to quality metrics.
+
+    Args:
+        metrics (dict): Output of quality_metrics.
+        rules (dict, optional): Action ("reject" or "flag") -> metric -> (comparison,
+            threshold). Defaults to DEFAULT_RULES.
+
+    Returns:
+        tuple: ("reject", "flag" or "ok", list of the rules that matched).
+    """
+    if rules is None:
+        rules = DEFAULT_RULES
+    status = "ok"
+    reasons = []
+    for action in ("reject", "flag"):
+        for metric, (comparison, threshold) in rules.get(action, {}).items():
+            if _COMPARISONS[comparison](metrics[metric], threshold):
+                reasons.append(f"{action}: {metric} {comparison} {threshold}")
+                if action == "reject":
+                    status = "reject"
+                elif status == "ok":
+                    status = "flag"
+    return status, reasons
+
+
+def assess_quality(samples, sample_rate, rules=None):
+    """
+    Quality metrics plus status and reasons (see evaluate_rules).
+    """
+    metrics = quality_metrics(samples, sample_rate)
+    metrics["status"], metrics["reasons"] = evaluate_rules(metrics, rules)
+    return metrics
+
+
+def write_quality(quality_dir, filename, assessment):
+    os.makedirs(quality_dir, exist_ok=True)
+    with open(os.path.join(quality_dir, filename + ".json"), "w") as f:
+        json.dump(assessment, f, indent=2)
+
+
+def quality_report(quality_dir, filenames=None, save_path=None):
+    """
+    Collect per-file quality JSON files into one table.
+
+    Args:
+        quality_dir (str): Directory written by write_quality.
+        filenames (list, optional): File keys to include; all by default.
+        save_path (str, optional): If given, the report is also written there as CSV.
+
+    Returns:
+        pandas.DataFrame: One row per file with the metrics, status and reasons.
+    """
+    if not os.path.isdir(quality_dir):
+        return pd.DataFrame()
+    if filenames is None:
+        filenames = sorted(
+            f[: -len(".json")] for f in os.listdir(quality_dir) if f.endswith(".json")
+        )
+    rows = []
+    for filename in filenames:
+        path = os.path.join(quality_dir, filename + ".json")
+        if not os.path.exists(path):
+            continue
+        with open(path, "r") as f:
+            row = json.load(f)
+        row["reasons"] = "; ".join(row["reasons"])
+        rows.append({"filename": filename, **row})
+    report = pd.DataFrame(rows)
+    if save_path is not None:
+        report.to_csv(save_path, index=False)
+    return report
@@ -0,0 +1,179 @@
+"""
+Render many boxplots and scatterplots in parallel.
+
+A spec is a dict with
+    feature: column to plot
+    grouping: key into the groups dict passed to render_batch
+    kind: "boxplot" (default) or "scatter"
+    title, name (optional): plot title and output file stem; the stem defaults to
+        <feature>_<grouping>, with a "_scatter" suffix for scatterplots, and must be
+        unique within a batch
+groups maps each grouping to (dataframes, labels) for boxplots (see split_groups,
+which splits one dataframe like make_boxplot_one_df) or to (df1, df2) for
+feature_comparison_scatterplot. Groups are split once, and each worker only gets
+the columns its spec plots.
+
+Workers draw with the non-interactive Agg backend. A figure is skipped when the hash
+of its input data and spec matches the entry in out_dir/.render_cache.json and all
+its files exist. formats may include vector formats ("svg", "pdf").
+
+Example:
+    groups = {"MDVR_KCL": ([hc_df, pd_df], ["HC", "PD"])}
+    specs = [{"feature": col, "grouping": "MDVR_KCL"} for col in hc_df.columns]
+    render_batch(specs, groups, "./Plots", formats=("png", "svg"))
+"""
+import os
+import re
+import json
+import hashlib
+import multiprocessing
+import pandas as pd
+
+CACHE_FILE = ".render_cache.json"
+
+
+def split_groups(dataframe, separator_col):
+    """
+    Split a dataframe by the values of separator_col, as make_boxplot_one_df does.
+
+    Returns:
+        tuple: (list of dataframes, list of labels), sorted by label.
+    """
+    labels = sorted(dataframe[separator_col].unique())
+    grouped = dict(tuple(dataframe.groupby(separator_col)))
+    return [grouped[label] for label in labels], labels
+
+
+def _output_name(spec):
+    name = spec.get("name") or f"{spec['feature']}_{spec['grouping']}"
+    if not spec.get("name") and spec.get("kind", "boxplot") != "boxplot":
+        name = f"{name}_{spec['kind']}"
+    # feature names contain "/" (e.g. "Speech Rate (syll/s)")
+    return re.sub(r"[^\w\-.() ]+", "_", name)
+
+
+def _payload(spec, group):
+    """
+    The data one figure needs: only the spec's feature column of each frame.
+    """
+    feature = spec["feature"]
+    if spec.get("kind", "boxplot") == "scatter":
+        df1, df2 = group
+        return [df[[feature]] if feature in df.columns else df.iloc[:, :0] for df in (df1, df2)]
+    dataframes, labels = group
+    return [df[[feature]] for df in dataframes], list(labels)
+
+
+def _hash(spec, payload, formats, dpi):
+    kind = spec.get("kind", "boxplot")
+    frames, labels = (payload, None) if kind == "scatter" else payload
+    digest = hashlib.sha1()
+    digest.update(
+        json.dumps(
+            [kind, spec["feature"], spec.get("title"), labels, list(formats), dpi],
+            default=str,
+        ).encode()
+    )
+    for frame in frames:
+        digest.update(pd.util.hash_pandas_object(frame, index=True).values.tobytes())
+        digest.update(str(list(frame.columns)).encode())
+    return digest.hexdigest()
+
+
+def _init_renderer():
+    import matplotlib.pyplot as plt
+
+    plt.switch_backend("Agg")
+
+
+def _render(job):
+    """
+    Draw one figure and save it in every format. Runs in a pool worker.
+    """
+    import matplotlib.pyplot as plt
+    from data_visualization import make_boxplot
+    from data_visualization import make_scatterplot
+
+    spec, payload, paths, dpi = job
+    try:
+        if spec.get("kind", "boxplot") == "scatter":
+            f = make_scatterplot.feature_comparison_scatterplot(*payload, spec["feature"])
+            if f is not None and spec.get("title") is not None:
+                f.suptitle(spec["title"])
+        else:
+            dataframes, labels = payload
+            f = make_boxplot.make_boxplot(dataframes, labels, spec["feature"], spec.get("title"))
+        if f is None:
+            return _output_name(spec), "empty"
+        for path in paths:
+            f.savefig(path, dpi=dpi)
+        plt.close(f)
+        return _output_name(spec), "rendered"
+    except Exception as e:
+        plt.close("all")
+        return _output_name(spec), f"error: {type(e).__name__}: {e}"
+
+
+def render_batch(specs, groups, out_dir, formats=("png",), dpi=300, processes=None, force=False):
+    """
+    Render figure specs in parallel, skipping figures whose inputs have not changed.
+
+    Args:
+        specs (list): Figure specs (see module docstring).
+        groups (dict): Grouping name -> (dataframes, labels) or (df1, df2).
+        out_dir (str): Output directory; files are named <name>.<format>.
+        formats (tuple): File formats, e.g. ("png",) or ("png", "svg", "pdf").
+        dpi (int): Resolution of raster formats.
+        processes (int, optional): Pool size; all CPUs by default, 1 renders in-process.
+        force (bool): Re-render even if the cache says a figure is current.
+
+    Returns:
+        pandas.DataFrame: name, status ("rendered", "cached", "empty" or "error: ...")
+        and hash per spec.
+
+    Raises:
+        ValueError: If two specs have the same output name.
+    """
+    names = [_output_name(spec) for spec in specs]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Specs with the same output name: {', '.join(duplicates)}")
+    os.makedirs(out_dir, exist_ok=True)
+    cache_path = os.path.join(out_dir, CACHE_FILE)
+    cache = {}
+    if os.path.exists(cache_path):
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+
+    rows = []
+    jobs = []
+    hashes = {}
+    for spec in specs:
+        name = _output_name(spec)
+        payload = _payload(spec, groups[spec["grouping"]])
+        digest = _hash(spec, payload, formats, dpi)
+        paths = [os.path.join(out_dir, f"{name}.{fmt}") for fmt in formats]
+        hashes[name] = digest
+        if not force and cache.get(name) == digest and all(os.path.exists(p) for p in paths):
+            rows.append({"name": name, "status": "cached", "hash": digest})
+        else:
+            jobs.append((spec, payload, paths, dpi))
+
+    if processes == 1 or len(jobs) <= 1:
+        # in-process: keep the caller's backend, figures are closed after saving
+        results = [_render(job) for job in jobs]
+    else:
+        with multiprocessing.Pool(processes, initializer=_init_renderer) as pool:
+            results = list(pool.imap_unordered(_render, jobs))
+
+    for name, status in results:
+        rows.append({"name": name, "status": status, "hash": hashes[name]})
+        if status == "rendered":
+            cache[name] = hashes[name]
+        else:
+            cache.pop(name, None)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_path, cache_path)
+    return pd.DataFrame(rows)
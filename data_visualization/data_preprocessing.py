@@ -6,14 +6,10 @@ warnings.filterwarnings("ignore")
 
 
 def normalize_df(df, feature_axis=1):
-    df_copy = df.copy()
-    if feature_axis == 1:
-        for col in df.columns:
-            df_copy[col] = (df_copy[col] - df_copy[col].mean()) / df_copy[col].std()
-    elif feature_axis == 0:
-        for col in df.columns:
-            df_copy[col] = (df_copy[col] - df_copy[col].mean()) / df_copy[col].std()
-    return df_copy
+    # z-score every column at once (both feature axes normalize columns)
+    if feature_axis in (0, 1):
+        return (df - df.mean()) / df.std()
+    return df.copy()
 
 
 def remove_outliers_iqr(df, feature_axis=1, threshold=1.5):
@@ -49,8 +49,147 @@ def correlation_heatmap(df, method="pearson", feature_axis=1, title=None):
     return fig
 
 
+# above this many cells distribution_heatmap draws one raster image instead of cells
+RASTER_THRESHOLD = 10000
+# at most this many tick labels are drawn per axis on the raster path
+MAX_TICK_LABELS = 100
+
+
+def _bin(values, size, axis):
+    """
+    Average consecutive blocks of size rows (axis=0) or columns (axis=1), ignoring NaNs.
+    """
+    if not size or size <= 1:
+        return values
+    n = values.shape[axis]
+    pad = (-n) % size
+    widths = [(0, 0), (0, 0)]
+    widths[axis] = (0, pad)
+    padded = np.pad(values, widths, constant_values=np.nan)
+    if axis == 1:
+        blocks = padded.reshape(padded.shape[0], -1, size)
+        return np.nanmean(blocks, axis=2)
+    blocks = padded.reshape(-1, size, padded.shape[1])
+    return np.nanmean(blocks, axis=1)
+
+
+def _draw_pairings(ax, pairings, n_columns):
+    y_min_orig, y_max_orig = (
+        ax.get_ylim()
+    )  # Original y-limits of the heatmap data (before any bracket adjustments)
+    heatmap_y_range = y_max_orig - y_min_orig
+
+    # Define spacing for the horizontal bars of the staples
+    horizontal_bar_spacing = (
+        0.005 * heatmap_y_range
+    )  # Vertical space between horizontal bars of consecutive staples
+    first_horizontal_bar_y_offset = (
+        0.005 * heatmap_y_range
+    )  # Offset of the first horizontal bar from heatmap top
+
+    # Y-coordinate for the horizontal bar of the first bracket
+    current_horizontal_bar_y = y_max_orig + first_horizontal_bar_y_offset
+
+    max_y_coord_for_all_brackets = current_horizontal_bar_y  # Keep track of the highest point reached by any bracket's horizontal bar
+
+    line_width = 0.5  # Make lines even thinner
+
+    for i, (start_col, end_col) in enumerate(pairings):
+        if (
+            start_col >= n_columns
+            or end_col >= n_columns
+            or start_col < 0
+            or end_col < 0
+        ):
+            continue
+
+        # Calculate y-position for the current bracket's horizontal bar
+        if i > 0:
+            # Each subsequent horizontal bar is drawn above the previous one
+            current_horizontal_bar_y += horizontal_bar_spacing
+
+        max_y_coord_for_all_brackets = max(
+            max_y_coord_for_all_brackets, current_horizontal_bar_y
+        )
+
+        x_start = min(start_col, end_col) + 0.5
+        x_end = max(start_col, end_col) + 0.5
+
+        # Draw the top horizontal line of the staple
+        ax.hlines(
+            y=current_horizontal_bar_y,
+            xmin=x_start,
+            xmax=x_end,
+            colors="blue",
+            linewidth=line_width,
+            zorder=10,
+        )  # Increased zorder
+
+        # Draw the vertical lines (legs of the staple, extending from heatmap top to horizontal bar)
+        ax.vlines(
+            x=x_start,
+            ymin=y_max_orig,
+            ymax=current_horizontal_bar_y,
+            colors="blue",
+            linewidth=line_width,
+            zorder=10,
+        )  # Increased zorder
+        ax.vlines(
+            x=x_end,
+            ymin=y_max_orig,
+            ymax=current_horizontal_bar_y,
+            colors="blue",
+            linewidth=line_width,
+            zorder=10,
+        )  # Increased zorder
+
+    # Adjust overall y-axis upper limit to ensure all brackets are visible
+    # Add a small padding above the topmost bracket's horizontal bar
+    final_y_max_limit = max_y_coord_for_all_brackets + 0.02 * heatmap_y_range
+    ax.set_ylim(y_min_orig, final_y_max_limit)
+
+
+def _raster_heatmap(fig, ax, df, bin_rows=None, bin_columns=None):
+    """
+    Draw df as one image on the cell grid of sns.heatmap (column j spans [j, j + 1],
+    row i spans [i, i + 1], first row on top), so overlays use the same coordinates.
+    Binned blocks are stretched over the cells they average; a partial last block
+    keeps its full width and is clipped at the data's edge.
+    """
+    values = _bin(_bin(df.to_numpy(dtype=float), bin_rows, 0), bin_columns, 1)
+    # _bin pads the last block with NaN, so the image spans whole blocks
+    n_rows = values.shape[0] * (bin_rows if bin_rows and bin_rows > 1 else 1)
+    n_columns = values.shape[1] * (bin_columns if bin_columns and bin_columns > 1 else 1)
+    image = ax.imshow(
+        values,
+        cmap="coolwarm",
+        aspect="auto",
+        interpolation="nearest",
+        extent=(0, n_columns, n_rows, 0),
+    )
+    ax.set_xlim(0, df.shape[1])
+    ax.set_ylim(df.shape[0], 0)
+    fig.colorbar(image, ax=ax, label="Z-Score", shrink=0.6, location="bottom")
+    for axis, labels, size, set_ticks, set_labels, rotation in [
+        (1, df.columns, bin_columns, ax.set_xticks, ax.set_xticklabels, 90),
+        (0, df.index, bin_rows, ax.set_yticks, ax.set_yticklabels, 0),
+    ]:
+        if len(labels) <= MAX_TICK_LABELS and not (size and size > 1):
+            set_ticks(np.arange(len(labels)) + 0.5)
+            set_labels(labels, rotation=rotation)
+        else:
+            set_ticks([])
+
+
 def distribution_heatmap(
-    df, feature_axis=1, healthy_split=None, title=None, pairings=None
+    df,
+    feature_axis=1,
+    healthy_split=None,
+    title=None,
+    pairings=None,
+    raster=None,
+    bin_rows=None,
+    bin_columns=None,
 ):
     """
     Given a dataframe, return a heatmap of the distribution of the features
@@ -67,6 +206,12 @@ def distribution_heatmap(
         Title for the plot
     pairings : list of tuples, optional
         List of column index pairs to connect with brackets, e.g., [(0, 12), (1, 13)]
+    raster : bool, optional
+        Draw the matrix as one image instead of one patch per cell. By default on
+        above RASTER_THRESHOLD cells or when binning.
+    bin_rows, bin_columns : int, optional
+        Average blocks of this many consecutive rows / columns (of the plotted
+        matrix) on the raster path; brackets and healthy_split keep their positions.
     """
     if feature_axis == 1:
         df.dropna(axis=0, inplace=True)
@@ -76,121 +221,56 @@ def distribution_heatmap(
         df = data_preprocessing.normalize_df(df)
     if df.shape[0] == 0 or df.shape[1] == 0:
         return None
+    if raster is None:
+        raster = df.size > RASTER_THRESHOLD or bool(bin_rows) or bool(bin_columns)
 
     # Create figure and axis with adjusted figsize
     fig, ax = plt.subplots(figsize=(10, 8), dpi=300)
 
-    # Create heatmap with adjusted parameters
-    show_xticks = True if df.shape[1] < 100 else False
-    sns.heatmap(
-        df,
-        cmap="coolwarm",
-        square=True,
-        ax=ax,
-        cbar_kws={"label": "Z-Score", "shrink": 0.6, "location": "bottom"},
-        xticklabels=show_xticks,
-        yticklabels=True,
-        linewidths=0.1,  # Add grid lines between cells
-        linecolor="white",  # Color of the grid lines
-    )
+    if raster:
+        _raster_heatmap(fig, ax, df, bin_rows, bin_columns)
+        ax.tick_params(axis="both", labelsize=6, pad=5, length=0)
+    else:
+        # Create heatmap with adjusted parameters
+        show_xticks = True if df.shape[1] < 100 else False
+        sns.heatmap(
+            df,
+            cmap="coolwarm",
+            square=True,
+            ax=ax,
+            cbar_kws={"label": "Z-Score", "shrink": 0.6, "location": "bottom"},
+            xticklabels=show_xticks,
+            yticklabels=True,
+            linewidths=0.1,  # Add grid lines between cells
+            linecolor="white",  # Color of the grid lines
+        )
+
+        # Increase font size and padding of y-tick labels
+        ax.tick_params(axis="both", labelsize=6, pad=5, length=0)  # Remove tick marks
+
+        # Set the ticks to be centered
+        ax.set_xticks(np.arange(df.shape[1]) + 0.5, minor=False)
+        ax.set_yticks(np.arange(df.shape[0]) + 0.5, minor=False)
+
+        # Set the tick labels
+        if show_xticks:
+            ax.set_xticklabels(df.columns, rotation=90)
+        else:
+            ax.set_xticklabels([])
+        ax.set_yticklabels(df.index)
 
     if healthy_split is not None:
         ax.axvline(x=healthy_split - 1, color="red", linestyle="--", linewidth=0.5)
 
-    # Increase font size and padding of y-tick labels
-    ax.tick_params(axis="both", labelsize=6, pad=5, length=0)  # Remove tick marks
-
-    # Set the ticks to be centered
-    ax.set_xticks(np.arange(df.shape[1]) + 0.5, minor=False)
-    ax.set_yticks(np.arange(df.shape[0]) + 0.5, minor=False)
     if title:
         # Move title to the right to avoid overlap with brackets
         ax.set_title(
             title, rotation=270, x=1.02, y=0.5, va="center", ha="left"
         )  # Vertical title on the right
 
-    # Set the tick labels
-    if show_xticks:
-        ax.set_xticklabels(df.columns, rotation=90)
-    else:
-        ax.set_xticklabels([])
-    ax.set_yticklabels(df.index)
-
     # Add pairings if provided
     if pairings and len(pairings) > 0:
-        y_min_orig, y_max_orig = (
-            ax.get_ylim()
-        )  # Original y-limits of the heatmap data (before any bracket adjustments)
-        heatmap_y_range = y_max_orig - y_min_orig
-
-        # Define spacing for the horizontal bars of the staples
-        horizontal_bar_spacing = (
-            0.005 * heatmap_y_range
-        )  # Vertical space between horizontal bars of consecutive staples
-        first_horizontal_bar_y_offset = (
-            0.005 * heatmap_y_range
-        )  # Offset of the first horizontal bar from heatmap top
-
-        # Y-coordinate for the horizontal bar of the first bracket
-        current_horizontal_bar_y = y_max_orig + first_horizontal_bar_y_offset
-
-        max_y_coord_for_all_brackets = current_horizontal_bar_y  # Keep track of the highest point reached by any bracket's horizontal bar
-
-        line_width = 0.5  # Make lines even thinner
-
-        for i, (start_col, end_col) in enumerate(pairings):
-            if (
-                start_col >= df.shape[1]
-                or end_col >= df.shape[1]
-                or start_col < 0
-                or end_col < 0
-            ):
-                continue
-
-            # Calculate y-position for the current bracket's horizontal bar
-            if i > 0:
-                # Each subsequent horizontal bar is drawn above the previous one
-                current_horizontal_bar_y += horizontal_bar_spacing
-
-            max_y_coord_for_all_brackets = max(
-                max_y_coord_for_all_brackets, current_horizontal_bar_y
-            )
-
-            x_start = min(start_col, end_col) + 0.5
-            x_end = max(start_col, end_col) + 0.5
-
-            # Draw the top horizontal line of the staple
-            ax.hlines(
-                y=current_horizontal_bar_y,
-                xmin=x_start,
-                xmax=x_end,
-                colors="blue",
-                linewidth=line_width,
-                zorder=10,
-            )  # Increased zorder
-
-            # Draw the vertical lines (legs of the staple, extending from heatmap top to horizontal bar)
-            ax.vlines(
-                x=x_start,
-                ymin=y_max_orig,
-                ymax=current_horizontal_bar_y,
-                colors="blue",
-                linewidth=line_width,
-                zorder=10,
-            )  # Increased zorder
-            ax.vlines(
-                x=x_end,
-                ymin=y_max_orig,
-                ymax=current_horizontal_bar_y,
-                colors="blue",
-                linewidth=line_width,
-                zorder=10,
-            )  # Increased zorder
-
-        # Adjust overall y-axis upper limit to ensure all brackets are visible
-        # Add a small padding above the topmost bracket's horizontal bar
-        final_y_max_limit = max_y_coord_for_all_brackets + 0.02 * heatmap_y_range
-        ax.set_ylim(y_min_orig, final_y_max_limit)
+        _draw_pairings(ax, pairings, df.shape[1])
 
     # Adjust layout to prevent label cutoff
     plt.tight_layout()
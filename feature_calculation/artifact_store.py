@@ -0,0 +1,214 @@
+"""
+Packed artifact store: intermediate artifacts (preprocessed WAVs, transcripts,
+alignments, TextGrids) are appended to one container file per batch instead of
+being written as thousands of small files.
+
+Every process writes its own <batch>.pack plus a JSON-lines <batch>.idx with the
+offset and length of each artifact, so concurrent writers (multiprocessing workers
+or other hosts on a shared filesystem) never append to the same file. Readers merge
+all indexes; the latest entry for a (key, kind) wins. Data is written before its
+index line, so a crash can at worst leave unreferenced bytes in a pack.
+"""
+import io
+import os
+import json
+import time
+import zlib
+import socket
+
+PACK_SUFFIX = ".pack"
+INDEX_SUFFIX = ".idx"
+
+# kind -> (Results- subfolder, filename suffix) of the loose-file layout
+LOOSE_LAYOUT = {
+    "preprocessed": ("Preprocessed", "_preprocessed.wav"),
+    "text": ("Text", "_preprocessed.txt"),
+    "alignment": ("Alignments", "_preprocessed.json"),
+    "textgrid": ("TextGrid", "_alignment.TextGrid"),
+}
+
+
+class ArtifactStore:
+    """
+    Append-only artifact store rooted at a directory.
+
+    Args:
+        root (str): Directory holding the pack and index files.
+        batch_id (str, optional): Name of this process's pack; defaults to host, pid and time.
+    """
+
+    def __init__(self, root, batch_id=None):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._batch_id = batch_id
+        self._creator_pid = os.getpid()
+        self._pid = None
+        self._batch = None
+        self._index = {}
+        self._index_sizes = {}
+
+    def _own_batch(self):
+        # A store handed to a worker process must not append to its parent's pack
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            if self._batch_id is not None and self._pid == self._creator_pid:
+                self._batch = self._batch_id
+            else:
+                self._batch = f"{socket.gethostname()}-{self._pid}-{int(time.time() * 1000)}"
+        return self._batch
+
+    def put(self, key, kind, data):
+        """
+        Append an artifact.
+
+        Args:
+            key (str): File key, e.g. the filename used in the metrics.
+            kind (str): Artifact kind, e.g. "text" or "alignment".
+            data (bytes): Content.
+        """
+        batch = self._own_batch()
+        pack_path = os.path.join(self.root, batch + PACK_SUFFIX)
+        with open(pack_path, "ab") as f:
+            offset = f.tell()
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        entry = {
+            "key": key,
+            "kind": kind,
+            "pack": batch + PACK_SUFFIX,
+            "offset": offset,
+            "length": len(data),
+            "crc32": zlib.crc32(data),
+        }
+        with open(os.path.join(self.root, batch + INDEX_SUFFIX), "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._index[(key, kind)] = entry
+
+    def _refresh_index(self):
+        """
+        Read index lines appended since the last refresh.
+        """
+        for name in os.listdir(self.root):
+            if not name.endswith(INDEX_SUFFIX):
+                continue
+            path = os.path.join(self.root, name)
+            size = os.path.getsize(path)
+            start = self._index_sizes.get(name, 0)
+            if size == start:
+                continue
+            with open(path, "rb") as f:
+                f.seek(start)
+                chunk = f.read(size - start)
+            # only consume complete lines; a writer may be mid-append
+            complete = chunk[: chunk.rfind(b"\n") + 1]
+            for line in complete.splitlines():
+                entry = json.loads(line)
+                self._index[(entry["key"], entry["kind"])] = entry
+            self._index_sizes[name] = start + len(complete)
+
+    def _entry(self, key, kind):
+        if (key, kind) not in self._index:
+            self._refresh_index()
+        return self._index.get((key, kind))
+
+    def contains(self, key, kind):
+        return self._entry(key, kind) is not None
+
+    def get(self, key, kind):
+        """
+        Read an artifact by random access into its pack.
+
+        Returns:
+            bytes or None: The content, or None if the artifact is not stored.
+        """
+        entry = self._entry(key, kind)
+        if entry is None:
+            return None
+        with open(os.path.join(self.root, entry["pack"]), "rb") as f:
+            f.seek(entry["offset"])
+            data = f.read(entry["length"])
+        if zlib.crc32(data) != entry["crc32"]:
+            raise IOError(f"Corrupt artifact {kind} for {key} in {entry['pack']}")
+        return data
+
+    def keys(self, kind=None):
+        self._refresh_index()
+        return sorted(k for k, t in self._index if kind is None or t == kind)
+
+    def put_text(self, key, kind, text):
+        self.put(key, kind, text.encode("utf-8"))
+
+    def get_text(self, key, kind):
+        data = self.get(key, kind)
+        return None if data is None else data.decode("utf-8")
+
+    def put_json(self, key, kind, obj):
+        self.put_text(key, kind, json.dumps(obj, ensure_ascii=False))
+
+    def get_json(self, key, kind):
+        text = self.get_text(key, kind)
+        return None if text is None else json.loads(text)
+
+    def put_segment(self, key, audio_segment):
+        """
+        Store a pydub AudioSegment as a preprocessed WAV.
+        """
+        buffer = io.BytesIO()
+        audio_segment.export(buffer, format="wav")
+        self.put(key, "preprocessed", buffer.getvalue())
+
+
+def loose_path(results_dir, key, kind):
+    folder, suffix = LOOSE_LAYOUT[kind]
+    return os.path.join(results_dir, folder, key + suffix)
+
+
+def read_artifact(results_dir, key, kind, store=None):
+    """
+    Read an artifact from a packed store if given and present, else from the loose
+    Results- layout.
+
+    Returns:
+        bytes or None: The content, or None if it exists in neither.
+    """
+    if store is not None:
+        data = store.get(key, kind)
+        if data is not None:
+            return data
+    path = loose_path(results_dir, key, kind)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def migrate_loose(results_dir, store, remove=False):
+    """
+    Pack an existing loose Results- layout into a store.
+
+    Args:
+        results_dir (str): Results- directory with Preprocessed, Text, Alignments and TextGrid.
+        store (ArtifactStore): Destination store.
+        remove (bool): Delete each loose file after it has been packed.
+
+    Returns:
+        int: Number of artifacts migrated.
+    """
+    migrated = 0
+    for kind, (folder, suffix) in LOOSE_LAYOUT.items():
+        directory = os.path.join(results_dir, folder)
+        if not os.path.isdir(directory):
+            continue
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(suffix):
+                continue
+            key = name[: -len(suffix)]
+            path = os.path.join(directory, name)
+            if not store.contains(key, kind):
+                with open(path, "rb") as f:
+                    store.put(key, kind, f.read())
+                migrated += 1
+            if remove:
+                os.remove(path)
+    return migrated
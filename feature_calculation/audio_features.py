@@ -8,9 +8,41 @@ import pandas as pd
 DEFAULT_SILENCE_DB         = -25   # dB below local peak considered silence
 DEFAULT_MIN_PAUSE_SECONDS  = 0.3   # minimum continuous silence to count as a pause
 DEFAULT_SILENCE_THRESHOLD  = 0.1   # resolution/threshold used by Praat's algorithm
+# Sample rate Praat analyses run at; None keeps the native rate. 16000 or 22050 is
+# enough for pitch, harmonicity and perturbation features and much cheaper than 44.1/48 kHz.
+DEFAULT_ANALYSIS_SAMPLE_RATE = None
+
+# Analysis settings per fidelity tier. "full" is the standard Praat analysis; "fast"
+# screens large archives: analysis at 11.025 kHz, coarser pitch, harmonicity,
+# cepstrogram and formant time steps (formants decimated 4x) and a lower formant
+# ceiling. benchmarks.fidelity_error_report gives the per-feature error.
+FIDELITY_PRESETS = {
+    "full": {
+        "analysis_sample_rate": None,
+        "pitch_time_step": None,
+        "intensity_time_step": None,
+        "harmonicity_time_step": 0.01,
+        "cepstrogram_time_step": 0.01,
+        "formant_time_step": None,
+        "maximum_formant": 5500.0,
+        "speech_pitch_time_step": 0.02,
+    },
+    "fast": {
+        "analysis_sample_rate": 11025,
+        "pitch_time_step": 0.03,
+        "intensity_time_step": 0.03,
+        "harmonicity_time_step": 0.04,
+        "cepstrogram_time_step": 0.04,
+        "formant_time_step": 0.025,
+        "maximum_formant": 5000.0,
+        "speech_pitch_time_step": 0.04,
+    },
+}
 
 from sklearn.mixture import GaussianMixture
 from sklearn.cluster import KMeans
+from sklearn.covariance import MinCovDet
+from sklearn.neighbors import NearestNeighbors
 from scipy.spatial import ConvexHull
 from parselmouth.praat import call
 import parselmouth
@@ -21,6 +53,39 @@ import librosa
 import warnings
 
 
+def load_sound(audio):
+    """
+    Return a parselmouth Sound for a path, or the Sound itself if one is passed, so
+    callers that already decoded the audio can skip re-reading it.
+
+    Args:
+        audio (str or parselmouth.Sound): Path to the audio file or a Sound object.
+
+    Returns:
+        parselmouth.Sound: The sound.
+    """
+    if isinstance(audio, parselmouth.Sound):
+        return audio
+    return parselmouth.Sound(audio)
+
+
+def resample_for_analysis(sound, analysis_sample_rate=DEFAULT_ANALYSIS_SAMPLE_RATE):
+    """
+    Resample a Sound once before Praat analysis. Sounds already at or below the
+    analysis rate are returned unchanged (never upsampled).
+
+    Args:
+        sound (parselmouth.Sound): A parselmouth Sound object.
+        analysis_sample_rate (float, optional): Target rate in Hz; None keeps the native rate.
+
+    Returns:
+        parselmouth.Sound: The sound at the analysis rate.
+    """
+    if analysis_sample_rate is None or sound.sampling_frequency <= analysis_sample_rate:
+        return sound
+    return sound.resample(analysis_sample_rate)
+
+
 """
 Given an audio path, extract formant data using parselmouth
 """
@@ -64,23 +129,144 @@ Given an audio path, generate a dataframe with bark formant data, and hz valued
 """
 
 
-def generate_formant_data(audio_path):
+def generate_formant_data(
+    audio_path, window_seconds=None, outlier_method="gmm", return_model=False, fidelity="full"
+):
     """
     Generate a dataframe with bark formant data and hz valued data after removing outliers using Gaussian Mixture Model.
 
     Args:
-        audio_path (str): Path to the audio file.
+        audio_path (str or parselmouth.Sound): Path to the audio file, or an already decoded Sound.
+        window_seconds (float, optional): If given, analyze the file in overlapping
+            windows of this length with bounded memory (see windowed_analysis); needs
+            a path and fidelity="full".
+        outlier_method (str, optional): One of OUTLIER_METHODS. Defaults to "gmm".
+        return_model (bool, optional): Also return the fitted outlier model.
+        fidelity (str, optional): "full" or "fast" (see FIDELITY_PRESETS).
 
     Returns:
-        A pandas DataFrame with inlying formant data in both Bark and Hz scales.
+        A pandas DataFrame with inlying formant data in both Bark and Hz scales,
+        and the fitted model if return_model is True.
     """
-    sound = parselmouth.Sound(audio_path)
-    formant = sound.to_formant_burg()
+    if window_seconds is not None:
+        from feature_calculation import windowed_analysis
+
+        windowed_analysis.check_options(audio_path, fidelity=(fidelity, "full"))
+        return windowed_analysis.windowed_formant_data(
+            audio_path,
+            window_seconds,
+            outlier_method=outlier_method,
+            return_model=return_model,
+        )
+    settings = FIDELITY_PRESETS[fidelity]
+    # Burg analysis resamples to twice the formant ceiling itself
+    sound = load_sound(audio_path)
+    raw_formant_df = extract_formant_frames(
+        sound, settings["formant_time_step"], settings["maximum_formant"]
+    )
+    return filter_formant_outliers(
+        raw_formant_df, method=outlier_method, return_model=return_model
+    )
+
+
+def extract_formant_frames(sound, time_step=None, maximum_formant=5500.0):
+    """
+    Extract F1 and F2 for every frame of a Burg formant analysis.
+
+    Args:
+        sound (parselmouth.Sound): A parselmouth Sound object.
+        time_step (float, optional): Frame step; Praat's default (window / 4) if None.
+        maximum_formant (float): Formant ceiling in Hz.
+
+    Returns:
+        A pandas DataFrame with columns Time(s), F1(Hz) and F2(Hz).
+    """
+    formant = sound.to_formant_burg(time_step=time_step, maximum_formant=maximum_formant)
     n_frames = formant.get_number_of_frames()
     times = [formant.get_time_from_frame_number(i + 1) for i in range(n_frames)]
     f1 = [formant.get_value_at_time(1, t) for t in times]
     f2 = [formant.get_value_at_time(2, t) for t in times]
-    raw_formant_df = pd.DataFrame({"Time(s)": times, "F1(Hz)": f1, "F2(Hz)": f2})
+    return pd.DataFrame({"Time(s)": times, "F1(Hz)": f1, "F2(Hz)": f2})
+
+
+"""
+Outlier scores for Bark formant frames: higher means more typical. Frames scoring
+below Q1 - 1.5 * IQR are dropped, whichever score is used. Each scorer returns
+(scores, fitted model) so the model can be reused, e.g. by vowel_space.
+"""
+
+# frames used to fit the robust/density models; scoring is still done on every frame
+OUTLIER_FIT_FRAMES = 2000
+
+
+def _fit_subsample(X, max_frames=OUTLIER_FIT_FRAMES):
+    if len(X) <= max_frames:
+        return X
+    rng = np.random.default_rng(42)
+    return X[rng.choice(len(X), max_frames, replace=False)]
+
+
+def gmm_outlier_scores(X):
+    """
+    Log-likelihood under a 12-component full-covariance Gaussian Mixture Model.
+    """
+    gmm = GaussianMixture(n_components=12, covariance_type="full", random_state=42)
+    gmm.fit(X)
+    return gmm.score_samples(X), gmm
+
+
+def mcd_outlier_scores(X):
+    """
+    Negative squared robust Mahalanobis distance from a Minimum Covariance Determinant
+    fit on at most OUTLIER_FIT_FRAMES frames. A single robust ellipse, so it is much
+    cheaper than the GMM but does not follow the multi-modal vowel clusters.
+    """
+    mcd = MinCovDet(random_state=42).fit(_fit_subsample(X))
+    return -mcd.mahalanobis(X), mcd
+
+
+def knn_outlier_scores(X, n_neighbors=10):
+    """
+    Negative log distance to the n_neighbors-th nearest frame among at most
+    OUTLIER_FIT_FRAMES reference frames (a k-NN density estimate). Cost is
+    O(n log OUTLIER_FIT_FRAMES) with a KD-tree.
+    """
+    reference = _fit_subsample(X)
+    nn = NearestNeighbors(n_neighbors=min(n_neighbors + 1, len(reference))).fit(reference)
+    distances, _ = nn.kneighbors(X)
+    # the first neighbor of a reference frame is itself; use the last column either way
+    return -np.log(distances[:, -1] + 1e-9), nn
+
+
+OUTLIER_METHODS = {
+    "gmm": gmm_outlier_scores,
+    "mcd": mcd_outlier_scores,
+    "knn": knn_outlier_scores,
+}
+
+
+"""
+Given a dataframe of raw formant frames, drop undefined frames and outliers
+"""
+
+
+def filter_formant_outliers(raw_formant_df, method="gmm", return_model=False):
+    """
+    Remove frames without F1/F2 and low-scoring frames under the chosen outlier model.
+
+    Args:
+        raw_formant_df (pandas.DataFrame): Columns Time(s), F1(Hz) and F2(Hz).
+        method (str, optional): One of OUTLIER_METHODS: "gmm" (Gaussian Mixture Model
+            log-likelihood, the default), "mcd" (robust Mahalanobis distance) or "knn"
+            (k-nearest-neighbor density).
+        return_model (bool, optional): Also return the fitted outlier model.
+
+    Returns:
+        A pandas DataFrame with inlying formant data in both Bark and Hz scales,
+        and the fitted model if return_model is True.
+    """
+    if method not in OUTLIER_METHODS:
+        raise ValueError(f"Invalid outlier method: {method}")
     # get timestamps with full formant data
     full_formant_df = raw_formant_df[
         (raw_formant_df["F2(Hz)"] > 0) & (raw_formant_df["F1(Hz)"] > 0)
@@ -90,12 +276,10 @@ def generate_formant_data(audio_path):
     bark_transformed_df["F2(Bark)"] = bark_transformed_df["F2(Hz)"].map(bark_transform)
     bark_transformed_df.drop(["F1(Hz)", "F2(Hz)"], axis=1, inplace=True)
     bark_transformed_df.reset_index(drop=True, inplace=True)
-    gmm = GaussianMixture(n_components=12, covariance_type="full", random_state=42)
-    gmm.fit(bark_transformed_df[["F1(Bark)", "F2(Bark)"]])
-    log_probs = pd.DataFrame(
-        gmm.score_samples(bark_transformed_df[["F1(Bark)", "F2(Bark)"]]),
-        columns=["log_prob"],
+    scores, model = OUTLIER_METHODS[method](
+        bark_transformed_df[["F1(Bark)", "F2(Bark)"]].to_numpy()
     )
+    log_probs = pd.DataFrame(scores, columns=["log_prob"])
     log_probs["Time(s)"] = bark_transformed_df["Time(s)"]
     iqr = log_probs["log_prob"].quantile(0.75) - log_probs["log_prob"].quantile(0.25)
     q1 = log_probs["log_prob"].quantile(0.25)
@@ -112,6 +296,8 @@ def generate_formant_data(audio_path):
         inlying_bark_data, inlying_hz_data, on="Time(s)", suffixes=("_bark", "_hz")
     )
     inlying_data.convert_dtypes()
+    if return_model:
+        return inlying_data, model
     return inlying_data
 
 
@@ -163,18 +349,21 @@ Given parselmouth Sound, calculate their fundamental frequency (mean, median, st
 """
 
 
-def calculate_fundamental_frequency(sound, return_type="statistics"):
+def calculate_fundamental_frequency(sound, return_type="statistics", time_step=None, pitch=None):
     """
     Calculate the fundamental frequency (mean, median, std, min, max) for a given parselmouth Sound object.
 
     Args:
         sound (parselmouth.Sound): A parselmouth Sound object.
         return_type (str, optional): The type of return value. Defaults to "statistics".
+        time_step (float, optional): Pitch frame step; Praat's default if None.
+        pitch (parselmouth.Pitch, optional): The pitch analysis, if already computed.
 
     Returns:
         list: A list of fundamental frequency values if return_type is "statistics".
     """
-    pitch = sound.to_pitch()
+    if pitch is None:
+        pitch = sound.to_pitch(time_step=time_step)
     frequencies = pitch.selected_array["frequency"]
     voiced_frequencies = frequencies[frequencies > 0]
     # average fundamental frequency (estimate of pitch over time)
@@ -197,17 +386,20 @@ Given parselmouth Sound, calculate their intensity (mean, median, std, min, max)
 """
 
 
-def calculate_intensity(sound):
+def calculate_intensity(sound, time_step=None, intensity=None):
     """
     Calculate the intensity (mean, median, std, min, max) for a given parselmouth Sound object.
 
     Args:
         sound (parselmouth.Sound): A parselmouth Sound object.
+        time_step (float, optional): Frame step; Praat's default if None.
+        intensity (parselmouth.Intensity, optional): The intensity analysis, if already computed.
 
     Returns:
         list: A list of intensity statistics.
     """
-    intensity = sound.to_intensity()
+    if intensity is None:
+        intensity = sound.to_intensity(time_step=time_step)
     # average intensity (estimate of amplitude over time)
     return [
         np.mean(intensity),
@@ -223,17 +415,21 @@ Given parselmouth Sound, calculate the harmonicity (mean, median, std, min, max)
 """
 
 
-def calculate_harmonicity(sound):
+def calculate_harmonicity(sound, time_step=0.01, harmonicity=None):
     """
     Calculate the harmonicity (mean, median, std, min, max) for a given parselmouth Sound object.
 
     Args:
         sound (parselmouth.Sound): A parselmouth Sound object.
+        time_step (float): Frame step in seconds.
+        harmonicity (parselmouth.Harmonicity, optional): The harmonicity analysis, if
+            already computed.
 
     Returns:
         list: A list of harmonicity statistics.
     """
-    harmonicity = call(sound, "To Harmonicity (cc)", 0.01, 75, 0.1, 1.0)
+    if harmonicity is None:
+        harmonicity = call(sound, "To Harmonicity (cc)", time_step, 75, 0.1, 1.0)
     # harmonic (voiced speech) to noise ratio
     mean = call(harmonicity, "Get mean", 0, 0)
     std = call(harmonicity, "Get standard deviation", 0, 0)
@@ -242,18 +438,21 @@ def calculate_harmonicity(sound):
     return [mean, std, min_val, max_val]
 
 
-def calculate_shimmer(sound):
+def calculate_shimmer(sound, f0=None):
     """
     Calculate the shimmer (mean, median, std, min, max) for a given parselmouth Sound object.
 
     Args:
         sound (parselmouth.Sound): A parselmouth Sound object.
+        f0 (list, optional): calculate_fundamental_frequency statistics, if already computed.
 
     Returns:
         list: A list of shimmer statistics.
     """
-    max_freq = calculate_fundamental_frequency(sound)[-1]
-    min_freq = calculate_fundamental_frequency(sound)[-2]
+    if f0 is None:
+        f0 = calculate_fundamental_frequency(sound)
+    max_freq = f0[-1]
+    min_freq = f0[-2]
     point_process = parselmouth.praat.call(
         sound, "To PointProcess (periodic, cc)", min_freq, max_freq
     )
@@ -281,21 +480,32 @@ def calculate_shimmer(sound):
     aqpq5Shimmer = call(
         [sound, point_process], "Get shimmer (apq5)", 0, 0, 0.0001, 0.02, 1.3, 1.6
     )
-    return [localShimmer, localdbShimmer, apq3Shimmer, aqpq5Shimmer]
+    # Amplitude pertubation quotient over 11 periods / average amplitude
+    apq11Shimmer = call(
+        [sound, point_process], "Get shimmer (apq11)", 0, 0, 0.0001, 0.02, 1.3, 1.6
+    )
+    # average absolute difference between consecutive amplitude differences (3 x APQ3)
+    ddaShimmer = call(
+        [sound, point_process], "Get shimmer (dda)", 0, 0, 0.0001, 0.02, 1.3, 1.6
+    )
+    return [localShimmer, localdbShimmer, apq3Shimmer, aqpq5Shimmer, apq11Shimmer, ddaShimmer]
 
 
-def calculate_jitter(sound):
+def calculate_jitter(sound, f0=None):
     """
     Calculate the jitter (mean, median, std, min, max) for a given parselmouth Sound object.
 
     Args:
         sound (parselmouth.Sound): A parselmouth Sound object.
+        f0 (list, optional): calculate_fundamental_frequency statistics, if already computed.
 
     Returns:
         list: A list of jitter statistics.
     """
-    max_freq = calculate_fundamental_frequency(sound)[-1]
-    min_freq = calculate_fundamental_frequency(sound)[-2]
+    if f0 is None:
+        f0 = calculate_fundamental_frequency(sound)
+    max_freq = f0[-1]
+    min_freq = f0[-2]
     point_process = call(sound, "To PointProcess (periodic, cc)", min_freq, max_freq)
     # Jitter metrics are called on the PointProcess object, not [sound, point_process]
     # Praat signature: (time range start [s], time range end [s], min period [s], max period [s], max period factor)
@@ -310,7 +520,9 @@ def calculate_jitter(sound):
     # relative average perturbation (mean diff with two neighbors)
     jitter_ppq5 = call(point_process, "Get jitter (ppq5)", 0, 0, 0.0001, 0.02, 1.3)
     # five-point period perturbation quotient (mean diff with four neighbors)
-    return [jitter_local, jitter_local_absolute, jitter_rap, jitter_ppq5]
+    jitter_ddp = call(point_process, "Get jitter (ddp)", 0, 0, 0.0001, 0.02, 1.3)
+    # average absolute difference between consecutive period differences (3 x RAP)
+    return [jitter_local, jitter_local_absolute, jitter_rap, jitter_ppq5, jitter_ddp]
 
 
 def calculate_mfcc(sound):
@@ -339,19 +551,21 @@ def calculate_mfcc(sound):
     )
 
 
-def calculate_ppe(sound):
+def calculate_ppe(sound, frequencies=None):
     """
     Calculate the pitch period entropy for a given parselmouth Sound object.
 
     Args:
         sound (parselmouth.Sound): A parselmouth Sound object.
+        frequencies (numpy.ndarray, optional): Voiced F0 frames, if already computed.
 
     Returns:
         float: The pitch period entropy value.
     """
-    f0_mean = calculate_fundamental_frequency(sound)[0]
+    if frequencies is None:
+        frequencies = calculate_fundamental_frequency(sound, "frequencies")
+    f0_mean = np.mean(frequencies)
     f_min = f0_mean / np.sqrt(2)
-    frequencies = calculate_fundamental_frequency(sound, "frequencies")
     ratio_frequencies = np.array(frequencies / f_min)
     semitone_frequencies = np.log(ratio_frequencies) / np.log(2 ** (1 / 12))
     a = librosa.lpc(semitone_frequencies, order=2)
@@ -415,7 +629,7 @@ def calculate_interword_pauses(
     return float(np.mean(pauses)) if pauses else 0.0
 
 
-def compute_cpp(sound):
+def compute_cpp(sound, time_step=0.01):
     """
     Computes Cepstral Peak Prominence (CPPS) using a detailed Praat workflow.
 
@@ -429,7 +643,7 @@ def compute_cpp(sound):
             sound,
             "To PowerCepstrogram",
             75,      # Pitch floor (Hz)
-            0.01,    # Time step (s)
+            time_step,  # Time step (s)
             5000,    # Max frequency (Hz)
             50       # Pre-emphasis from (Hz)
         )
@@ -459,32 +673,115 @@ def compute_cpp(sound):
 def calculate_audio_features(audio_path,
                             silencedb: float = DEFAULT_SILENCE_DB,
                             min_pause: float = DEFAULT_MIN_PAUSE_SECONDS,
-                            silence_threshold: float = DEFAULT_SILENCE_THRESHOLD):
+                            silence_threshold: float = DEFAULT_SILENCE_THRESHOLD,
+                            window_seconds=None,
+                            contour_path=None,
+                            analysis_sample_rate=DEFAULT_ANALYSIS_SAMPLE_RATE,
+                            pauses=True,
+                            perturbation_engine="praat",
+                            fidelity="full"):
     """
     Calculate the audio features for a given audio file.
 
     Args:
-        audio_path (str): The path to the audio file.
+        audio_path (str or parselmouth.Sound): The path to the audio file, or an already decoded Sound.
+        contour_path (str, optional): If given, the frame-level F0, intensity, HNR, F1/F2
+            and MFCC tracks are also saved there (see contours.aggregate_contours).
+        analysis_sample_rate (float, optional): Resample once to this rate before
+            analysis (see benchmarks.sample_rate_drift_report for the feature drift).
+        window_seconds (float, optional): If given, analyze the file in overlapping
+            windows of this length with bounded memory. Only the features that can be
+            merged across windows are returned, plus a per-window "windows" table
+            (see windowed_analysis for the tolerances against whole-file analysis).
+            It needs a path and the defaults of contour_path, analysis_sample_rate,
+            pauses, perturbation_engine and fidelity; other values raise an error.
+        pauses (bool): Run the Praat silence pass for avg_pause_duration. Runs with word
+            timestamps can skip it (see transcription_functions.word_timing_features).
+        perturbation_engine (str): "praat" queries Praat for each jitter and shimmer
+            variant; "numpy" computes all of them from one point process (see
+            perturbation), in the same order.
+        fidelity (str): "full" or "fast" (see FIDELITY_PRESETS); analysis_sample_rate,
+            if given, overrides the tier's rate.
 
     Returns:
         dict: A dictionary containing the audio features.
     """
-    sound = parselmouth.Sound(audio_path)
+    if window_seconds is not None:
+        from feature_calculation import windowed_analysis
+
+        windowed_analysis.check_options(
+            audio_path,
+            contour_path=(contour_path, None),
+            analysis_sample_rate=(analysis_sample_rate, DEFAULT_ANALYSIS_SAMPLE_RATE),
+            pauses=(pauses, True),
+            perturbation_engine=(perturbation_engine, "praat"),
+            fidelity=(fidelity, "full"),
+        )
+        return windowed_analysis.windowed_audio_features(
+            audio_path,
+            window_seconds,
+            silencedb=silencedb,
+            min_pause=min_pause,
+            silence_threshold=silence_threshold,
+        )
+    settings = FIDELITY_PRESETS[fidelity]
+    if analysis_sample_rate is None:
+        analysis_sample_rate = settings["analysis_sample_rate"]
+    sound = resample_for_analysis(load_sound(audio_path), analysis_sample_rate)
     data = {}
-    data["fundamental_frequency"] = calculate_fundamental_frequency(sound)
-    data["intensity"] = calculate_intensity(sound)
-    data["harmonicity"] = calculate_harmonicity(sound)
-    data["shimmer"] = calculate_shimmer(sound)
-    data["jitter"] = calculate_jitter(sound)
-    data["ppe"] = calculate_ppe(sound)
-    # Pause features depend on silence detection parameters – pass them through
-    data["avg_pause_duration"] = calculate_interword_pauses(
-        sound,
-        silencedb=silencedb,
-        min_pause=min_pause,
-        silence_threshold=silence_threshold,
+    analyses = {}
+    if contour_path is not None:
+        # the contour writer reuses the analyses behind the summary statistics
+        analyses = {
+            "pitch": sound.to_pitch(time_step=settings["pitch_time_step"]),
+            "intensity": sound.to_intensity(time_step=settings["intensity_time_step"]),
+            "harmonicity": call(
+                sound, "To Harmonicity (cc)", settings["harmonicity_time_step"], 75, 0.1, 1.0
+            ),
+        }
+    # one pitch analysis shared by F0, jitter, shimmer and PPE
+    frequencies = calculate_fundamental_frequency(
+        sound, "frequencies", time_step=settings["pitch_time_step"], pitch=analyses.get("pitch")
     )
-    data["cpp"] = compute_cpp(sound)
+    data["fundamental_frequency"] = [
+        np.mean(frequencies),
+        np.median(frequencies),
+        np.std(frequencies),
+        np.min(frequencies),
+        np.max(frequencies),
+    ]
+    data["intensity"] = calculate_intensity(
+        sound, settings["intensity_time_step"], analyses.get("intensity")
+    )
+    data["harmonicity"] = calculate_harmonicity(
+        sound, settings["harmonicity_time_step"], analyses.get("harmonicity")
+    )
+    if perturbation_engine == "numpy":
+        from feature_calculation import perturbation
+
+        f0 = data["fundamental_frequency"]
+        measures = perturbation.perturbation_measures(sound, f0[3], f0[4])
+        data["shimmer"] = perturbation.shimmer_list(measures)
+        data["jitter"] = perturbation.jitter_list(measures)
+    else:
+        data["shimmer"] = calculate_shimmer(sound, data["fundamental_frequency"])
+        data["jitter"] = calculate_jitter(sound, data["fundamental_frequency"])
+    data["ppe"] = calculate_ppe(sound, frequencies)
+    # Pause features depend on silence detection parameters – pass them through
+    if pauses:
+        data["avg_pause_duration"] = calculate_interword_pauses(
+            sound,
+            silencedb=silencedb,
+            min_pause=min_pause,
+            silence_threshold=silence_threshold,
+        )
+    data["cpp"] = compute_cpp(sound, settings["cepstrogram_time_step"])
+    if contour_path is not None:
+        from feature_calculation import contours
+
+        contours.save_contours(
+            contour_path, contours.extract_contours(sound, fidelity=fidelity, **analyses)
+        )
     # Check for NaNs or infs in feature dict
     for k, v in data.items():
         if isinstance(v, (list, np.ndarray)):
@@ -0,0 +1,538 @@
+"""
+Benchmarks and parity reports for the speed/fidelity options of the pipeline.
+Each function returns a tidy DataFrame (one row per file and option) and can
+optionally save it as CSV.
+"""
+import os
+import re
+import time
+import parselmouth
+import numpy as np
+import pandas as pd
+from feature_calculation import audio_features
+from feature_calculation import vowel_space
+
+
+def _relative_difference(value, reference):
+    if reference == 0 or reference is None or np.isnan(reference):
+        return np.nan
+    return abs(value - reference) / abs(reference)
+
+
+def _save(df, save_path):
+    if save_path is not None:
+        df.to_csv(save_path, index=False)
+    return df
+
+
+def benchmark_outlier_methods(audio_paths, methods=None, save_path=None):
+    """
+    Time each formant outlier method and compare the downstream AAVS and hull area
+    with the GMM baseline.
+
+    Formant frames are extracted once per file; only the outlier step is timed.
+
+    Args:
+        audio_paths (list): Paths to (preprocessed) audio files.
+        methods (list, optional): Outlier methods; all of audio_features.OUTLIER_METHODS by default.
+        save_path (str, optional): If given, the report is also written there as CSV.
+
+    Returns:
+        pandas.DataFrame: file, method, seconds, n_inliers, inlier_jaccard (frames kept
+        in common with GMM), aavs, hull_area and their relative differences to GMM.
+    """
+    if methods is None:
+        methods = list(audio_features.OUTLIER_METHODS)
+    rows = []
+    for audio_path in audio_paths:
+        raw_formant_df = audio_features.extract_formant_frames(parselmouth.Sound(audio_path))
+        results = {}
+        for method in ["gmm"] + [m for m in methods if m != "gmm"]:
+            start = time.perf_counter()
+            inliers = audio_features.filter_formant_outliers(raw_formant_df, method=method)
+            seconds = time.perf_counter() - start
+            hz_data = inliers[["F1(Hz)", "F2(Hz)"]]
+            results[method] = {
+                "file": os.path.basename(audio_path),
+                "method": method,
+                "seconds": seconds,
+                "n_inliers": len(inliers),
+                "times": set(inliers["Time(s)"]),
+                "aavs": audio_features.calculate_aavs(hz_data),
+                "hull_area": audio_features.calculate_hull_area(hz_data),
+            }
+        baseline = results["gmm"]
+        for method in methods:
+            row = results[method]
+            union = row["times"] | baseline["times"]
+            row["inlier_jaccard"] = (
+                len(row["times"] & baseline["times"]) / len(union) if union else np.nan
+            )
+            row["aavs_rel_diff"] = _relative_difference(row["aavs"], baseline["aavs"])
+            row["hull_area_rel_diff"] = _relative_difference(
+                row["hull_area"], baseline["hull_area"]
+            )
+            row["speedup"] = baseline["seconds"] / row["seconds"]
+            del row["times"]
+            rows.append(row)
+    return _save(pd.DataFrame(rows), save_path)
+
+
+def vowel_space_parity_report(audio_paths, save_path=None):
+    """
+    Compare the vowel-space metrics of vowel_space (reusing the outlier GMM) with the
+    previous KMeans-based calculate_aavs / calculate_hull_area values.
+
+    Args:
+        audio_paths (list): Paths to (preprocessed) audio files.
+        save_path (str, optional): If given, the report is also written there as CSV.
+
+    Returns:
+        pandas.DataFrame: Per file, both AAVS and hull areas, their relative
+        differences, the density-weighted VSA and the time of the KMeans fit saved.
+    """
+    rows = []
+    for audio_path in audio_paths:
+        formant_data, model = audio_features.generate_formant_data(
+            audio_path, return_model=True
+        )
+        hz = formant_data[["F1(Hz)", "F2(Hz)"]]
+        bark = formant_data[["F1(Bark)", "F2(Bark)"]]
+        start = time.perf_counter()
+        legacy_hull = audio_features.calculate_hull_area(hz)
+        kmeans_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        metrics = vowel_space.vowel_space_metrics(hz.to_numpy(), bark.to_numpy(), model)
+        vowel_space_seconds = time.perf_counter() - start
+        legacy_aavs = audio_features.calculate_aavs(hz)
+        rows.append(
+            {
+                "file": os.path.basename(audio_path),
+                "aavs_legacy": legacy_aavs,
+                "aavs": metrics["aavs"],
+                "aavs_rel_diff": _relative_difference(metrics["aavs"], legacy_aavs),
+                "hull_area_legacy": legacy_hull,
+                "hull_area": metrics["hull_area"],
+                "hull_area_rel_diff": _relative_difference(metrics["hull_area"], legacy_hull),
+                "vsa_density": metrics["vsa_density"],
+                "n_clusters": metrics["n_clusters"],
+                "kmeans_seconds": kmeans_seconds,
+                "vowel_space_seconds": vowel_space_seconds,
+            }
+        )
+    report = pd.DataFrame(rows)
+    if len(report) > 1:
+        # hull areas from different clusterings differ in scale; rank agreement
+        # tells whether group comparisons survive the change
+        report.attrs["hull_area_spearman"] = report["hull_area_legacy"].corr(
+            report["hull_area"], method="spearman"
+        )
+    return _save(report, save_path)
+
+
+def flatten_features(data, prefix=""):
+    """
+    Flatten a feature dict (as returned by calculate_audio_features) into scalar
+    columns, numbering list entries: {"intensity": [a, b]} -> intensity_0, intensity_1.
+    """
+    flat = {}
+    for key, value in data.items():
+        if isinstance(value, pd.DataFrame):
+            continue
+        if isinstance(value, (list, tuple, np.ndarray)):
+            for i, v in enumerate(np.ravel(np.asarray(value, dtype=object))):
+                flat[f"{prefix}{key}_{i}"] = v
+        elif isinstance(value, (int, float, np.number)):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _drift_rows(audio_path, option, reference, candidate, seconds, reference_seconds):
+    rows = []
+    for feature, ref_value in reference.items():
+        value = candidate.get(feature, np.nan)
+        rows.append(
+            {
+                "file": os.path.basename(audio_path),
+                "option": option,
+                "feature": feature,
+                "reference": ref_value,
+                "value": value,
+                "rel_error": _relative_difference(float(value), float(ref_value)),
+                "seconds": seconds,
+                "speedup": reference_seconds / seconds,
+            }
+        )
+    return rows
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def _speech_and_audio_features(sound, **kwargs):
+    from feature_calculation import transcription_functions
+
+    features = flatten_features(audio_features.calculate_audio_features(sound, **kwargs))
+    speech = transcription_functions.adv_speech_metrics(
+        sound,
+        analysis_sample_rate=kwargs.get("analysis_sample_rate"),
+        fidelity=kwargs.get("fidelity", "full"),
+    )
+    features.update(flatten_features(speech, prefix="speech_"))
+    return features
+
+
+def summarize_drift(report):
+    """
+    Median and maximum relative error and median speedup per option and feature.
+    """
+    return report.groupby(["option", "feature"]).agg(
+        median_rel_error=("rel_error", "median"),
+        max_rel_error=("rel_error", "max"),
+        speedup=("speedup", "median"),
+    )
+
+
+def sample_rate_drift_report(audio_paths, rates=(16000, 22050), save_path=None):
+    """
+    Compare calculate_audio_features and adv_speech_metrics at reduced analysis
+    sample rates with native-rate analysis.
+
+    Args:
+        audio_paths (list): Paths to (preprocessed) audio files.
+        rates (tuple): Analysis sample rates to test.
+        save_path (str, optional): If given, the report is also written there as CSV.
+
+    Returns:
+        pandas.DataFrame: One row per file, rate and feature with the native value,
+        the value at that rate, the relative error and the speedup. Use
+        summarize_drift for a per-feature overview.
+    """
+    rows = []
+    for audio_path in audio_paths:
+        sound = parselmouth.Sound(audio_path)
+        reference, reference_seconds = _timed(_speech_and_audio_features, sound)
+        for rate in rates:
+            features, seconds = _timed(
+                _speech_and_audio_features, sound, analysis_sample_rate=rate
+            )
+            rows += _drift_rows(
+                audio_path, f"{rate} Hz", reference, features, seconds, reference_seconds
+            )
+    return _save(pd.DataFrame(rows), save_path)
+
+
+def _fidelity_features(sound, fidelity):
+    """
+    Voice, speech-rate and vowel-space features of one file at a fidelity tier,
+    resampled once as process_audio_file does.
+    """
+    sound = audio_features.resample_for_analysis(
+        sound, audio_features.FIDELITY_PRESETS[fidelity]["analysis_sample_rate"]
+    )
+    features = _speech_and_audio_features(sound, fidelity=fidelity)
+    formant_data, model = audio_features.generate_formant_data(
+        sound, return_model=True, fidelity=fidelity
+    )
+    vowel_metrics = vowel_space.vowel_space_metrics(
+        formant_data[["F1(Hz)", "F2(Hz)"]].to_numpy(),
+        formant_data[["F1(Bark)", "F2(Bark)"]].to_numpy(),
+        model,
+    )
+    features.update(flatten_features(vowel_metrics, prefix="vowel_"))
+    return features
+
+
+def fidelity_error_report(audio_paths, fidelities=("fast",), save_path=None):
+    """
+    Per-feature error and speedup of reduced fidelity tiers against "full" (see
+    audio_features.FIDELITY_PRESETS).
+
+    Args:
+        audio_paths (list): Paths to (preprocessed) audio files.
+        fidelities (tuple): Tiers to compare with "full".
+        save_path (str, optional): If given, the report is also written there as CSV.
+
+    Returns:
+        pandas.DataFrame: One row per file, tier and feature with the "full" value,
+        the value at that tier, the relative error and the speedup. Use
+        summarize_drift for a per-feature overview.
+    """
+    rows = []
+    for audio_path in audio_paths:
+        sound = parselmouth.Sound(audio_path)
+        reference, reference_seconds = _timed(_fidelity_features, sound, "full")
+        for fidelity in fidelities:
+            features, seconds = _timed(_fidelity_features, sound, fidelity)
+            rows += _drift_rows(
+                audio_path, fidelity, reference, features, seconds, reference_seconds
+            )
+    return _save(pd.DataFrame(rows), save_path)
+
+
+def silence_sweep_parity_report(audio_paths, save_path=None):
+    """
+    Compare silence_sweep at the pipeline's parameters with the Praat path, and time
+    a DEFAULT_GRID sweep against a single Praat run.
+
+    Args:
+        audio_paths (list): Paths to (preprocessed) audio files.
+        save_path (str, optional): If given, the report is also written there as CSV.
+
+    Returns:
+        pandas.DataFrame: Per file, avg pause duration (calculate_interword_pauses
+        defaults) and nsyll, npause, speech and articulation rate (adv_speech_metrics
+        parameters) from both paths, plus praat_seconds for one run and sweep_seconds
+        for the whole default grid.
+    """
+    from feature_calculation import silence_sweep
+    from feature_calculation import transcription_functions
+
+    pause_params = {
+        "silencedb": [audio_features.DEFAULT_SILENCE_DB],
+        "min_pause": [audio_features.DEFAULT_MIN_PAUSE_SECONDS],
+        "silence_threshold": [audio_features.DEFAULT_SILENCE_THRESHOLD],
+        "mindip": [2],
+    }
+    speech_params = {"silencedb": [-25], "min_pause": [0.1], "silence_threshold": [0.1], "mindip": [2]}
+    rows = []
+    for audio_path in audio_paths:
+        sound = parselmouth.Sound(audio_path)
+        start = time.perf_counter()
+        pause = audio_features.calculate_interword_pauses(sound)
+        speech = transcription_functions.adv_speech_metrics(sound)
+        praat_seconds = time.perf_counter() - start
+        contours = silence_sweep.extract_sweep_contours(sound)
+        swept_pause = silence_sweep.sweep_contours(contours, pause_params).iloc[0]
+        swept_speech = silence_sweep.sweep_contours(contours, speech_params).iloc[0]
+        _, sweep_seconds = _timed(
+            silence_sweep.sweep_silence_parameters, [sound], silence_sweep.DEFAULT_GRID
+        )
+        rows.append(
+            {
+                "file": os.path.basename(audio_path),
+                "avg_pause_duration_praat": pause,
+                "avg_pause_duration": swept_pause["avg_pause_duration"],
+                "nsyll_praat": speech["nsyll"],
+                "nsyll": swept_speech["nsyll"],
+                "npause_praat": speech["npause"],
+                "npause": swept_speech["n_pauses"],
+                "speech_rate_rel_diff": _relative_difference(
+                    swept_speech["speech_rate"], speech["speechrate(nsyll / dur)"]
+                ),
+                "articulation_rate_rel_diff": _relative_difference(
+                    swept_speech["articulation_rate"],
+                    speech["articulation_rate(nsyll/phonationtime)"],
+                ),
+                "praat_seconds": praat_seconds,
+                "sweep_seconds": sweep_seconds,
+                "grid_points": len(silence_sweep.parameter_grid()),
+            }
+        )
+    return _save(pd.DataFrame(rows), save_path)
+
+
+def perturbation_parity_report(audio_paths, save_path=None):
+    """
+    Compare the NumPy jitter/shimmer engine with Praat's queries on the same point
+    process settings.
+
+    Args:
+        audio_paths (list): Paths to (preprocessed) audio files.
+        save_path (str, optional): If given, the report is also written there as CSV.
+
+    Returns:
+        pandas.DataFrame: One row per file and measure with the Praat value, the
+        NumPy value, the relative error, whether it is within the engine's tolerance
+        (perturbation.JITTER_RTOL / SHIMMER_RTOL) and the speedup of the whole
+        measure set.
+    """
+    from feature_calculation import perturbation
+
+    rows = []
+    for audio_path in audio_paths:
+        sound = parselmouth.Sound(audio_path)
+        f0 = audio_features.calculate_fundamental_frequency(sound)
+        start = time.perf_counter()
+        praat = dict(
+            zip(
+                [f"jitter_{m}" for m in perturbation.JITTER_MEASURES],
+                audio_features.calculate_jitter(sound, f0),
+            )
+        )
+        praat.update(
+            zip(
+                [f"shimmer_{m}" for m in perturbation.SHIMMER_MEASURES],
+                audio_features.calculate_shimmer(sound, f0),
+            )
+        )
+        praat_seconds = time.perf_counter() - start
+        measures, seconds = _timed(perturbation.perturbation_measures, sound, f0[3], f0[4])
+        for name, reference in praat.items():
+            rel_error = _relative_difference(measures[name], reference)
+            rtol = perturbation.JITTER_RTOL if name.startswith("jitter") else perturbation.SHIMMER_RTOL
+            rows.append(
+                {
+                    "file": os.path.basename(audio_path),
+                    "measure": name,
+                    "praat": reference,
+                    "numpy": measures[name],
+                    "rel_error": rel_error,
+                    "within_tolerance": bool(rel_error <= rtol),
+                    "speedup": praat_seconds / seconds,
+                }
+            )
+    return _save(pd.DataFrame(rows), save_path)
+
+
+def _normalize_words(text):
+    text = re.sub(r"[^a-z0-9' ]", " ", text.lower())
+    return text.split()
+
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word error rate (substitutions + deletions + insertions over reference words)
+    after lowercasing and stripping punctuation.
+    """
+    ref = _normalize_words(reference)
+    hyp = _normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    # edit distance over words, one row at a time
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+
+WHISPER_CONFIGS = {
+    "fp32-default": {},
+    "fp32-greedy": {"decoding": "greedy"},
+    "int8-greedy": {"quantize": True, "decoding": "greedy"},
+    "int8-beam": {"quantize": True, "decoding": "beam"},
+}
+
+
+def benchmark_whisper_inference(
+    audio_paths, configs=None, num_threads=None, reference_dir=None, save_path=None
+):
+    """
+    Real-time factor and word error rate of Whisper inference configurations.
+
+    Args:
+        audio_paths (list): Audio files, e.g. the bundled "Audio Files" samples.
+        configs (dict, optional): Name -> options for transcription_functions.load_model
+            plus "decoding" (a DECODING_PRESETS name). Defaults to WHISPER_CONFIGS.
+        num_threads (int, optional): torch threads for every configuration.
+        reference_dir (str, optional): Directory with <name>.txt reference transcripts.
+            By default the transcripts of the current pipeline (fp32, default decoding)
+            are used as reference.
+        save_path (str, optional): If given, the report is also written there as CSV.
+
+    Returns:
+        pandas.DataFrame: file, config, seconds, audio_seconds, rtf (seconds per second of
+        audio) and wer against the reference.
+    """
+    import whisper
+    from feature_calculation import transcription_functions
+
+    if configs is None:
+        configs = WHISPER_CONFIGS
+    audio = {path: whisper.load_audio(path) for path in audio_paths}
+    references = {}
+    if reference_dir is not None:
+        for path in audio_paths:
+            name = os.path.splitext(os.path.basename(path))[0]
+            with open(os.path.join(reference_dir, name + ".txt"), "r") as f:
+                references[path] = f.read()
+    else:
+        for path in audio_paths:
+            references[path] = transcription_functions.model.transcribe(audio[path])["text"]
+
+    rows = []
+    for config_name, options in configs.items():
+        options = dict(options)
+        decode_options = dict(
+            transcription_functions.DECODING_PRESETS[options.pop("decoding", "default")]
+        )
+        if options.get("quantize"):
+            decode_options["fp16"] = False
+        model = transcription_functions.load_model(num_threads=num_threads, **options)
+        for path in audio_paths:
+            text, seconds = _timed(model.transcribe, audio[path], **decode_options)
+            audio_seconds = len(audio[path]) / whisper.audio.SAMPLE_RATE
+            rows.append(
+                {
+                    "file": os.path.basename(path),
+                    "config": config_name,
+                    "seconds": seconds,
+                    "audio_seconds": audio_seconds,
+                    "rtf": seconds / audio_seconds,
+                    "wer": word_error_rate(references[path], text["text"]),
+                }
+            )
+    return _save(pd.DataFrame(rows), save_path)
+
+
+def benchmark_resource_layouts(audio_paths, layouts=None, save_path=None, **build_options):
+    """
+    Time build_csv on the same files under different worker x thread layouts.
+
+    Every layout starts from an empty results directory, so transcripts are not
+    reused between runs.
+
+    Args:
+        audio_paths (list): Audio files to process.
+        layouts (list, optional): (workers, threads_per_worker) pairs; defaults to
+            resource_governor.candidate_layouts().
+        save_path (str, optional): If given, the report is also written there as CSV.
+        **build_options: Extra build_csv arguments, e.g. whisper_options.
+
+    Returns:
+        pandas.DataFrame: workers, threads_per_worker, seconds and files_per_second,
+        fastest first.
+    """
+    import tempfile
+    from feature_calculation import build_biomarker_csv
+    from feature_calculation import resource_governor
+
+    if layouts is None:
+        layouts = resource_governor.candidate_layouts()
+    rows = []
+    for workers, threads in layouts:
+        with tempfile.TemporaryDirectory() as tmp:
+            _, seconds = _timed(
+                build_biomarker_csv.build_csv,
+                os.path.join(tmp, "metrics.csv"),
+                audio_files=list(audio_paths),
+                results_dir=os.path.join(tmp, "Results-"),
+                workers=workers,
+                threads_per_worker=threads,
+                **build_options,
+            )
+        rows.append(
+            {
+                "workers": workers,
+                "threads_per_worker": threads,
+                "seconds": seconds,
+                "files_per_second": len(audio_paths) / seconds,
+            }
+        )
+    report = pd.DataFrame(rows).sort_values("seconds").reset_index(drop=True)
+    return _save(report, save_path)
+
+
+if __name__ == "__main__":
+    audio_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Audio Files")
+    paths = [os.path.join(audio_dir, f) for f in sorted(os.listdir(audio_dir)) if f.endswith(".wav")]
+    report = benchmark_outlier_methods(paths)
+    print(report.groupby("method")[["seconds", "speedup", "aavs_rel_diff", "hull_area_rel_diff"]].median())
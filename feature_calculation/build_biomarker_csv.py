@@ -1,11 +1,13 @@
 import os
 import multiprocessing
 import functools
+import contextlib
 import ssl
 import json
-import pydub
+import tempfile
 import pyfoal
 import parselmouth
+import soundfile as sf
 import numpy as np
 import pandas as pd
 from tqdm import tqdm
@@ -13,14 +15,29 @@ from pathlib import Path
 from praatio import textgrid
 from feature_calculation import text_features
 from feature_calculation import audio_features
+from feature_calculation import vowel_space
+from feature_calculation import contours
+from feature_calculation import columnar_io
 from audio_preprocessing import audio_preprocessing
+from audio_preprocessing import quality
 from feature_calculation import transcription_functions
+from feature_calculation import work_queue
+from feature_calculation import corpus_manifest
+from feature_calculation import artifact_store
+from feature_calculation import resource_governor
+from feature_calculation import pipeline_profiles
 import warnings
 
 warnings.filterwarnings("ignore")
 
 ssl._create_default_https_context = ssl._create_unverified_context
 
+WORD_TIER = "words"
+# names aligners give the phone tier; build_text_grids writes the first
+PHONE_TIERS = ("phones", "phonemes")
+# metrics column holding the error of files whose processing failed
+ERROR_COLUMN = "error"
+
 
 def calculate_vai(audio_path, grid_path):
     """
@@ -42,7 +59,13 @@ def calculate_vai(audio_path, grid_path):
             f"Error processing {audio_path} and {grid_path}, maybe the file was excluded?"
         )
         return None
-    phone_tier = tg.tiers[0]
+    phone_tier = find_tier(tg, PHONE_TIERS)
+    if phone_tier is None and len(tg.tiers) == 1:
+        # single-tier grids from older runs hold only phones
+        phone_tier = tg.tiers[0]
+    if phone_tier is None:
+        print(f"No phone tier in {grid_path}, skipping VAI")
+        return None
 
     corner_vowels = {"i", "u", "æ", "ɑ"}
     formant_dict = {v: [] for v in corner_vowels}
@@ -76,94 +99,465 @@ def calculate_vai(audio_path, grid_path):
     return VAI
 
 
-def build_text_grids(preprocessed_dir, textgrid_dir):
+def find_tier(tg, names):
+    """
+    Return the first tier of a praatio TextGrid whose name is in names, or None.
+    """
+    for name in names:
+        if name in tg.tierNames:
+            return tg.getTier(name)
+    return None
+
+
+def word_tier_entries(segments):
+    """
+    (start, end, word) intervals from Whisper segments with word timestamps, clipped
+    so that they do not overlap; words without duration are dropped.
+    """
+    entries = []
+    previous_end = 0.0
+    for segment in segments:
+        for word in segment.get("words", []):
+            label = word["word"].strip()
+            start = max(word["start"], previous_end)
+            end = word["end"]
+            if label and end > start:
+                entries.append((start, end, label))
+                previous_end = end
+    return entries
+
+
+def write_text_grid(grid_path, segments, duration, phone_entries=None):
+    """
+    Write a TextGrid with a "words" tier from Whisper segments and, if given, a
+    "phones" tier. The file is replaced atomically.
+    """
+    tg = textgrid.Textgrid()
+    # Whisper's last word can end past the audio; clip it like the phones
+    words = [(start, min(end, duration), label)
+             for start, end, label in word_tier_entries(segments) if start < duration]
+    tg.addTier(textgrid.IntervalTier(WORD_TIER, words, 0, duration))
+    if phone_entries is not None:
+        phones = [(start, min(end, duration), label) for start, end, label in phone_entries
+                  if start < duration]
+        tg.addTier(textgrid.IntervalTier(PHONE_TIERS[0], phones, 0, duration))
+    tmp_path = f"{grid_path}.tmp-{os.getpid()}"
+    tg.save(tmp_path, format="short_textgrid", includeBlankSpaces=True)
+    os.replace(tmp_path, grid_path)
+
+
+def _is_stale(output, sources):
+    """
+    True if output is missing or older than any existing source file.
+    """
+    if not os.path.exists(output):
+        return True
+    built = os.path.getmtime(output)
+    return any(os.path.exists(src) and os.path.getmtime(src) > built for src in sources)
+
+
+def _align_chunk(chunk, aligner):
+    """
+    Run a pyfoal aligner on one chunk of (text, audio, output) paths.
+    """
+    texts, audios, outputs = (list(x) for x in zip(*chunk))
+    pyfoal.from_files_to_files(texts, audios, outputs, aligner=aligner)
+    return outputs
+
+
+def _artifact_file(results_dir, key, kind, store, tmp_dir):
+    """
+    A file path holding an artifact: the loose file, or the packed artifact written
+    to tmp_dir (tools like pyfoal and soundfile need paths). None if it is stored
+    nowhere.
+    """
+    path = artifact_store.loose_path(results_dir, key, kind)
+    if store is None or (os.path.exists(path) and not store.contains(key, kind)):
+        return path if os.path.exists(path) else None
+    data = artifact_store.read_artifact(results_dir, key, kind, store)
+    if data is None:
+        return None
+    path = os.path.join(tmp_dir, os.path.basename(path))
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def build_text_grids(
+    preprocessed_dir, textgrid_dir, phone_aligner=None, chunk_size=16, processes=None,
+    store=None,
+):
     """
     Generate TextGrid files for aligned audio and text pairs.
     TextGrids are written to the TextGrid subfolder in Results-.
+
+    The "words" tier comes from the cached Whisper alignment JSON in
+    Results-/Alignments, so no second aligner run is needed for it. With
+    phone_aligner (a pyfoal aligner such as "mfa") a "phones" tier is added from
+    that aligner, run in parallel chunks of chunk_size files.
+    Only TextGrids that are missing or older than their audio, transcript or
+    alignment are rebuilt.
+
+    With store (an artifact_store.ArtifactStore), audio, transcripts and alignments
+    are read from it (loose files still count) and the TextGrids are stored in it as
+    "textgrid" artifacts, built for keys that have none yet.
+
+    Returns:
+        list: Paths of the TextGrids that were (re)built, or their keys with store.
     """
-    texts = sorted(
-        [
-            os.path.join(
-                os.path.dirname(preprocessed_dir),
-                "Text",
-                os.path.basename(x).replace(".wav", ".txt"),
+    results_dir = os.path.dirname(preprocessed_dir)
+    suffix = artifact_store.LOOSE_LAYOUT["preprocessed"][1]
+    keys = set()
+    if os.path.isdir(preprocessed_dir):
+        keys.update(n[: -len(suffix)] for n in os.listdir(preprocessed_dir) if n.endswith(suffix))
+    if store is not None:
+        keys.update(store.keys("preprocessed"))
+    else:
+        os.makedirs(textgrid_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_dir = textgrid_dir if store is None else tmp_dir
+        stale = []
+        for key in sorted(keys):
+            output = os.path.join(
+                out_dir, os.path.basename(artifact_store.loose_path(results_dir, key, "textgrid"))
             )
-            for x in os.listdir(preprocessed_dir)
-            if x.endswith("_preprocessed.wav")
-        ]
-    )
-    audios = sorted(
-        [
-            os.path.join(preprocessed_dir, x)
-            for x in os.listdir(preprocessed_dir)
-            if x.endswith("_preprocessed.wav")
-        ]
-    )
-    outputs = sorted(
-        [
-            os.path.join(
-                textgrid_dir,
-                os.path.basename(x).replace("_preprocessed.wav", "_alignment.TextGrid"),
+            if store is not None and store.contains(key, "textgrid"):
+                continue
+            sources = [
+                _artifact_file(results_dir, key, kind, store, tmp_dir)
+                for kind in ("text", "preprocessed", "alignment")
+            ]
+            text, audio, alignment = sources
+            if alignment is None:
+                print(f"No alignment for {key}, skipping TextGrid")
+                continue
+            if store is not None or _is_stale(output, [p for p in sources if p]):
+                stale.append((key, text, audio, alignment, output))
+
+        phone_grids = {}
+        if phone_aligner is not None and stale:
+            phone_dir = os.path.join(out_dir, "Phones")
+            os.makedirs(phone_dir, exist_ok=True)
+            jobs = [
+                (Path(text), Path(audio), Path(os.path.join(phone_dir, os.path.basename(output))))
+                for _, text, audio, _, output in stale
+            ]
+            chunks = [jobs[i : i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+            with multiprocessing.Pool(processes) as pool:
+                pool.starmap(_align_chunk, [(chunk, phone_aligner) for chunk in chunks])
+            for (_, _, _, _, output), (_, _, phone_path) in zip(stale, jobs):
+                phone_grids[output] = str(phone_path)
+
+        built = []
+        for key, text, audio, alignment, output in stale:
+            with open(alignment, "r", encoding="utf-8") as f:
+                segments = json.load(f)
+            phone_entries = None
+            if output in phone_grids and os.path.exists(phone_grids[output]):
+                phone_tier = find_tier(textgrid.openTextgrid(phone_grids[output], False), PHONE_TIERS)
+                if phone_tier is not None:
+                    phone_entries = [tuple(e) for e in phone_tier.entries]
+            write_text_grid(output, segments, sf.info(audio).duration, phone_entries)
+            if store is None:
+                built.append(output)
+            else:
+                with open(output, "rb") as f:
+                    store.put(key, "textgrid", f.read())
+                built.append(key)
+    return built
+
+
+# (artifact_dir, pid) -> ArtifactStore, so each worker appends to one pack
+_STORES = {}
+
+
+def worker_store(artifact_dir):
+    """
+    The ArtifactStore of this process for artifact_dir, created on first use. All
+    files a worker processes share it, so a run writes one pack and index per worker.
+    """
+    key = (os.path.abspath(artifact_dir), os.getpid())
+    if key not in _STORES:
+        _STORES[key] = artifact_store.ArtifactStore(artifact_dir)
+    return _STORES[key]
+
+
+def transcribe_and_align(
+    filename, preprocessed_path, whisper_audio, text_dir, align_dir, store=None
+):
+    """
+    Return the transcript and word-level alignment segments of a file, computing and
+    caching them if needed. The cache is the loose Text/Alignments layout, or a
+    packed ArtifactStore if one is given (loose files are still read as a fallback).
+    """
+    if store is None:
+        text_path = transcription_functions.transcribe_audio(
+            preprocessed_path, text_dir, audio=whisper_audio
+        )
+        with open(text_path, "r") as f:
+            text = f.read()
+        alignment_path = transcription_functions.align_audio(
+            preprocessed_path, align_dir, audio=whisper_audio
+        )
+        with open(alignment_path, "r", encoding="utf-8") as f:
+            segments = json.load(f)
+        return text, segments
+    results_dir = os.path.dirname(text_dir)
+    text = artifact_store.read_artifact(results_dir, filename, "text", store)
+    if text is None:
+        text = transcription_functions.transcribe_text(whisper_audio)
+        store.put_text(filename, "text", text)
+    else:
+        text = text.decode("utf-8")
+    segments = artifact_store.read_artifact(results_dir, filename, "alignment", store)
+    if segments is None:
+        segments = transcription_functions.transcribe_segments(whisper_audio)
+        store.put_json(filename, "alignment", segments)
+    else:
+        segments = json.loads(segments)
+    return text, segments
+
+
+def batch_transcribe(
+    audio_files,
+    results_dir,
+    batch_size=8,
+    artifact_dir=None,
+    quality_rules=None,
+    profile_map=None,
+    profile_patterns=None,
+):
+    """
+    Transcribe and align files in batches (see transcription_functions.transcribe_batch)
+    into the same caches process_audio_file reads, so its workers skip Whisper.
+    Files are decoded and trimmed as in process_audio_file, batch_size at a time.
+    With quality_rules, files the quality screen would reject (with the rules of
+    their pipeline profile) are not transcribed.
+    """
+    text_dir = os.path.join(results_dir, "Text")
+    align_dir = os.path.join(results_dir, "Alignments")
+    store = None
+    if artifact_dir is not None:
+        store = worker_store(artifact_dir)
+
+    def cached(filename):
+        if store is None:
+            return os.path.exists(
+                os.path.join(text_dir, f"{filename}_preprocessed.txt")
+            ) and os.path.exists(os.path.join(align_dir, f"{filename}_preprocessed.json"))
+        return all(
+            artifact_store.read_artifact(results_dir, filename, kind, store) is not None
+            for kind in ("text", "alignment")
+        )
+
+    pending = [
+        f for f in audio_files if not cached(os.path.splitext(os.path.basename(f))[0])
+    ]
+    for start in tqdm(
+        range(0, len(pending), batch_size), desc="Transcribing batches"
+    ):
+        filenames, audios = [], []
+        for audio_path in pending[start : start + batch_size]:
+            audioSeg = audio_preprocessing.load_audio_segment(audio_path)
+            if quality_rules is not None:
+                profile = pipeline_profiles.select_profile(
+                    audio_path, profile_map, profile_patterns
+                )
+                raw_samples, raw_rate = audio_preprocessing.segment_to_array(audioSeg)
+                assessment = quality.assess_quality(
+                    raw_samples, raw_rate, quality.rules_for_profile(quality_rules, profile)
+                )
+                if assessment["status"] == "reject":
+                    continue
+            audioSeg = audio_preprocessing.trim_leading_and_lagging_silence(audioSeg)
+            if audioSeg.duration_seconds < 0.5:
+                continue
+            samples, sample_rate = audio_preprocessing.segment_to_array(audioSeg)
+            filenames.append(os.path.splitext(os.path.basename(audio_path))[0])
+            audios.append(audio_preprocessing.resample_array(samples, sample_rate, 16000))
+        if store is not None:
+            for filename, (text, segments) in zip(
+                filenames, transcription_functions.transcribe_batch(audios)
+            ):
+                store.put_text(filename, "text", text)
+                store.put_json(filename, "alignment", segments)
+        else:
+            transcription_functions.transcribe_files(
+                [f"{filename}_preprocessed.wav" for filename in filenames],
+                text_dir,
+                align_dir,
+                audios=audios,
+                batch_size=batch_size,
             )
-            for x in os.listdir(preprocessed_dir)
-            if x.endswith(".wav")
-        ]
-    )
-    texts = [Path(x) for x in texts]
-    audios = [Path(x) for x in audios]
-    outputs = [Path(x) for x in outputs]
-    alignment = pyfoal.from_files_to_files(texts, audios, outputs, aligner="mfa")
-    return None
 
 
-def process_audio_file(audio_path, results_dir):
+def process_audio_file(
+    audio_path,
+    results_dir,
+    save_contours=False,
+    outlier_method="gmm",
+    write_preprocessed=True,
+    analysis_sample_rate=audio_features.DEFAULT_ANALYSIS_SAMPLE_RATE,
+    artifact_dir=None,
+    pause_source="praat",
+    perturbation_engine="praat",
+    profile_map=None,
+    profile_patterns=None,
+    quality_rules=quality.DEFAULT_RULES,
+    fidelity="full",
+):
     """
     Process a single audio file and extract all metrics.
     All outputs are written into Results- subfolders.
+    With save_contours=True, frame-level tracks are stored in Results-/Contours.
+    outlier_method selects the formant outlier model (see audio_features.OUTLIER_METHODS).
+
+    The audio is decoded once: Praat analyses share one parselmouth.Sound built from
+    the trimmed samples and Whisper gets a 16 kHz array, so nothing re-reads the file.
+    With write_preprocessed=False the trimmed WAV is not written to
+    Results-/Preprocessed (build_text_grids needs it, though).
+    If analysis_sample_rate is set, the shared Sound is resampled to it once before
+    all Praat analyses.
+    With artifact_dir, preprocessed audio, transcripts and alignments are appended
+    to a packed artifact_store.ArtifactStore there instead of loose files.
+    Word-timing features (pauses, words per minute, word durations) come from the
+    alignment segments at no extra audio cost. With pause_source="words" they also
+    provide the Average Pause Duration and the Praat silence pass is skipped.
+    perturbation_engine="numpy" computes jitter and shimmer from one point process
+    (see perturbation) instead of one Praat query per variant.
+    The pipeline profile (see pipeline_profiles.select_profile with profile_map and
+    profile_patterns) decides which stages run; e.g. "phonation" skips Whisper,
+    text, vowel-space, speech-rate and pause features.
+    Before any of that, the decoded samples are screened (see
+    audio_preprocessing.quality) and the result is written to Results-/Quality;
+    files matching a reject rule in quality_rules (or in its per-profile rules, see
+    quality.rules_for_profile) are skipped. quality_rules=None disables the screen.
+    fidelity="fast" runs every Praat analysis at the coarser settings of
+    audio_features.FIDELITY_PRESETS (and at its sample rate unless analysis_sample_rate
+    is given).
     """
+    profile = pipeline_profiles.select_profile(audio_path, profile_map, profile_patterns)
+    active = pipeline_profiles.stages(profile)
     preprocessed_dir = os.path.join(results_dir, "Preprocessed")
     text_dir = os.path.join(results_dir, "Text")
     align_dir = os.path.join(results_dir, "Alignments")
-    for d in [preprocessed_dir, text_dir, align_dir]:
-        os.makedirs(d, exist_ok=True)
-    filename = os.path.basename(audio_path).replace(".wav", "")
-    metrics = {"filename": filename}
-    # Preprocess audio
-    audioSeg = pydub.AudioSegment.from_file(audio_path, format="wav")
-    audioSeg = audio_preprocessing.trim_leading_and_lagging_silence(audioSeg)
-    if audioSeg.duration_seconds < 0.5:
-        print(f"Audio file {filename} is too short, skipping...")
-        return None
-    preprocessed_path = os.path.join(preprocessed_dir, f"{filename}_preprocessed.wav")
-    audioSeg.export(preprocessed_path, format="wav")
-    # Transcribe and align
-    text_path = transcription_functions.transcribe_audio(preprocessed_path, text_dir)
+    store = None
+    if artifact_dir is not None:
+        store = worker_store(artifact_dir)
+    else:
+        for d in [preprocessed_dir, text_dir, align_dir]:
+            os.makedirs(d, exist_ok=True)
+    filename = os.path.splitext(os.path.basename(audio_path))[0]
+    metrics = {"filename": filename, "profile": profile}
+    # an undecodable file becomes an error row instead of failing the run
     try:
-        alignment_path = os.path.join(align_dir, f"{filename}_preprocessed.json")
-        transcription_functions.align_audio(preprocessed_path, align_dir)
-        with open(alignment_path, "r", encoding="utf-8") as f:
-            segments = json.load(f)
+        # Preprocess audio (WAV, FLAC, OGG/Opus or MP3, decoded in-process)
+        audioSeg = audio_preprocessing.load_audio_segment(audio_path)
+        if quality_rules is not None:
+            raw_samples, raw_rate = audio_preprocessing.segment_to_array(audioSeg)
+            assessment = quality.assess_quality(
+                raw_samples, raw_rate, quality.rules_for_profile(quality_rules, profile)
+            )
+            quality.write_quality(os.path.join(results_dir, "Quality"), filename, assessment)
+            if assessment["status"] == "reject":
+                print(f"Audio file {filename} failed the quality screen, skipping...")
+                return None
+            metrics["quality_status"] = assessment["status"]
+            metrics["SNR (db)"] = assessment["snr_db"]
+            metrics["Clipping Ratio"] = assessment["clipping_ratio"]
+            metrics["Speech Activity Ratio"] = assessment["speech_ratio"]
+            metrics["DC Offset"] = assessment["dc_offset"]
+        audioSeg = audio_preprocessing.trim_leading_and_lagging_silence(audioSeg)
+        if audioSeg.duration_seconds < 0.5:
+            print(f"Audio file {filename} is too short, skipping...")
+            return None
+        # preprocessed_path also names the cached transcripts and alignments
+        preprocessed_path = os.path.join(preprocessed_dir, f"{filename}_preprocessed.wav")
+        if write_preprocessed and store is not None:
+            store.put_segment(filename, audioSeg)
+        elif write_preprocessed:
+            audioSeg.export(preprocessed_path, format="wav")
+        samples, sample_rate = audio_preprocessing.segment_to_array(audioSeg)
+        sound = parselmouth.Sound(samples, sampling_frequency=sample_rate)
+        if analysis_sample_rate is None:
+            analysis_sample_rate = audio_features.FIDELITY_PRESETS[fidelity]["analysis_sample_rate"]
+        sound = audio_features.resample_for_analysis(sound, analysis_sample_rate)
+        if "asr" in active:
+            # Transcribe and align
+            whisper_audio = audio_preprocessing.resample_array(samples, sample_rate, 16000)
+            text, segments = transcribe_and_align(
+                filename, preprocessed_path, whisper_audio, text_dir, align_dir, store
+            )
         # Calculate metrics
-        formant_data = audio_features.generate_formant_data(preprocessed_path)
-        hz_data = formant_data[["F1(Hz)", "F2(Hz)"]]
-        metrics["AAVS"] = audio_features.calculate_aavs(hz_data)
-        metrics["Hull Area (hz^2)"] = audio_features.calculate_hull_area(hz_data)
-        lexical_dict = transcription_functions.adv_speech_metrics(preprocessed_path)
-        metrics["Speech Rate (syll/s)"] = lexical_dict["speechrate(nsyll / dur)"]
-        metrics["Articulation Rate (syll/s)"] = lexical_dict[
-            "articulation_rate(nsyll/phonationtime)"
-        ]
-        metrics["Average Syllable Duration (ms)"] = lexical_dict[
-            "average_syllable_dur(speakingtime/nsyll)"
-        ]*1000
-        text_feats = text_features.calculate_text_features(text_path)
-        metrics["Average Word Length (chars)"] = text_feats["avg_word_length"]
-        metrics["Content Richness"] = text_feats["content_richness"]
-        metrics["MATTR"] = text_feats["mattr"]
-        metrics["Phrase Patterns"] = text_feats["phrase_patterns"]
-        metrics["Sentence Length"] = text_feats["sentence_length"]
-        audio_feats = audio_features.calculate_audio_features(preprocessed_path)
-        metrics["Average Pause Duration (ms)"] = audio_feats["avg_pause_duration"]*1000
+        if "vowel_space" in active:
+            formant_data, formant_model = audio_features.generate_formant_data(
+                sound, outlier_method=outlier_method, return_model=True, fidelity=fidelity
+            )
+            # reuse the outlier model's clusters instead of a second clustering fit
+            vowel_metrics = vowel_space.vowel_space_metrics(
+                formant_data[["F1(Hz)", "F2(Hz)"]].to_numpy(),
+                formant_data[["F1(Bark)", "F2(Bark)"]].to_numpy(),
+                formant_model,
+            )
+            metrics["AAVS"] = vowel_metrics["aavs"]
+            metrics["Hull Area (hz^2)"] = vowel_metrics["hull_area"]
+            metrics["Density VSA (hz^2)"] = vowel_metrics["vsa_density"]
+        if "speech_rate" in active:
+            lexical_dict = transcription_functions.adv_speech_metrics(
+                sound, analysis_sample_rate=analysis_sample_rate, fidelity=fidelity
+            )
+            metrics["Speech Rate (syll/s)"] = lexical_dict["speechrate(nsyll / dur)"]
+            metrics["Articulation Rate (syll/s)"] = lexical_dict[
+                "articulation_rate(nsyll/phonationtime)"
+            ]
+            metrics["Average Syllable Duration (ms)"] = lexical_dict[
+                "average_syllable_dur(speakingtime/nsyll)"
+            ]*1000
+        if "asr" in active:
+            text_feats = text_features.text_features_from_string(text)
+            metrics["Average Word Length (chars)"] = text_feats["avg_word_length"]
+            metrics["Content Richness"] = text_feats["content_richness"]
+            metrics["MATTR"] = text_feats["mattr"]
+            metrics["Phrase Patterns"] = text_feats["phrase_patterns"]
+            metrics["Sentence Length"] = text_feats["sentence_length"]
+            word_timing = transcription_functions.word_timing_features(segments)
+            metrics["Words Per Minute"] = word_timing["words_per_minute"]
+            metrics["Word Pause Median (ms)"] = word_timing["pause_median"] * 1000
+            metrics["Word Pause Std (ms)"] = word_timing["pause_std"] * 1000
+            metrics["Word Pause P90 (ms)"] = word_timing["pause_p90"] * 1000
+            metrics["Word Pause Rate (per min)"] = word_timing["pause_rate"]
+            metrics["Word Pause Ratio"] = word_timing["pause_ratio"]
+            metrics["Long Pause Count"] = word_timing["long_pause_count"]
+            metrics["Word Duration Mean (ms)"] = word_timing["word_duration_mean"] * 1000
+            metrics["Word Duration Median (ms)"] = word_timing["word_duration_median"] * 1000
+            metrics["Word Duration Std (ms)"] = word_timing["word_duration_std"] * 1000
+        # word gaps stand in for the Praat pause pass only when there is a transcript
+        word_pauses = pause_source == "words" and "asr" in active
+        praat_pauses = "pauses" in active and not word_pauses
+        if "voice" not in active:
+            if praat_pauses:
+                metrics["Average Pause Duration (ms)"] = (
+                    audio_features.calculate_interword_pauses(sound) * 1000
+                )
+            return metrics
+        contour_path = None
+        if save_contours:
+            contour_path = contours.contour_path(
+                os.path.join(results_dir, "Contours"), filename
+            )
+        audio_feats = audio_features.calculate_audio_features(
+            sound,
+            contour_path=contour_path,
+            pauses=praat_pauses,
+            analysis_sample_rate=analysis_sample_rate,
+            perturbation_engine=perturbation_engine,
+            fidelity=fidelity,
+        )
+        if word_pauses and "pauses" in active:
+            metrics["Average Pause Duration (ms)"] = word_timing["avg_pause_duration"]*1000
+        elif praat_pauses:
+            metrics["Average Pause Duration (ms)"] = audio_feats["avg_pause_duration"]*1000
         metrics["F0 Mean (hz)"] = audio_feats["fundamental_frequency"][0]
         metrics["F0 Median (hz)"] = audio_feats["fundamental_frequency"][1]
         metrics["F0 Std (hz)"] = audio_feats["fundamental_frequency"][2]
@@ -182,10 +576,13 @@ def process_audio_file(audio_path, results_dir):
         metrics["Shimmer Local (db)"] = audio_feats["shimmer"][1]
         metrics["Shimmer APQ3"] = audio_feats["shimmer"][2]
         metrics["Shimmer APQ5"] = audio_feats["shimmer"][3]
+        metrics["Shimmer APQ11"] = audio_feats["shimmer"][4]
+        metrics["Shimmer DDA"] = audio_feats["shimmer"][5]
         metrics["Jitter Local"] = audio_feats["jitter"][0]
         metrics["Jitter Local (db)"] = audio_feats["jitter"][1]
         metrics["Jitter APQ3"] = audio_feats["jitter"][2]
         metrics["Jitter APQ5"] = audio_feats["jitter"][3]
+        metrics["Jitter DDP"] = audio_feats["jitter"][4]
         metrics["Pitch Period Entropy"] = audio_feats["ppe"]
         metrics["Cepstral Peak Prominence"] = audio_feats["cpp"]
     except Exception as e:
@@ -195,14 +592,195 @@ def process_audio_file(audio_path, results_dir):
         for metric in feature_list:
             if metric not in metrics:
                 metrics[metric] = None
+        # marks the file as failed in the manifest (the row is still written)
+        metrics[ERROR_COLUMN] = f"{type(e).__name__}: {e}"
     return metrics
 
 
-def build_csv(csv_path, audio_files=None, audio_dir=None, results_dir=None):
+def _init_worker(whisper_options=None, threads=None):
+    """
+    Pool initializer: apply per-worker settings before any file is processed.
+    """
+    if threads:
+        resource_governor.limit_threads(threads)
+    if whisper_options:
+        transcription_functions.configure_inference(**whisper_options)
+
+
+def _write_quality_report(results_dir, audio_files):
+    """
+    Write Results-/quality_report.csv for the screened files of this run.
+    """
+    report = quality.quality_report(
+        os.path.join(results_dir, "Quality"),
+        [work_queue.file_key(f) for f in audio_files],
+    )
+    if len(report):
+        report.to_csv(os.path.join(results_dir, "quality_report.csv"), index=False)
+
+
+def _record_manifest_status(manifest_path, audio_files, processed, failed=()):
+    """
+    Mark the "features" stage as done for processed files, failed for files whose
+    processing raised (so a later unprocessed_stage query retries them) and rejected
+    for the rest, which failed the quality screen or were too short (a terminal
+    status, see corpus_manifest.TERMINAL_STATUSES).
+    """
+    keys = {f: work_queue.file_key(f) for f in audio_files}
+    done = [f for f in audio_files if keys[f] in processed and keys[f] not in failed]
+    errors = [f for f in audio_files if keys[f] in failed]
+    rejected = [f for f in audio_files if keys[f] not in processed]
+    corpus_manifest.mark_stage(manifest_path, done, "features", "done")
+    corpus_manifest.mark_stage(manifest_path, errors, "features", "failed")
+    corpus_manifest.mark_stage(manifest_path, rejected, "features", "rejected")
+
+
+def _check_unique_keys(audio_files):
+    """
+    Raise if two audio files share the name without extension that keys their
+    caches and metrics row.
+    """
+    paths = {}
+    for audio_path in audio_files:
+        paths.setdefault(os.path.splitext(os.path.basename(audio_path))[0], []).append(audio_path)
+    duplicates = {key: found for key, found in paths.items() if len(found) > 1}
+    if duplicates:
+        raise ValueError(
+            "Audio files share a name without extension: "
+            + "; ".join(", ".join(found) for found in duplicates.values())
+        )
+
+
+def _failed_files(df):
+    if ERROR_COLUMN not in df.columns:
+        return set()
+    return set(df.loc[df[ERROR_COLUMN].notna(), "filename"])
+
+
+def _merge_existing(df, csv_path, partition_cols=None):
+    """
+    Add the rows of an earlier output at csv_path for files not in df, so an
+    incremental (manifest) run extends the output instead of replacing it.
+    """
+    is_dataset = os.path.isdir(csv_path)
+    if not (os.path.isfile(csv_path) or is_dataset):
+        return df
+    existing = columnar_io.load_features(csv_path)
+    if partition_cols:
+        for col in partition_cols:
+            if col in existing.columns:
+                existing[col] = existing[col].astype(str)
+    existing = existing[~existing["filename"].astype(str).isin(set(df["filename"]))]
+    return pd.concat([existing, df], ignore_index=True)
+
+
+def build_csv(
+    csv_path,
+    audio_files=None,
+    audio_dir=None,
+    results_dir=None,
+    distributed=False,
+    lease_timeout=work_queue.DEFAULT_LEASE_TIMEOUT,
+    save_contours=False,
+    partition_cols=None,
+    labels=None,
+    outlier_method="gmm",
+    write_preprocessed=True,
+    analysis_sample_rate=audio_features.DEFAULT_ANALYSIS_SAMPLE_RATE,
+    manifest_path=None,
+    manifest_query=None,
+    packed_artifacts=False,
+    whisper_options=None,
+    transcription_batch_size=None,
+    workers=None,
+    threads_per_worker=None,
+    pause_source="praat",
+    perturbation_engine="praat",
+    profile_map=None,
+    profile_patterns=None,
+    quality_rules=quality.DEFAULT_RULES,
+    fidelity="full",
+    pool=None,
+):
     """
     Generate a CSV file with metrics from transcriptionFunctions and formantExtraction.
     All outputs are written into the Results- folder with subfolders for each type.
+
+    With distributed=True, any number of build_csv calls (on any host sharing
+    results_dir) cooperate through lease files: each file is processed once, its
+    metrics are written to Results-/Metrics and every call merges them into csv_path
+    once the whole cohort is done. Leases older than lease_timeout seconds are
+    reclaimed, so files held by a crashed node are picked up again.
+
+    With save_contours=True, frame-level tracks are kept in Results-/Contours so new
+    statistics can later be computed with contours.aggregate_contours.
+
+    If csv_path ends in .parquet (or partition_cols is given) the metrics are written
+    as Parquet with a typed schema; load them with columnar_io.load_features.
+    labels maps extra columns (e.g. cohort, task, PD/HC) to a constant or to a
+    function of the filename, and partition_cols partitions the dataset by them.
+
+    outlier_method trades formant outlier-removal fidelity for speed; compare the
+    options with benchmarks.benchmark_outlier_methods.
+
+    With write_preprocessed=False each file is decoded and analyzed in memory only
+    and no preprocessed WAVs are written.
+
+    Audio may be WAV, FLAC, OGG/Opus or MP3 (mixed directories are fine); files are
+    decoded in-process, so no transcoded copies are needed. Files are keyed by name
+    without extension, so a cohort with both a.wav and a.flac raises a ValueError.
+
+    analysis_sample_rate (e.g. 16000) resamples each file once before Praat
+    analysis; benchmarks.sample_rate_drift_report shows which features it moves.
+
+    With manifest_path (see corpus_manifest), files are selected by a manifest query
+    instead of listing audio_dir, e.g. manifest_query={"unprocessed_stage": "features",
+    "cohort": "MDVR-KCL", "min_duration": 5}, and the "features" stage of every
+    processed file is recorded in the manifest ("failed" for files whose processing
+    raised; their rows carry the message in the "error" column). Rows of files
+    already in csv_path from earlier runs are kept.
+
+    With packed_artifacts=True, intermediate artifacts go to append-only pack files
+    in Results-/Artifacts (one per worker process) instead of one small file each;
+    artifact_store.migrate_loose packs an existing loose layout.
+
+    whisper_options are passed to transcription_functions.configure_inference in
+    every worker, e.g. {"quantize": True, "num_threads": 2, "decoding": "greedy"};
+    benchmarks.benchmark_whisper_inference compares speed and word error.
+
+    With transcription_batch_size (e.g. 8), all files are first transcribed in
+    batches of that size in this process (batch_transcribe) and the workers read
+    the cached transcripts; distributed runs transcribe per file as before.
+
+    workers and threads_per_worker set the pool size and the BLAS/torch threads of
+    each worker; by default one single-threaded worker per available CPU (affinity
+    and cgroup quota, see resource_governor). benchmarks.benchmark_resource_layouts
+    finds the best layout for a machine. An existing pool (e.g. the warm pool of
+    feature_daemon) can be passed as pool; it is used instead of a new one and left
+    open, and workers, threads_per_worker and whisper_options do not apply to it.
+
+    pause_source="words" takes the Average Pause Duration from the Whisper word
+    timestamps and skips the Praat silence pass (see process_audio_file).
+    perturbation_engine="numpy" selects the vectorized jitter/shimmer engine;
+    benchmarks.perturbation_parity_report checks it against Praat.
+
+    profile_map and profile_patterns pick a pipeline profile per file (see
+    pipeline_profiles), e.g. profile_patterns=pipeline_profiles.TASK_PATTERNS or
+    profile_map=pipeline_profiles.load_profile_map("info_2157.csv", "id", "task_name"),
+    so that sustained vowels skip Whisper. Without them every file gets the full
+    "connected_speech" profile.
+
+    quality_rules are the reject/flag rules of the pre-screen (see
+    audio_preprocessing.quality; None disables it). Every screened file, including
+    rejected ones, is listed in Results-/quality_report.csv.
+
+    fidelity="fast" coarsens time steps, decimates the formant analysis and limits
+    frequency ranges for screening large archives (see
+    audio_features.FIDELITY_PRESETS); benchmarks.fidelity_error_report gives the
+    per-feature error against "full".
     """
+    # an unknown task would otherwise fail outside the per-file error handling
+    pipeline_profiles.validate_profiles(profile_map, profile_patterns)
     # Set up Results- directory and subfolders
     script_dir = os.path.dirname(os.path.abspath(__file__))
     if results_dir is None:
@@ -211,30 +789,105 @@ def build_csv(csv_path, audio_files=None, audio_dir=None, results_dir=None):
     text_dir = os.path.join(results_dir, "Text")
     align_dir = os.path.join(results_dir, "Alignments")
     textgrid_dir = os.path.join(results_dir, "TextGrid")
-    for d in [results_dir, preprocessed_dir, text_dir, align_dir, textgrid_dir]:
-        os.makedirs(d, exist_ok=True)
+    os.makedirs(results_dir, exist_ok=True)
+    if not packed_artifacts:
+        for d in [preprocessed_dir, text_dir, align_dir, textgrid_dir]:
+            os.makedirs(d, exist_ok=True)
 
     # Determine which audio files to process
+    if audio_files is None and manifest_path is not None:
+        audio_files = corpus_manifest.select_files(
+            manifest_path, **(manifest_query or {})
+        )
     if audio_files is None:
         if audio_dir is None:
             audio_dir = os.path.join(script_dir, "Audio Files")
         audio_files = [
             os.path.join(audio_dir, f)
             for f in os.listdir(audio_dir)
-            if f.endswith(".wav")
-            and not f.endswith("_preprocessed.wav")
-            and not f.endswith("_temp_preprocessed.wav")
+            if audio_preprocessing.is_audio_file(f)
         ]
 
     if not audio_files:
-        print("No .wav files found to process.")
+        print("No audio files found to process.")
+        return
+    _check_unique_keys(audio_files)
+
+    process_file = functools.partial(
+        process_audio_file,
+        save_contours=save_contours,
+        outlier_method=outlier_method,
+        write_preprocessed=write_preprocessed,
+        analysis_sample_rate=analysis_sample_rate,
+        artifact_dir=(
+            os.path.join(results_dir, "Artifacts") if packed_artifacts else None
+        ),
+        pause_source=pause_source,
+        perturbation_engine=perturbation_engine,
+        profile_map=profile_map,
+        profile_patterns=profile_patterns,
+        quality_rules=quality_rules,
+        fidelity=fidelity,
+    )
+    workers, threads_per_worker = resource_governor.plan_layout(
+        workers, threads_per_worker
+    )
+    pool_options = {
+        "processes": workers,
+        "initializer": _init_worker,
+        "initargs": (whisper_options, threads_per_worker),
+    }
+    if pool is not None:
+        pool_context = functools.partial(contextlib.nullcontext, pool)
+    else:
+        pool_context = functools.partial(multiprocessing.Pool, **pool_options)
+    if distributed:
+        with pool_context() as pool:
+            work_queue.run_worker(
+                audio_files,
+                results_dir,
+                process_file,
+                pool=pool,
+                lease_timeout=lease_timeout,
+            )
+        merged = work_queue.merge_results(
+            results_dir, csv_path, partition_cols=partition_cols, labels=labels
+        )
+        _write_quality_report(results_dir, audio_files)
+        if manifest_path is not None:
+            processed = set() if merged is None else set(merged["filename"])
+            failed = set() if merged is None else _failed_files(merged)
+            _record_manifest_status(manifest_path, audio_files, processed, failed)
+        if merged is not None:
+            print(f"Metrics saved to {csv_path}")
+        else:
+            print("No audio files were processed.")
         return
 
+    if transcription_batch_size:
+        _init_worker(whisper_options)
+        batch_transcribe(
+            [
+                f
+                for f in audio_files
+                if "asr"
+                in pipeline_profiles.stages(
+                    pipeline_profiles.select_profile(f, profile_map, profile_patterns)
+                )
+            ],
+            results_dir,
+            batch_size=transcription_batch_size,
+            artifact_dir=process_file.keywords["artifact_dir"],
+            quality_rules=quality_rules,
+            profile_map=profile_map,
+            profile_patterns=profile_patterns,
+        )
+
     all_metrics = {}
     # Process each audio file in parallel
-    with multiprocessing.Pool() as pool:
+    with pool_context() as pool:
         process_file_with_results = functools.partial(
-            process_audio_file, results_dir=results_dir
+            process_file, results_dir=results_dir
         )
         results = list(
             tqdm(
@@ -247,10 +900,18 @@ def build_csv(csv_path, audio_files=None, audio_dir=None, results_dir=None):
             if r:
                 all_metrics[r["filename"]] = r
 
+    _write_quality_report(results_dir, audio_files)
+    if manifest_path is not None:
+        failed = {k for k, m in all_metrics.items() if m.get(ERROR_COLUMN)}
+        _record_manifest_status(manifest_path, audio_files, set(all_metrics), failed)
+
     if all_metrics:
-        df = pd.DataFrame.from_dict(all_metrics, orient="index").reset_index()
-        df = df.rename(columns={"index": "filename"})
-        df.to_csv(csv_path, index=False)
+        df = pd.DataFrame.from_dict(all_metrics, orient="index").reset_index(drop=True)
+        df = columnar_io.add_labels(df, labels)
+        if manifest_path is not None:
+            # a manifest query may select only some files (e.g. the unprocessed ones)
+            df = _merge_existing(df, csv_path, partition_cols)
+        columnar_io.write_metrics(df, csv_path, partition_cols=partition_cols)
         print(f"Metrics saved to {csv_path}")
     else:
         print("No audio files were processed.")
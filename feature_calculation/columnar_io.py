@@ -0,0 +1,157 @@
+"""
+Parquet output for build_csv results with an explicit typed schema, so notebooks
+can load only the columns they need without re-inferring types from CSV.
+"""
+import os
+import pandas as pd
+
+STRING_COLUMNS = {"filename", "profile", "quality_status"}
+EMBEDDING_PREFIX = "embedding_"
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError(
+            "Parquet output requires pyarrow; install it with `pip install pyarrow`"
+        )
+    return pyarrow
+
+
+def string_columns(df, partition_cols=None):
+    """
+    Columns stored as strings: STRING_COLUMNS, partition columns and every column
+    whose non-null values are strings (e.g. labels such as cohort or task).
+    """
+    columns = set(STRING_COLUMNS).union(partition_cols or [])
+    for col in df.columns:
+        if pd.api.types.infer_dtype(df[col], skipna=True) == "string":
+            columns.add(col)
+    return columns
+
+
+def feature_schema(columns, partition_cols=None, string_cols=None):
+    """
+    Build the Arrow schema for a metrics table.
+
+    String columns (see string_columns; partition columns are read back
+    dictionary-encoded from the directory layout) are strings, Whisper embedding
+    columns are float32 and every other feature is float64, so features that failed
+    for a file (None) are stored as nulls instead of changing type.
+
+    Args:
+        columns (list): Column names of the metrics table.
+        partition_cols (list, optional): Label columns such as cohort, task or PD/HC.
+        string_cols (set, optional): String columns; STRING_COLUMNS and the partition
+            columns if omitted.
+
+    Returns:
+        pyarrow.Schema: The schema.
+    """
+    pa = _pyarrow()
+    if string_cols is None:
+        string_cols = set(STRING_COLUMNS).union(partition_cols or [])
+    fields = []
+    for col in columns:
+        if col in string_cols:
+            fields.append(pa.field(col, pa.string()))
+        elif col.startswith(EMBEDDING_PREFIX):
+            fields.append(pa.field(col, pa.float32()))
+        else:
+            fields.append(pa.field(col, pa.float64()))
+    return pa.schema(fields)
+
+
+def write_parquet(df, path, partition_cols=None, compression="zstd"):
+    """
+    Write a metrics DataFrame to Parquet.
+
+    Args:
+        df (pandas.DataFrame): Metrics, one row per file.
+        path (str): Output file, or output directory when partition_cols is given.
+        partition_cols (list, optional): Columns to partition the dataset by.
+        compression (str): Parquet compression codec.
+    """
+    pa = _pyarrow()
+    df = df.copy()
+    string_cols = string_columns(df, partition_cols)
+    for col in string_cols:
+        if col in df.columns:
+            # keep missing values as nulls instead of the string "None"
+            df[col] = df[col].astype(str).where(df[col].notna(), None)
+    schema = feature_schema(df.columns, partition_cols, string_cols)
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    if partition_cols:
+        # replace the partitions being written, so a re-run does not duplicate rows
+        pa.parquet.write_to_dataset(
+            table,
+            root_path=path,
+            partition_cols=list(partition_cols),
+            compression=compression,
+            existing_data_behavior="delete_matching",
+        )
+    else:
+        pa.parquet.write_table(table, path, compression=compression)
+
+
+def load_features(path, columns=None, filters=None):
+    """
+    Load a metrics table written by write_parquet (or a CSV, for convenience).
+
+    Args:
+        path (str): Parquet file, partitioned dataset directory or .csv file.
+        columns (list, optional): Columns to read; all columns by default.
+        filters (list, optional): Parquet row filters, e.g. [("cohort", "=", "MDVR-KCL")].
+
+    Returns:
+        pandas.DataFrame: The requested columns.
+    """
+    if path.endswith(".csv"):
+        return pd.read_csv(path, usecols=columns)
+    pa = _pyarrow()
+    table = pa.parquet.read_table(path, columns=columns, filters=filters)
+    return table.to_pandas()
+
+
+def write_metrics(df, path, partition_cols=None):
+    """
+    Write metrics as CSV or Parquet depending on the extension of path; a partitioned
+    dataset is always written as Parquet.
+    """
+    if path.endswith(".csv") and not partition_cols:
+        df.to_csv(path, index=False)
+    else:
+        write_parquet(df, path, partition_cols=partition_cols)
+
+
+def add_labels(df, labels):
+    """
+    Add label columns (e.g. cohort, task, PD/HC) to a metrics table.
+
+    Args:
+        df (pandas.DataFrame): Metrics with a filename column.
+        labels (dict): Column name -> constant value or callable taking the filename.
+
+    Returns:
+        pandas.DataFrame: df with the label columns added.
+    """
+    for col, value in (labels or {}).items():
+        df[col] = df["filename"].map(value) if callable(value) else value
+    return df
+
+
+def csv_to_parquet(csv_path, parquet_path, partition_cols=None):
+    """
+    Convert an existing build_csv CSV to Parquet.
+    """
+    df = pd.read_csv(csv_path)
+    write_parquet(df, parquet_path, partition_cols=partition_cols)
+    return parquet_path
+
+
+if __name__ == "__main__":
+    import sys
+
+    csv_to_parquet(sys.argv[1], os.path.splitext(sys.argv[1])[0] + ".parquet")
@@ -0,0 +1,163 @@
+"""
+Frame-level contours (F0, intensity, HNR, F1/F2, MFCC) stored as compressed NumPy
+archives, one per file, so new summary statistics can be computed across a corpus
+without re-running Praat.
+"""
+import os
+import numpy as np
+import pandas as pd
+from parselmouth.praat import call
+
+CONTOUR_SUFFIX = "_contours.npz"
+
+# name -> (track, function reducing a NaN-padded (files, frames[, k]) array along axis 1)
+DEFAULT_AGGREGATIONS = {
+    "F0 Mean (hz)": ("f0", lambda m: np.nanmean(m, axis=1)),
+    "F0 Median (hz)": ("f0", lambda m: np.nanmedian(m, axis=1)),
+    "F0 Std (hz)": ("f0", lambda m: np.nanstd(m, axis=1)),
+    "F0 Min (hz)": ("f0", lambda m: np.nanmin(m, axis=1)),
+    "F0 Max (hz)": ("f0", lambda m: np.nanmax(m, axis=1)),
+    "F0 P5 (hz)": ("f0", lambda m: np.nanpercentile(m, 5, axis=1)),
+    "F0 P95 (hz)": ("f0", lambda m: np.nanpercentile(m, 95, axis=1)),
+    "F0 Range (semitones)": (
+        "f0",
+        lambda m: 12
+        * np.log2(np.nanpercentile(m, 95, axis=1) / np.nanpercentile(m, 5, axis=1)),
+    ),
+    "Intensity Mean (db SPL)": ("intensity", lambda m: np.nanmean(m, axis=1)),
+    "Intensity Median (db SPL)": ("intensity", lambda m: np.nanmedian(m, axis=1)),
+    "Intensity Std (db SPL)": ("intensity", lambda m: np.nanstd(m, axis=1)),
+    "Harmonicity Mean": ("hnr", lambda m: np.nanmean(m, axis=1)),
+    "Harmonicity Std": ("hnr", lambda m: np.nanstd(m, axis=1)),
+    "F1 Median (hz)": ("f1", lambda m: np.nanmedian(m, axis=1)),
+    "F2 Median (hz)": ("f2", lambda m: np.nanmedian(m, axis=1)),
+    "MFCC Mean": ("mfcc", lambda m: np.nanmean(m, axis=1)),
+    "MFCC Std": ("mfcc", lambda m: np.nanstd(m, axis=1)),
+}
+
+
+def extract_contours(sound, pitch=None, intensity=None, harmonicity=None, fidelity="full"):
+    """
+    Extract the frame-level tracks behind the summary features of calculate_audio_features.
+
+    Args:
+        sound (parselmouth.Sound): A parselmouth Sound object.
+        pitch, intensity, harmonicity (optional): Praat analyses of sound, if already
+            computed; otherwise they are run with the fidelity tier's settings.
+        fidelity (str): "full" or "fast" (see audio_features.FIDELITY_PRESETS).
+
+    Returns:
+        dict: Arrays f0, intensity, hnr, f1, f2 (frames,) and mfcc (frames, 13), each with
+        a matching *_time array. Unvoiced/undefined frames are NaN.
+    """
+    from feature_calculation.audio_features import FIDELITY_PRESETS
+
+    settings = FIDELITY_PRESETS[fidelity]
+    if pitch is None:
+        pitch = sound.to_pitch(time_step=settings["pitch_time_step"])
+    f0 = pitch.selected_array["frequency"].astype(np.float32)
+    f0[f0 <= 0] = np.nan
+    if intensity is None:
+        intensity = sound.to_intensity(time_step=settings["intensity_time_step"])
+    if harmonicity is None:
+        harmonicity = call(
+            sound, "To Harmonicity (cc)", settings["harmonicity_time_step"], 75, 0.1, 1.0
+        )
+    hnr = harmonicity.values[0].astype(np.float32)
+    hnr[hnr <= -200] = np.nan
+    formant = sound.to_formant_burg(
+        time_step=settings["formant_time_step"], maximum_formant=settings["maximum_formant"]
+    )
+    formant_time = np.asarray(formant.xs())
+    f1 = np.array([formant.get_value_at_time(1, t) for t in formant_time], dtype=np.float32)
+    f2 = np.array([formant.get_value_at_time(2, t) for t in formant_time], dtype=np.float32)
+    mfcc = sound.to_mfcc(number_of_coefficients=13)
+    return {
+        "f0": f0,
+        "f0_time": np.asarray(pitch.xs(), dtype=np.float32),
+        "intensity": intensity.values[0].astype(np.float32),
+        "intensity_time": np.asarray(intensity.xs(), dtype=np.float32),
+        "hnr": hnr,
+        "hnr_time": np.asarray(harmonicity.xs(), dtype=np.float32),
+        "f1": f1,
+        "f2": f2,
+        "formant_time": formant_time.astype(np.float32),
+        "mfcc": mfcc.to_array().T.astype(np.float32),
+        "mfcc_time": np.asarray(mfcc.xs(), dtype=np.float32),
+    }
+
+
+def contour_path(contour_dir, filename):
+    return os.path.join(contour_dir, filename + CONTOUR_SUFFIX)
+
+
+def save_contours(path, contours):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, **contours)
+
+
+def load_contours(path, tracks=None):
+    """
+    Load stored contours.
+
+    Args:
+        path (str): Path to a *_contours.npz file.
+        tracks (list, optional): Track names to load; all tracks by default.
+
+    Returns:
+        dict: Track name to array.
+    """
+    with np.load(path) as archive:
+        names = archive.files if tracks is None else tracks
+        return {name: archive[name] for name in names}
+
+
+def aggregate_contours(contour_dir, aggregations=None, batch_size=256):
+    """
+    Compute summary features from stored contours.
+
+    Each file's track is reduced on its own, as a (1, frames) or (1, frames, k) array,
+    so memory is bounded by batch_size files' frames rather than by the longest file
+    times the number of files.
+
+    Args:
+        contour_dir (str): Directory with *_contours.npz files.
+        aggregations (dict, optional): Feature name -> (track, function) where the function
+            reduces a (files, frames) or (files, frames, k) array along axis 1 (NaN
+            marks unvoiced or undefined frames). Defaults to DEFAULT_AGGREGATIONS.
+        batch_size (int): Number of files loaded together.
+
+    Returns:
+        pandas.DataFrame: One row per file (indexed by filename), one column per feature;
+        multi-coefficient tracks such as MFCC give one column per coefficient.
+    """
+    if aggregations is None:
+        aggregations = DEFAULT_AGGREGATIONS
+    tracks = sorted({track for track, _ in aggregations.values()})
+    paths = sorted(
+        os.path.join(contour_dir, f)
+        for f in os.listdir(contour_dir)
+        if f.endswith(CONTOUR_SUFFIX)
+    )
+    frames = []
+    for i in range(0, len(paths), batch_size):
+        batch = paths[i : i + batch_size]
+        loaded = [load_contours(p, tracks) for p in batch]
+        columns = {}
+        for track in tracks:
+            for name, (t, func) in aggregations.items():
+                if t != track:
+                    continue
+                values = np.concatenate([func(c[track][np.newaxis]) for c in loaded])
+                if values.ndim == 1:
+                    columns[name] = values
+                else:
+                    for k in range(values.shape[1]):
+                        columns[f"{name} {k}"] = values[:, k]
+        index = [os.path.basename(p)[: -len(CONTOUR_SUFFIX)] for p in batch]
+        frames.append(pd.DataFrame(columns, index=index))
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames)
+    df.index.name = "filename"
+    return df
@@ -0,0 +1,248 @@
+"""
+SQLite manifest of an audio corpus: one row per file with size, mtime, content hash,
+duration, sample rate and cohort, plus per-stage processing status. Scans are
+incremental: only files whose size or mtime changed are hashed and probed again.
+
+The database uses SQLite's rollback journal (not WAL), which works on NFS as long as
+the mount supports POSIX locks; keep it on local disk if it does not.
+"""
+import os
+import time
+import contextlib
+import sqlite3
+import hashlib
+import soundfile as sf
+from audio_preprocessing import audio_preprocessing
+
+# bytes hashed from each end of a file for the default (fast) content hash
+HASH_CHUNK_BYTES = 1 << 20
+
+# stage statuses that unprocessed_stage does not select again ("rejected": the file
+# failed the quality screen or was too short, which only a rescan of a changed file
+# can alter)
+TERMINAL_STATUSES = ("done", "rejected")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    cohort TEXT,
+    size INTEGER,
+    mtime REAL,
+    content_hash TEXT,
+    duration REAL,
+    sample_rate INTEGER,
+    channels INTEGER,
+    format TEXT,
+    scan_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS stages (
+    path TEXT,
+    stage TEXT,
+    status TEXT,
+    updated REAL,
+    message TEXT,
+    PRIMARY KEY (path, stage)
+);
+CREATE INDEX IF NOT EXISTS files_cohort ON files (cohort);
+CREATE INDEX IF NOT EXISTS files_duration ON files (duration);
+CREATE INDEX IF NOT EXISTS stages_status ON stages (stage, status);
+"""
+
+
+@contextlib.contextmanager
+def connect(db_path):
+    """
+    Open the manifest (creating the tables if needed) for one transaction.
+    """
+    conn = sqlite3.connect(db_path, timeout=60)
+    try:
+        conn.executescript(SCHEMA)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def content_hash(path, size, full=False):
+    """
+    BLAKE2b hash of a file. By default only the size and the first and last
+    HASH_CHUNK_BYTES are hashed, which is enough to detect re-recorded or replaced
+    files without reading the whole corpus over the network.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(size).encode())
+    with open(path, "rb") as f:
+        if full or size <= 2 * HASH_CHUNK_BYTES:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+                h.update(chunk)
+        else:
+            h.update(f.read(HASH_CHUNK_BYTES))
+            f.seek(-HASH_CHUNK_BYTES, os.SEEK_END)
+            h.update(f.read(HASH_CHUNK_BYTES))
+    return h.hexdigest()
+
+
+def _walk(audio_dir):
+    stack = [audio_dir]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif audio_preprocessing.is_audio_file(entry.name):
+                    yield entry
+
+
+def scan_corpus(db_path, audio_dir, cohort=None, full_hash=False):
+    """
+    Update the manifest with the audio files under audio_dir.
+
+    New and changed files (by size/mtime) are hashed and probed for duration and
+    sample rate, and their stage statuses are reset; files that disappeared from
+    audio_dir are removed.
+
+    Args:
+        db_path (str): Path to the SQLite manifest.
+        audio_dir (str): Directory scanned recursively.
+        cohort (str, optional): Cohort label stored for files found in this scan.
+        full_hash (bool): Hash whole files instead of their ends.
+
+    Returns:
+        dict: Counts of added, changed, unchanged and removed files.
+    """
+    audio_dir = os.path.abspath(audio_dir)
+    prefix = os.path.join(audio_dir, "")
+    counts = {"added": 0, "changed": 0, "unchanged": 0, "removed": 0}
+    scan_id = int(time.time() * 1000)
+    with connect(db_path) as conn:
+        known = {
+            row[0]: (row[1], row[2])
+            for row in conn.execute(
+                "SELECT path, size, mtime FROM files WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix),
+            )
+        }
+        for entry in _walk(audio_dir):
+            st = entry.stat()
+            previous = known.get(entry.path)
+            if previous == (st.st_size, st.st_mtime):
+                counts["unchanged"] += 1
+                conn.execute(
+                    "UPDATE files SET scan_id = ? WHERE path = ?", (scan_id, entry.path)
+                )
+                continue
+            try:
+                info = sf.info(entry.path)
+                duration, sample_rate, channels = info.duration, info.samplerate, info.channels
+            except RuntimeError:
+                duration, sample_rate, channels = None, None, None
+            conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.path,
+                    cohort,
+                    st.st_size,
+                    st.st_mtime,
+                    content_hash(entry.path, st.st_size, full_hash),
+                    duration,
+                    sample_rate,
+                    channels,
+                    audio_preprocessing.detect_audio_format(entry.path),
+                    scan_id,
+                ),
+            )
+            if previous is None:
+                counts["added"] += 1
+            else:
+                counts["changed"] += 1
+                conn.execute("DELETE FROM stages WHERE path = ?", (entry.path,))
+        stale = [
+            row[0]
+            for row in conn.execute(
+                "SELECT path FROM files WHERE substr(path, 1, ?) = ? AND scan_id != ?",
+                (len(prefix), prefix, scan_id),
+            )
+        ]
+        for path in stale:
+            conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            conn.execute("DELETE FROM stages WHERE path = ?", (path,))
+        counts["removed"] = len(stale)
+    return counts
+
+
+def select_files(
+    db_path,
+    unprocessed_stage=None,
+    cohort=None,
+    min_duration=None,
+    max_duration=None,
+    where=None,
+    params=(),
+):
+    """
+    Select audio files from the manifest.
+
+    Args:
+        db_path (str): Path to the SQLite manifest.
+        unprocessed_stage (str, optional): Only files without a terminal status
+            (TERMINAL_STATUSES) for this stage.
+        cohort (str, optional): Only files of this cohort.
+        min_duration (float, optional): Only files at least this long (seconds).
+        max_duration (float, optional): Only files at most this long (seconds).
+        where (str, optional): Extra SQL condition on the files table, e.g. "sample_rate >= ?".
+        params (tuple): Parameters for where.
+
+    Returns:
+        list: Paths of the matching files, sorted.
+    """
+    conditions, values = [], []
+    if unprocessed_stage is not None:
+        placeholders = ", ".join("?" for _ in TERMINAL_STATUSES)
+        conditions.append(
+            f"path NOT IN (SELECT path FROM stages WHERE stage = ? AND status IN ({placeholders}))"
+        )
+        values.append(unprocessed_stage)
+        values.extend(TERMINAL_STATUSES)
+    if cohort is not None:
+        conditions.append("cohort = ?")
+        values.append(cohort)
+    if min_duration is not None:
+        conditions.append("duration >= ?")
+        values.append(min_duration)
+    if max_duration is not None:
+        conditions.append("duration <= ?")
+        values.append(max_duration)
+    if where is not None:
+        conditions.append(f"({where})")
+        values.extend(params)
+    query = "SELECT path FROM files"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    with connect(db_path) as conn:
+        return [row[0] for row in conn.execute(query + " ORDER BY path", values)]
+
+
+def mark_stage(db_path, paths, stage, status, message=None):
+    """
+    Record the status (e.g. "done", "rejected", "failed") of a stage for some files.
+    """
+    now = time.time()
+    with connect(db_path) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO stages VALUES (?, ?, ?, ?, ?)",
+            [(path, stage, status, now, message) for path in paths],
+        )
+
+
+def stage_summary(db_path):
+    """
+    Returns:
+        dict: (stage, status) -> number of files.
+    """
+    with connect(db_path) as conn:
+        return {
+            (stage, status): n
+            for stage, status, n in conn.execute(
+                "SELECT stage, status, COUNT(*) FROM stages GROUP BY stage, status"
+            )
+        }
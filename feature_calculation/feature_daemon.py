@@ -0,0 +1,295 @@
+"""
+Local feature-extraction daemon that keeps models and imports warm.
+
+The daemon imports build_biomarker_csv once (Whisper, the Praat bindings, sklearn),
+warms the nltk taggers, and then forks a pool of workers that inherit all of it. It
+listens on a Unix socket and answers newline-delimited JSON requests:
+
+    {"op": "ping"}
+    {"op": "features", "files": [...], "results_dir": ..., "options": {...}}
+    {"op": "build_csv", "options": {...}}           # keyword arguments of build_csv
+    {"op": "shutdown"}
+
+"features" runs process_audio_file on every file with options as its keyword
+arguments, sends a "progress" event per finished file and a final "done" event
+with all metrics. Errors are sent as an "error" event; the daemon keeps running.
+
+Start it with
+    python -m feature_calculation.feature_daemon --workers 4
+and use FeatureClient (which imports nothing heavy) from notebooks or scripts.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import functools
+import threading
+import subprocess
+import socketserver
+
+DEFAULT_STARTUP_TIMEOUT = 300  # seconds to wait for a spawned daemon to answer
+
+
+def default_socket_path():
+    return os.path.join(tempfile.gettempdir(), f"biomarker-features-{os.getuid()}.sock")
+
+
+def _json_default(value):
+    # numpy scalars and arrays in metrics dicts
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def _send(stream, message):
+    """
+    Write one event; returns False if the client has disconnected.
+    """
+    try:
+        stream.write((json.dumps(message, default=_json_default) + "\n").encode())
+        stream.flush()
+        return True
+    except (BrokenPipeError, ConnectionResetError):
+        return False
+
+
+class FeatureDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix-socket server holding a warm worker pool. Jobs run one at a time.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, workers=None, threads_per_worker=None, whisper_options=None):
+        import multiprocessing
+        from feature_calculation import build_biomarker_csv
+        from feature_calculation import resource_governor
+        from feature_calculation import text_features
+
+        self.build_biomarker_csv = build_biomarker_csv
+        # nltk loads its tokenizer and tagger models on first use
+        text_features.text_features_from_string("The daemon is warming up.")
+        workers, threads_per_worker = resource_governor.plan_layout(workers, threads_per_worker)
+        build_biomarker_csv._init_worker(whisper_options, threads_per_worker)
+        # workers are forked after the imports above, so they start warm
+        self.pool = multiprocessing.get_context("fork").Pool(
+            workers,
+            initializer=build_biomarker_csv._init_worker,
+            initargs=(whisper_options, threads_per_worker),
+        )
+        self.job_lock = threading.Lock()
+        self.started = time.time()
+        self.jobs = 0
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+
+    def process_files(self, files, results_dir=None, options=None, on_result=None):
+        """
+        Run process_audio_file on the warm pool.
+
+        Returns:
+            list: Metrics dicts of the processed files (rejected files are left out).
+        """
+        if results_dir is None:
+            results_dir = os.path.join(
+                os.path.dirname(os.path.abspath(self.build_biomarker_csv.__file__)), "Results-"
+            )
+        process_file = functools.partial(
+            self.build_biomarker_csv.process_audio_file,
+            results_dir=results_dir,
+            **(options or {}),
+        )
+        metrics = []
+        for done, result in enumerate(self.pool.imap_unordered(process_file, files), 1):
+            if result:
+                metrics.append(result)
+            if on_result is not None:
+                on_result(done, len(files), result)
+        return metrics
+
+    def server_close(self):
+        super().server_close()
+        self.pool.terminate()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                op = request.get("op")
+                if op == "ping":
+                    _send(
+                        self.wfile,
+                        {"event": "pong", "pid": os.getpid(), "uptime": time.time() - server.started,
+                         "jobs": server.jobs},
+                    )
+                elif op == "features":
+                    files = request["files"]
+
+                    connected = [True]
+
+                    def on_result(done, total, result):
+                        # after a disconnect the job keeps draining, so the pool
+                        # holds no tasks of it when the next job starts
+                        if request.get("stream", True) and connected[0]:
+                            connected[0] = _send(
+                                self.wfile,
+                                {"event": "progress", "done": done, "total": total, "metrics": result},
+                            )
+
+                    with server.job_lock:
+                        metrics = server.process_files(
+                            files, request.get("results_dir"), request.get("options"), on_result
+                        )
+                        server.jobs += 1
+                    if not connected[0]:
+                        return
+                    _send(self.wfile, {"event": "done", "metrics": metrics})
+                elif op == "build_csv":
+                    with server.job_lock:
+                        server.build_biomarker_csv.build_csv(
+                            **request.get("options", {}), pool=server.pool
+                        )
+                        server.jobs += 1
+                    _send(self.wfile, {"event": "done"})
+                elif op == "shutdown":
+                    _send(self.wfile, {"event": "done"})
+                    threading.Thread(target=server.shutdown, daemon=True).start()
+                    return
+                else:
+                    raise ValueError(f"Unknown op: {op}")
+            except Exception as e:
+                if not _send(self.wfile, {"event": "error", "message": f"{type(e).__name__}: {e}"}):
+                    return
+
+
+class FeatureClient:
+    """
+    Thin client for a running FeatureDaemon.
+
+    Example:
+        client = FeatureClient()
+        df = client.features(["Audio Files/a.wav"], options={"fidelity": "fast"})
+    """
+
+    def __init__(self, socket_path=None, timeout=None):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+
+    def _request(self, message):
+        """
+        Send one request and yield its response events until "done" or "error".
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(message) + "\n").encode())
+            with sock.makefile("rb") as stream:
+                for line in stream:
+                    event = json.loads(line)
+                    yield event
+                    if event["event"] in ("done", "error", "pong"):
+                        return
+
+    def _run(self, message, on_event=None):
+        event = None
+        for event in self._request(message):
+            if event["event"] == "error":
+                raise RuntimeError(event["message"])
+            if on_event is not None:
+                on_event(event)
+        if event is None:
+            raise ConnectionError(f"No response from feature daemon on {self.socket_path}")
+        return event
+
+    def ping(self):
+        return self._run({"op": "ping"})
+
+    def is_running(self):
+        try:
+            self.ping()
+            return True
+        except (OSError, RuntimeError):
+            return False
+
+    def features(self, files, results_dir=None, options=None, progress=None, as_frame=True):
+        """
+        Compute metrics for files with process_audio_file in the daemon.
+
+        Args:
+            files (list): Audio file paths (as seen by the daemon).
+            results_dir (str, optional): Results- directory; the daemon's default if None.
+            options (dict, optional): Keyword arguments of process_audio_file.
+            progress (callable, optional): Called with each "progress" event.
+            as_frame (bool): Return a pandas DataFrame instead of a list of dicts.
+        """
+        message = {
+            "op": "features",
+            "files": [os.path.abspath(f) for f in files],
+            "results_dir": results_dir,
+            "options": options or {},
+            "stream": progress is not None,
+        }
+        done = self._run(message, progress)
+        if not as_frame:
+            return done["metrics"]
+        import pandas as pd
+
+        return pd.DataFrame(done["metrics"])
+
+    def build_csv(self, **options):
+        """
+        Run build_biomarker_csv.build_csv with these keyword arguments in the daemon.
+        """
+        self._run({"op": "build_csv", "options": options})
+
+    def shutdown(self):
+        self._run({"op": "shutdown"})
+
+
+def ensure_daemon(socket_path=None, workers=None, timeout=DEFAULT_STARTUP_TIMEOUT):
+    """
+    Return a client, starting a background daemon first if none is listening.
+    """
+    client = FeatureClient(socket_path)
+    if client.is_running():
+        return client
+    command = [sys.executable, "-m", "feature_calculation.feature_daemon", "--socket", client.socket_path]
+    if workers:
+        command += ["--workers", str(workers)]
+    subprocess.Popen(
+        command,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.time() + timeout
+    while not client.is_running():
+        if time.time() > deadline:
+            raise TimeoutError(f"Feature daemon did not start on {client.socket_path}")
+        time.sleep(0.5)
+    return client
+
+
+if __name__ == "__main__":
+    # python -m feature_calculation.feature_daemon --workers 4
+    parser = argparse.ArgumentParser(description="Warm feature-extraction daemon")
+    parser.add_argument("--socket", default=default_socket_path())
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads-per-worker", type=int, default=None)
+    parser.add_argument("--whisper-options", type=json.loads, default=None)
+    args = parser.parse_args()
+    with FeatureDaemon(args.socket, args.workers, args.threads_per_worker, args.whisper_options) as server:
+        print(f"Feature daemon listening on {args.socket}")
+        server.serve_forever()
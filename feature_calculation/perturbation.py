@@ -0,0 +1,270 @@
+"""
+Jitter and shimmer from one glottal point process, computed with NumPy.
+
+The periodic point process is extracted once and converted to an array of pulse
+times. Period and peak-amplitude arrays are derived from it, and every jitter and
+shimmer variant is a vectorized reduction over sliding windows of those arrays. The
+reductions use Praat's exclusion rules:
+    - periods outside [MIN_PERIOD, MAX_PERIOD] are not used;
+    - consecutive periods differing by more than MAX_PERIOD_FACTOR are not compared;
+    - consecutive amplitudes differing by more than MAX_AMPLITUDE_FACTOR are not compared.
+Peak amplitudes are Hann-windowed RMS values around each pulse, over 0.2 of the
+neighbouring periods, as in Praat's "To AmplitudeTier (period)".
+
+Tuple terms are kept per pulse, so per-voiced-segment values (segments split at
+voice breaks, i.e. periods longer than MAX_PERIOD) are grouped sums of the same terms.
+
+Tolerance against Praat's "Get jitter (...)" and "Get shimmer (...)" queries on the
+same point process (asserted on the bundled "Audio Files" by
+tests/test_perturbation.py; benchmarks.perturbation_parity_report reports it for
+other corpora):
+    - jitter: relative error <= JITTER_RTOL, the reductions are exact;
+    - shimmer: relative error <= SHIMMER_RTOL, from the windowed peak amplitudes.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from parselmouth.praat import call
+
+# Praat's standard arguments for "Get jitter (...)" and "Get shimmer (...)"
+MIN_PERIOD = 0.0001
+MAX_PERIOD = 0.02
+MAX_PERIOD_FACTOR = 1.3
+MAX_AMPLITUDE_FACTOR = 1.6
+
+# relative tolerance against Praat (see the module docstring)
+JITTER_RTOL = 1e-4
+SHIMMER_RTOL = 1e-2
+
+JITTER_MEASURES = ["local", "local_absolute", "rap", "ppq5", "ddp"]
+SHIMMER_MEASURES = ["local", "local_db", "apq3", "apq5", "apq11", "dda"]
+
+# pulses per block when computing windowed amplitudes
+AMPLITUDE_BLOCK = 2048
+
+
+def glottal_pulses(sound, min_pitch, max_pitch):
+    """
+    Pulse times of Praat's "To PointProcess (periodic, cc)".
+
+    Returns:
+        numpy.ndarray: Pulse times in seconds.
+    """
+    point_process = call(sound, "To PointProcess (periodic, cc)", min_pitch, max_pitch)
+    if call(point_process, "Get number of points") == 0:
+        return np.array([])
+    return call(point_process, "To Matrix").values[0].astype(float)
+
+
+def _factor_ok(values, max_factor):
+    """
+    True where consecutive values differ by at most max_factor (as a ratio).
+    """
+    a, b = values[:-1], values[1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.maximum(a, b) / np.minimum(a, b) <= max_factor
+
+
+def _windows_all(mask, k):
+    """
+    True for each window of k consecutive entries that are all True.
+    """
+    if len(mask) < k:
+        return np.zeros(0, dtype=bool)
+    return sliding_window_view(mask, k).all(axis=1)
+
+
+def _tuple_terms(values, in_range, factor_ok, k):
+    """
+    Perturbation terms over windows of k consecutive values: |v1 - v2| for k = 2,
+    else the distance of the middle value from the window mean.
+
+    Returns:
+        tuple: (terms, valid) with one entry per window start.
+    """
+    if len(values) < k:
+        return np.zeros(0), np.zeros(0, dtype=bool)
+    windows = sliding_window_view(values, k)
+    if k == 2:
+        terms = np.abs(windows[:, 0] - windows[:, 1])
+    else:
+        terms = np.abs(windows[:, k // 2] - windows.mean(axis=1))
+    valid = _windows_all(in_range, k) & _windows_all(factor_ok, k - 1)
+    return terms, valid
+
+
+def _is_period(periods, max_factor):
+    """
+    Praat's period test for the mean period: in range, and not differing by more
+    than max_factor from both of its neighbours (a lone period never counts).
+    """
+    in_range = (periods >= MIN_PERIOD) & (periods <= MAX_PERIOD)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        prev_factor = np.r_[np.nan, np.maximum(periods[1:], periods[:-1]) / np.minimum(periods[1:], periods[:-1])]
+    next_factor = np.r_[prev_factor[1:], np.nan]
+    isolated = np.isnan(prev_factor) & np.isnan(next_factor)
+    both_far = (prev_factor > max_factor) & (next_factor > max_factor)
+    return in_range & ~isolated & ~both_far
+
+
+def _hann_rms(sound, tmid, left, right):
+    """
+    Hann-windowed RMS of the sound around each time in tmid, with the window
+    reaching left and right seconds to either side; NaN with fewer than 3 samples.
+    """
+    samples = sound.values.mean(axis=0)
+    n = len(samples)
+    x1, dx = sound.x1, sound.dx
+    start = np.clip(np.ceil((tmid - left - x1) / dx).astype(int), 0, n - 1)
+    stop = np.clip(np.floor((tmid + right - x1) / dx).astype(int), 0, n - 1)
+    length = stop - start + 1
+    rms = np.full(len(tmid), np.nan)
+    if len(tmid) == 0:
+        return rms
+    offsets = np.arange(max(length.max(), 1))
+    for b in range(0, len(tmid), AMPLITUDE_BLOCK):
+        block = slice(b, b + AMPLITUDE_BLOCK)
+        index = np.minimum(start[block, None] + offsets[None, :], n - 1)
+        inside = offsets[None, :] < length[block, None]
+        distance = x1 + index * dx - tmid[block, None]
+        width = np.where(distance < 0, left[block, None], right[block, None])
+        window = (0.5 + 0.5 * np.cos(np.pi * distance / width)) * inside
+        values = samples[index] * window
+        rms[block] = np.sqrt(np.sum(values**2, axis=1) / np.sum(window**2, axis=1))
+    rms[length < 3] = np.nan
+    return rms
+
+
+def peak_amplitudes(sound, pulses, max_period_factor=MAX_PERIOD_FACTOR):
+    """
+    Per-pulse amplitudes as in Praat's "To AmplitudeTier (period)": only pulses whose
+    two adjacent periods are in range and within max_period_factor of each other.
+
+    Returns:
+        tuple: (pulse indices, amplitudes).
+    """
+    periods = np.diff(pulses)
+    in_range = (periods >= MIN_PERIOD) & (periods <= MAX_PERIOD)
+    _, valid = _tuple_terms(periods, in_range, _factor_ok(periods, max_period_factor), 2)
+    index = np.flatnonzero(valid) + 1
+    amplitudes = _hann_rms(
+        sound, pulses[index], 0.2 * periods[index - 1], 0.2 * periods[index]
+    )
+    keep = np.isfinite(amplitudes) & (amplitudes > 0)
+    return index[keep], amplitudes[keep]
+
+
+def _grouped_mean(values, valid, groups, n_groups):
+    """
+    Mean of the valid values overall and per group (NaN where nothing is valid).
+    """
+    values, groups = values[valid], groups[valid]
+    overall = values.mean() if len(values) else np.nan
+    count = np.bincount(groups, minlength=n_groups)
+    total = np.bincount(groups, weights=values, minlength=n_groups)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return overall, total / count
+
+
+def perturbation_measures(
+    sound,
+    min_pitch,
+    max_pitch,
+    max_period_factor=MAX_PERIOD_FACTOR,
+    max_amplitude_factor=MAX_AMPLITUDE_FACTOR,
+    by_segment=False,
+):
+    """
+    All jitter and shimmer variants from one point process.
+
+    Args:
+        sound (parselmouth.Sound): A parselmouth Sound object.
+        min_pitch (float): Pitch floor for the point process (Hz).
+        max_pitch (float): Pitch ceiling for the point process (Hz).
+        max_period_factor (float): Praat's maximum period factor.
+        max_amplitude_factor (float): Praat's maximum amplitude factor.
+        by_segment (bool): Also return the measures per voiced segment.
+
+    Returns:
+        dict: jitter_local, jitter_local_absolute, jitter_rap, jitter_ppq5, jitter_ddp,
+        shimmer_local, shimmer_local_db, shimmer_apq3, shimmer_apq5, shimmer_apq11 and
+        shimmer_dda (NaN where Praat returns undefined). With by_segment=True, a tuple
+        (dict, pandas.DataFrame) whose frame has one row per voiced segment with its
+        start, end, number of pulses and the same measures.
+    """
+    pulses = glottal_pulses(sound, min_pitch, max_pitch)
+    periods = np.diff(pulses)
+    in_range = (periods >= MIN_PERIOD) & (periods <= MAX_PERIOD)
+    factor_ok = _factor_ok(periods, max_period_factor)
+    # voiced segments are split at voice breaks
+    segment = np.r_[0, np.cumsum(periods > MAX_PERIOD)].astype(int)[: len(pulses)]
+    n_segments = segment[-1] + 1 if len(segment) else 0
+
+    results = {}
+    segment_results = {}
+
+    mean_period, segment_period = _grouped_mean(
+        periods, _is_period(periods, max_period_factor), segment[:-1], n_segments
+    )
+    for name, k in [("local", 2), ("rap", 3), ("ppq5", 5)]:
+        terms, valid = _tuple_terms(periods, in_range, factor_ok, k)
+        overall, grouped = _grouped_mean(terms, valid, segment[: len(terms)], n_segments)
+        if name == "local":
+            results["jitter_local_absolute"] = overall
+            segment_results["jitter_local_absolute"] = grouped
+        results[f"jitter_{name}"] = overall / mean_period
+        segment_results[f"jitter_{name}"] = grouped / segment_period
+    results["jitter_ddp"] = 3 * results["jitter_rap"]
+    segment_results["jitter_ddp"] = 3 * segment_results["jitter_rap"]
+
+    index, amplitudes = peak_amplitudes(sound, pulses, max_period_factor)
+    amplitude_periods = np.diff(pulses[index])
+    amplitude_in_range = (amplitude_periods >= MIN_PERIOD) & (amplitude_periods <= MAX_PERIOD)
+    amplitude_ok = _factor_ok(amplitudes, max_amplitude_factor)
+    amplitude_segment = segment[index]
+    mean_amplitude, segment_amplitude = _grouped_mean(
+        amplitudes, np.ones(len(amplitudes), dtype=bool), amplitude_segment, n_segments
+    )
+    for name, k in [("local", 2), ("apq3", 3), ("apq5", 5), ("apq11", 11)]:
+        terms, valid = _tuple_terms(
+            amplitudes, amplitude_in_range, amplitude_ok, k
+        )
+        groups = amplitude_segment[: len(terms)]
+        overall, grouped = _grouped_mean(terms, valid, groups, n_segments)
+        results[f"shimmer_{name}"] = overall / mean_amplitude
+        segment_results[f"shimmer_{name}"] = grouped / segment_amplitude
+        if name == "local":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                db_terms = np.abs(20 * np.log10(amplitudes[1:] / amplitudes[:-1]))
+            overall, grouped = _grouped_mean(db_terms, valid, groups, n_segments)
+            results["shimmer_local_db"] = overall
+            segment_results["shimmer_local_db"] = grouped
+    results["shimmer_dda"] = 3 * results["shimmer_apq3"]
+    segment_results["shimmer_dda"] = 3 * segment_results["shimmer_apq3"]
+    results = {k: float(v) for k, v in results.items()}
+
+    if not by_segment:
+        return results
+    segments = pd.DataFrame(
+        {
+            "start": [pulses[segment == s][0] for s in range(n_segments)],
+            "end": [pulses[segment == s][-1] for s in range(n_segments)],
+            "n_pulses": np.bincount(segment, minlength=n_segments),
+            **segment_results,
+        }
+    )
+    return results, segments
+
+
+def jitter_list(measures):
+    """
+    Jitter values in the order of audio_features.calculate_jitter.
+    """
+    return [measures[f"jitter_{name}"] for name in JITTER_MEASURES]
+
+
+def shimmer_list(measures):
+    """
+    Shimmer values in the order of audio_features.calculate_shimmer.
+    """
+    return [measures[f"shimmer_{name}"] for name in SHIMMER_MEASURES]
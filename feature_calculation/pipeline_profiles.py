@@ -0,0 +1,114 @@
+"""
+Task-aware pipeline profiles: which stages of process_audio_file run for a recording.
+
+Stages:
+    asr: Whisper transcript and word alignment, text features, word-timing features
+    vowel_space: formant extraction, AAVS, hull area, density VSA
+    speech_rate: syllable-nucleus speech and articulation rate
+    pauses: Praat silence pass for the average pause duration
+    voice: F0, intensity, harmonicity, jitter, shimmer, PPE, CPP
+
+A profile is picked per file from an explicit map (filename or path -> profile or
+task name, e.g. from the 2157 task table) or else from filename patterns, and is
+recorded in the "profile" column.
+"""
+import os
+import re
+import pandas as pd
+
+STAGES = ("asr", "vowel_space", "speech_rate", "pauses", "voice")
+
+PROFILES = {
+    "connected_speech": frozenset(STAGES),
+    # sustained vowels: voice quality only (no words, pauses, syllables or vowel space)
+    "phonation": frozenset({"voice"}),
+    # diadochokinesis: syllable rate and pauses, but no lexical content
+    "ddk": frozenset({"voice", "vowel_space", "speech_rate", "pauses"}),
+}
+DEFAULT_PROFILE = "connected_speech"
+
+# task names of the 2157 data
+TASK_PROFILES = {
+    "sustained_vowel_phonation": "phonation",
+    "ddk": "ddk",
+    "paragraph_reading": "connected_speech",
+    "picture_description": "connected_speech",
+    "semantic_fluency": "connected_speech",
+    "phonemic_fluency": "connected_speech",
+}
+
+# (regex searched in the file name, profile or task), first match wins
+TASK_PATTERNS = [
+    (r"sustained_vowel|phonation", "phonation"),
+    (r"ddk|diadochokinesis|pataka", "ddk"),
+]
+
+
+def resolve_profile(name):
+    """
+    Map a profile or task name to a profile name.
+    """
+    name = TASK_PROFILES.get(name, name)
+    if name not in PROFILES:
+        raise ValueError(f"Unknown pipeline profile or task: {name}")
+    return name
+
+
+def validate_profiles(profile_map=None, patterns=None):
+    """
+    Check every profile or task name of a profile map and pattern list up front, so
+    an unknown name fails the run before any file is processed.
+
+    Raises:
+        ValueError: Listing the unknown names.
+    """
+    names = set((profile_map or {}).values()) | {profile for _, profile in patterns or []}
+    unknown = sorted(
+        str(name) for name in names if TASK_PROFILES.get(name, name) not in PROFILES
+    )
+    if unknown:
+        raise ValueError(
+            f"Unknown pipeline profiles or tasks: {', '.join(unknown)} "
+            f"(profiles: {', '.join(PROFILES)}; tasks: {', '.join(TASK_PROFILES)})"
+        )
+
+
+def select_profile(audio_path, profile_map=None, patterns=None, default=DEFAULT_PROFILE):
+    """
+    Choose the profile of one recording.
+
+    Args:
+        audio_path (str): Path to the audio file.
+        profile_map (dict, optional): Path, file name or file name without extension ->
+            profile or task name.
+        patterns (list, optional): (regex, profile or task) pairs searched in the file
+            name, used when profile_map has no entry (e.g. TASK_PATTERNS).
+        default (str): Profile for files matched by neither.
+
+    Returns:
+        str: The profile name.
+    """
+    name = os.path.basename(audio_path)
+    if profile_map:
+        for key in (audio_path, name, os.path.splitext(name)[0]):
+            if key in profile_map:
+                return resolve_profile(profile_map[key])
+    for pattern, profile in patterns or []:
+        if re.search(pattern, name):
+            return resolve_profile(profile)
+    return resolve_profile(default)
+
+
+def stages(profile):
+    return PROFILES[resolve_profile(profile)]
+
+
+def load_profile_map(table_path, key_column="filename", task_column="task_name"):
+    """
+    Read a profile map from a CSV task table, e.g. the 2157 info table.
+
+    Returns:
+        dict: key_column value (as str) -> task_column value.
+    """
+    table = pd.read_csv(table_path, usecols=[key_column, task_column])
+    return dict(zip(table[key_column].astype(str), table[task_column]))
@@ -0,0 +1,124 @@
+"""
+Worker x thread layout for build_csv.
+
+Every pool worker runs BLAS (np.cov, GaussianMixture, KMeans) and torch (Whisper),
+and each library sizes its thread pool to the whole machine by default, so N workers
+on N cores run N * N threads. The governor counts the CPUs this process may actually
+use (affinity mask and cgroup quota), splits them into workers x threads, and caps
+every thread pool inside each worker.
+"""
+import os
+import sys
+import math
+from threadpoolctl import threadpool_limits
+
+# Environment variables read by BLAS/OpenMP runtimes when they are first loaded
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+
+DEFAULT_THREADS_PER_WORKER = 1
+
+
+def _cgroup_cpu_limit():
+    """
+    CPU limit from the cgroup quota (v2 cpu.max, else v1 cfs quota), or None.
+    """
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return float(quota) / float(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus():
+    """
+    Number of CPUs this process can use: the affinity mask, reduced to the cgroup
+    quota (rounded down, at least 1) when one is set.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, max(1, math.floor(limit)))
+    return cpus
+
+
+def plan_layout(workers=None, threads_per_worker=None, cpus=None):
+    """
+    Split the available CPUs into pool workers and threads per worker.
+
+    Args:
+        workers (int, optional): Number of pool workers; derived from the threads if omitted.
+        threads_per_worker (int, optional): BLAS/torch threads per worker; derived from the
+            workers if omitted, else DEFAULT_THREADS_PER_WORKER.
+        cpus (int, optional): CPUs to plan for; available_cpus() by default.
+
+    Returns:
+        tuple: (workers, threads_per_worker), with workers * threads_per_worker <= cpus
+        unless both were given explicitly.
+    """
+    if cpus is None:
+        cpus = available_cpus()
+    if workers is None and threads_per_worker is None:
+        threads_per_worker = DEFAULT_THREADS_PER_WORKER
+    if workers is None:
+        workers = max(1, cpus // threads_per_worker)
+    elif threads_per_worker is None:
+        threads_per_worker = max(1, cpus // workers)
+    return workers, threads_per_worker
+
+
+def candidate_layouts(cpus=None):
+    """
+    Layouts worth benchmarking: power-of-two thread counts with as many workers as fit.
+    """
+    if cpus is None:
+        cpus = available_cpus()
+    layouts = []
+    threads = 1
+    while threads <= cpus:
+        layouts.append((cpus // threads, threads))
+        threads *= 2
+    return layouts
+
+
+def set_thread_env(threads):
+    """
+    Set the thread environment variables, so runtimes loaded afterwards (in this
+    process or in spawned workers) start with the right pool size.
+    """
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+
+
+def limit_threads(threads):
+    """
+    Cap every thread pool of this process: environment variables for runtimes not
+    loaded yet, threadpoolctl for BLAS/OpenMP pools already loaded (e.g. inherited
+    through fork), and torch if it has been imported.
+    """
+    set_thread_env(threads)
+    threadpool_limits(threads)
+    if "torch" in sys.modules:
+        torch = sys.modules["torch"]
+        torch.set_num_threads(threads)
@@ -0,0 +1,231 @@
+"""
+Silence-parameter sweeps without re-running Praat.
+
+The 50 Hz intensity contour, its intensity peaks and the pitch at those peaks are
+computed once per file; every grid point of (silencedb, min_pause,
+silence_threshold, mindip) is then evaluated on those arrays with NumPy. The
+silence segmentation reimplements Praat's "To TextGrid (silences)" on the frame
+grid: frames below (0.99 quantile + silencedb) are silent, sounding intervals shorter
+than silence_threshold are merged into the silence around them, then silent
+intervals shorter than min_pause are merged into the sound around them.
+
+Tolerance against the Praat path (calculate_interword_pauses, adv_speech_metrics):
+    - interval boundaries: midpoints between intensity frames, as in Praat, so pause
+      durations agree to well under one frame (10 ms).
+    - syllable nuclei: intensity peaks are frame maxima instead of Praat's
+      sinc-interpolated extrema of the intensity, so nsyll may differ by a peak or two
+      where two maxima lie within one frame.
+benchmarks.silence_sweep_parity_report measures both on real files.
+"""
+import itertools
+import numpy as np
+import pandas as pd
+from parselmouth.praat import call
+from feature_calculation import audio_features
+
+DEFAULT_GRID = {
+    "silencedb": [-35, -30, -25, -20, -15],
+    "min_pause": [0.1, 0.2, 0.3, 0.5, 1.0],
+    "silence_threshold": [0.1],
+    "mindip": [2],
+}
+
+
+def parameter_grid(grid=None):
+    """
+    Expand a dict of parameter lists into one row per combination.
+
+    Args:
+        grid (dict, optional): silencedb, min_pause, silence_threshold and mindip lists;
+            missing parameters take the DEFAULT_GRID values.
+
+    Returns:
+        pandas.DataFrame: One row per parameter set.
+    """
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    names = list(DEFAULT_GRID)
+    return pd.DataFrame(
+        list(itertools.product(*(grid[name] for name in names))), columns=names
+    )
+
+
+def extract_sweep_contours(sound):
+    """
+    Everything the sweep needs from Praat, computed once per file.
+
+    Args:
+        sound (parselmouth.Sound): A parselmouth Sound object.
+
+    Returns:
+        dict: times and values of the 50 Hz intensity contour, its 0.99 quantile,
+        minimum, start/end times and duration, and the frame index and voicing of
+        every intensity peak.
+    """
+    intensity = sound.to_intensity(50)
+    values = intensity.values[0].astype(float)
+    # interior local maxima of the intensity contour
+    peaks = np.flatnonzero((values[1:-1] > values[:-2]) & (values[1:-1] >= values[2:])) + 1
+    times = np.asarray(intensity.xs())
+    # same pitch analysis as adv_speech_metrics
+    pitch = sound.to_pitch_ac(0.02, 30, 4, False, 0.03, 0.25, 0.01, 0.35, 0.25, 450)
+    voiced = np.array([not np.isnan(pitch.get_value_at_time(t)) for t in times[peaks]], dtype=bool)
+    return {
+        "times": times,
+        "values": values,
+        "q99": call(intensity, "Get quantile", 0, 0, 0.99),
+        "min": call(intensity, "Get minimum", 0, 0, "Parabolic"),
+        "xmin": sound.xmin,
+        "xmax": sound.xmax,
+        "duration": sound.get_total_duration(),
+        "peaks": peaks,
+        "peak_voiced": voiced,
+    }
+
+
+def _runs(labels):
+    """
+    Start and end (exclusive) frame index and label of each run of equal labels.
+    """
+    edges = np.flatnonzero(np.diff(labels.astype(np.int8))) + 1
+    starts = np.r_[0, edges]
+    ends = np.r_[edges, len(labels)]
+    return starts, ends, labels[starts]
+
+
+def _drop_short(starts, ends, labels, bounds, label, min_duration):
+    """
+    Relabel runs of the given label shorter than min_duration and merge neighbours.
+    """
+    durations = bounds[ends] - bounds[starts]
+    labels = labels.copy()
+    labels[(labels == label) & (durations < min_duration)] = not label
+    keep = np.r_[True, labels[1:] != labels[:-1]]
+    new_starts = starts[keep]
+    new_ends = np.r_[new_starts[1:], ends[-1]]
+    return new_starts, new_ends, labels[keep]
+
+
+def silent_mask_intervals(contours, silent, min_pause, silence_threshold):
+    """
+    Silence segmentation of one frame mask.
+
+    Args:
+        contours (dict): Output of extract_sweep_contours.
+        silent (numpy.ndarray): Boolean mask of frames below the silence threshold.
+        min_pause (float): Minimum silent interval duration (s).
+        silence_threshold (float): Minimum sounding interval duration (s).
+
+    Returns:
+        tuple: (starts, ends, is_silent) arrays of interval times in seconds.
+    """
+    times = contours["times"]
+    # interval boundaries lie halfway between frames; the outer ones at the sound edges
+    bounds = np.r_[contours["xmin"], (times[1:] + times[:-1]) / 2, contours["xmax"]]
+    starts, ends, labels = _runs(silent)
+    starts, ends, labels = _drop_short(starts, ends, labels, bounds, False, silence_threshold)
+    starts, ends, labels = _drop_short(starts, ends, labels, bounds, True, min_pause)
+    return bounds[starts], bounds[ends], labels
+
+
+def _syllables(contours, threshold, mindip, sounding_starts, sounding_ends):
+    """
+    Voiced syllable nuclei as in adv_speech_metrics: peaks above threshold followed by
+    a dip of more than mindip dB, voiced and inside a sounding interval.
+    """
+    values = contours["values"]
+    peaks = contours["peaks"]
+    above = values[peaks] > threshold
+    candidates = peaks[above]
+    voiced = contours["peak_voiced"][above]
+    if len(candidates) < 2:
+        return 0
+    # minimum intensity between each peak and the next
+    dips = np.minimum.reduceat(values, candidates)[:-1]
+    valid = np.abs(values[candidates[:-1]] - dips) > mindip
+    times = contours["times"][candidates[:-1]][valid]
+    voiced = voiced[:-1][valid]
+    interval = np.searchsorted(sounding_starts, times, side="right") - 1
+    inside = (interval >= 0) & (times < sounding_ends[np.clip(interval, 0, None)])
+    return int(np.sum(voiced & inside))
+
+
+def sweep_contours(contours, grid=None):
+    """
+    Evaluate a parameter grid on precomputed contours.
+
+    Args:
+        contours (dict): Output of extract_sweep_contours.
+        grid (dict or pandas.DataFrame, optional): Parameter lists (see parameter_grid)
+            or an already expanded grid.
+
+    Returns:
+        pandas.DataFrame: The grid with avg_pause_duration (as calculate_interword_pauses),
+        n_pauses, total_pause_time, speaking_time, nsyll, speech_rate, articulation_rate
+        and average_syllable_dur (as adv_speech_metrics) per parameter set.
+    """
+    if not isinstance(grid, pd.DataFrame):
+        grid = parameter_grid(grid)
+    # all silence thresholds at once: (n_silencedb, n_frames)
+    silencedbs = np.sort(grid["silencedb"].unique())
+    masks = contours["values"][None, :] < (contours["q99"] + silencedbs)[:, None]
+    duration = contours["duration"]
+    segmentations = {}
+    rows = []
+    for params in grid.itertuples(index=False):
+        key = (params.silencedb, params.min_pause, params.silence_threshold)
+        if key not in segmentations:
+            silent = masks[np.searchsorted(silencedbs, params.silencedb)]
+            segmentations[key] = silent_mask_intervals(
+                contours, silent, params.min_pause, params.silence_threshold
+            )
+        starts, ends, is_silent = segmentations[key]
+        pauses = (ends - starts)[is_silent]
+        if len(pauses):
+            pauses = pauses[pauses < pauses.mean() + 3 * pauses.std()]
+        sounding_starts, sounding_ends = starts[~is_silent], ends[~is_silent]
+        speaking_time = float(np.sum(sounding_ends - sounding_starts))
+        threshold = max(contours["q99"] + params.silencedb, contours["min"])
+        nsyll = _syllables(contours, threshold, params.mindip, sounding_starts, sounding_ends)
+        rows.append(
+            {
+                **params._asdict(),
+                "avg_pause_duration": float(pauses.mean()) if len(pauses) else 0.0,
+                "n_pauses": int(np.sum(~is_silent)) - 1,
+                "total_pause_time": float(np.sum((ends - starts)[is_silent])),
+                "speaking_time": speaking_time,
+                "nsyll": nsyll,
+                "speech_rate": nsyll / duration,
+                "articulation_rate": nsyll / speaking_time if speaking_time else np.nan,
+                "average_syllable_dur": speaking_time / nsyll if nsyll else 0.0,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def sweep_silence_parameters(audio_paths, grid=None, analysis_sample_rate=None, save_path=None):
+    """
+    Pause and speech-rate features of several files over a silence-parameter grid.
+
+    Args:
+        audio_paths (list): Paths to audio files (or parselmouth Sounds).
+        grid (dict or pandas.DataFrame, optional): Parameter lists (see parameter_grid).
+        analysis_sample_rate (float, optional): Resample once before analysis.
+        save_path (str, optional): If given, the table is also written there as CSV.
+
+    Returns:
+        pandas.DataFrame: Tidy table, one row per (file, parameter set).
+    """
+    if not isinstance(grid, pd.DataFrame):
+        grid = parameter_grid(grid)
+    tables = []
+    for audio_path in audio_paths:
+        sound = audio_features.resample_for_analysis(
+            audio_features.load_sound(audio_path), analysis_sample_rate
+        )
+        table = sweep_contours(extract_sweep_contours(sound), grid)
+        table.insert(0, "file", audio_path if isinstance(audio_path, str) else sound.name)
+        tables.append(table)
+    report = pd.concat(tables, ignore_index=True)
+    if save_path is not None:
+        report.to_csv(save_path, index=False)
+    return report
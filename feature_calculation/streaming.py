@@ -0,0 +1,332 @@
+"""
+Incremental feature extraction for live audio.
+
+Samples are pushed in chunks of any size into a fixed-size ring buffer. Whenever a
+block of block_seconds plus context_seconds of look-ahead is buffered, the block is
+analyzed by Praat together with context_seconds on either side, and only the frames
+inside the block's core are kept, as in windowed_analysis. Each analyzed block
+produces an update, so results lag the input by at most block_seconds +
+context_seconds.
+
+F0, intensity and HNR frames go into windowed_analysis.RunningStats (online mean and
+variance, histogram quantiles), so their memory is constant. Pauses and syllable
+nuclei are evaluated with silence_sweep on the 50 Hz intensity contour and the
+voicing of its peaks, against the 0.99 intensity quantile seen so far. Live updates
+use a deque of per-block contours trimmed to the last horizon_seconds, so each
+update costs O(horizon_seconds). finalize needs the whole contour; it is kept only
+with keep_history=True (the default), at ~1 kB per second of audio (about 3.5 MB
+per hour), and concatenated once. With keep_history=False memory is constant and
+finalize's pause and speech-rate keys cover only the last horizon_seconds.
+
+Tolerance of finalize against the batch path:
+    - F0, intensity and HNR statistics: as windowed_analysis.windowed_audio_features.
+    - avg pause duration, syllables, speech and articulation rate: as silence_sweep
+      against calculate_interword_pauses / adv_speech_metrics, plus one intensity
+      frame per block boundary.
+    - phonation time: within one intensity frame per block boundary.
+(asserted on the bundled "Audio Files" by tests/test_streaming.py)
+"""
+import math
+import collections
+import numpy as np
+import pandas as pd
+import parselmouth
+from parselmouth.praat import call
+from feature_calculation import audio_features
+from feature_calculation import silence_sweep
+from feature_calculation import windowed_analysis
+
+DEFAULT_BLOCK_SECONDS = 1.0
+DEFAULT_CONTEXT_SECONDS = 0.5
+DEFAULT_HORIZON_SECONDS = 30.0
+
+# adv_speech_metrics' silence and syllable parameters
+SPEECH_SILENCE_DB = -25
+SPEECH_MIN_PAUSE = 0.1
+SPEECH_MIN_DIP = 2
+
+
+class StreamingExtractor:
+    """
+    Push-based extractor of F0, intensity, HNR, pause and speech-rate features.
+
+    Example:
+        extractor = StreamingExtractor(16000, on_update=print)
+        for chunk in microphone_chunks():
+            extractor.push(chunk)
+        features = extractor.finalize()
+    """
+
+    def __init__(
+        self,
+        sample_rate,
+        block_seconds=DEFAULT_BLOCK_SECONDS,
+        context_seconds=DEFAULT_CONTEXT_SECONDS,
+        horizon_seconds=DEFAULT_HORIZON_SECONDS,
+        silencedb=audio_features.DEFAULT_SILENCE_DB,
+        min_pause=audio_features.DEFAULT_MIN_PAUSE_SECONDS,
+        silence_threshold=audio_features.DEFAULT_SILENCE_THRESHOLD,
+        keep_history=True,
+        on_update=None,
+    ):
+        """
+        Args:
+            sample_rate (int): Sample rate of the pushed audio in Hz.
+            block_seconds (float): Length of each analyzed block's core.
+            context_seconds (float): Context analyzed on both sides of a block; also
+                the look-ahead an update waits for.
+            horizon_seconds (float): Span of the live pause and speech-rate estimates.
+            silencedb, min_pause, silence_threshold: As in calculate_interword_pauses.
+            keep_history (bool): Keep the whole intensity contour for finalize's pause
+                and speech-rate keys; if False they cover the last horizon_seconds.
+            on_update (callable, optional): Called with each update dict.
+        """
+        self.sample_rate = sample_rate
+        self.block = int(round(block_seconds * sample_rate))
+        self.context = int(round(context_seconds * sample_rate))
+        self.horizon_seconds = horizon_seconds
+        self.on_update = on_update
+        self.pause_params = pd.DataFrame(
+            [
+                {
+                    "silencedb": silencedb,
+                    "min_pause": min_pause,
+                    "silence_threshold": silence_threshold,
+                    "mindip": SPEECH_MIN_DIP,
+                },
+                {
+                    "silencedb": SPEECH_SILENCE_DB,
+                    "min_pause": SPEECH_MIN_PAUSE,
+                    "silence_threshold": 0.1,
+                    "mindip": SPEECH_MIN_DIP,
+                },
+            ]
+        )
+        # ring buffer: left context, one block and the look-ahead
+        self.buffer = np.zeros(self.block + 2 * self.context)
+        self.buffer_start = 0  # absolute sample index of buffer[0]
+        self.buffered = 0
+        self.core_start = 0
+        self.f0 = windowed_analysis.f0_stats()
+        self.intensity = windowed_analysis.intensity_stats()
+        self.harmonicity = windowed_analysis.harmonicity_stats()
+        self.loudness = windowed_analysis.intensity_stats()
+        self.keep_history = keep_history
+        # per-block (times, values, peak_times, peak_voiced) of the contour
+        self.live = collections.deque()
+        self.history = []
+        self.finalized = False
+
+    @property
+    def received_seconds(self):
+        return (self.buffer_start + self.buffered) / self.sample_rate
+
+    def push(self, samples):
+        """
+        Append audio and analyze every block that is complete.
+
+        Args:
+            samples (numpy.ndarray): Shape (samples,) or (channels, samples), scaled to
+                [-1, 1).
+
+        Returns:
+            list: The update dicts of the blocks analyzed (often empty).
+        """
+        if self.finalized:
+            raise RuntimeError("push() after finalize()")
+        samples = np.atleast_2d(np.asarray(samples, dtype=float)).mean(axis=0)
+        updates = []
+        while len(samples):
+            n = min(len(samples), len(self.buffer) - self.buffered)
+            self.buffer[self.buffered : self.buffered + n] = samples[:n]
+            self.buffered += n
+            samples = samples[n:]
+            while self.buffer_start + self.buffered >= self.core_start + self.block + self.context:
+                updates.append(self._analyze(self.core_start + self.block))
+        return updates
+
+    def _drop_before(self, sample):
+        """
+        Discard buffered samples before the given absolute index.
+        """
+        shift = min(max(0, sample - self.buffer_start), self.buffered)
+        if shift:
+            self.buffer[: self.buffered - shift] = self.buffer[shift : self.buffered]
+            self.buffered -= shift
+            self.buffer_start += shift
+
+    def _analyze(self, core_end):
+        """
+        Analyze the block [core_start, core_end) with its context and advance.
+        """
+        sr = self.sample_rate
+        start = max(self.buffer_start, self.core_start - self.context)
+        end = min(self.buffer_start + self.buffered, core_end + self.context)
+        sound = parselmouth.Sound(
+            self.buffer[start - self.buffer_start : end - self.buffer_start],
+            sampling_frequency=sr,
+            start_time=start / sr,
+        )
+        core_start, core_end_time = self.core_start / sr, core_end / sr
+
+        def in_core(times):
+            return windowed_analysis._in_core(np.asarray(times), core_start, core_end_time)
+
+        pitch = sound.to_pitch()
+        frequencies = pitch.selected_array["frequency"][in_core(pitch.xs())]
+        voiced = frequencies[frequencies > 0]
+        intensity = sound.to_intensity()
+        intensity_values = intensity.values[0][in_core(intensity.xs())]
+        harmonicity = call(sound, "To Harmonicity (cc)", 0.01, 75, 0.1, 1.0)
+        hnr_values = harmonicity.values[0][in_core(harmonicity.xs())]
+        # Praat's harmonicity statistics ignore unvoiced frames (-200 dB)
+        hnr_values = hnr_values[hnr_values > -200]
+        self.f0.update(voiced)
+        self.intensity.update(intensity_values)
+        self.harmonicity.update(hnr_values)
+
+        # 50 Hz contour and voiced peaks for pauses and syllables (see silence_sweep)
+        loud = sound.to_intensity(50)
+        loud_times = np.asarray(loud.xs())
+        loud_values = loud.values[0].astype(float)
+        keep = in_core(loud_times)
+        self.loudness.update(loud_values[keep])
+        peaks = np.flatnonzero(
+            (loud_values[1:-1] > loud_values[:-2]) & (loud_values[1:-1] >= loud_values[2:])
+        ) + 1
+        peaks = peaks[keep[peaks]]
+        speech_pitch = sound.to_pitch_ac(0.02, 30, 4, False, 0.03, 0.25, 0.01, 0.35, 0.25, 450)
+        contour = (
+            loud_times[keep],
+            loud_values[keep].astype(np.float32),
+            loud_times[peaks],
+            np.array(
+                [not np.isnan(speech_pitch.get_value_at_time(t)) for t in loud_times[peaks]],
+                dtype=bool,
+            ),
+        )
+        self.live.append(contour)
+        if self.keep_history:
+            self.history.append(contour)
+        horizon_start = max(0.0, core_end_time - self.horizon_seconds)
+        # drop blocks that end before the horizon
+        while self.live and (not len(self.live[0][0]) or self.live[0][0][-1] < horizon_start):
+            self.live.popleft()
+
+        self.core_start = core_end
+        self._drop_before(self.core_start - self.context)
+        update = {
+            "start": core_start,
+            "end": core_end_time,
+            "f0_mean": np.mean(voiced) if len(voiced) else np.nan,
+            "intensity_mean": np.mean(intensity_values) if len(intensity_values) else np.nan,
+            "harmonicity_mean": np.mean(hnr_values) if len(hnr_values) else np.nan,
+            "f0": self.f0.summary(),
+            "intensity": self.intensity.summary(),
+            **self._pause_features(self.live, horizon_start),
+        }
+        if self.on_update is not None:
+            self.on_update(update)
+        return update
+
+    def _contours(self, blocks, since=0.0):
+        """
+        The 50 Hz contour of blocks from time since onwards, as
+        silence_sweep.extract_sweep_contours returns it, with the 0.99 quantile of
+        everything seen so far.
+        """
+        times, values, peak_times, peak_voiced = (np.concatenate(part) for part in zip(*blocks))
+        first = int(np.searchsorted(times, since))
+        times = times[first:]
+        values = values[first:].astype(float)
+        peak_voiced = peak_voiced[peak_times >= since]
+        peaks = np.searchsorted(times, peak_times[peak_times >= since])
+        # contour frames are centred; the covered span reaches half a frame beyond them
+        half_step = (times[1] - times[0]) / 2 if len(times) > 1 else 0.0
+        xmin = max(since, times[0] - half_step) if len(times) else since
+        xmax = times[-1] + half_step if len(times) else since
+        return {
+            "times": times,
+            "values": values,
+            "q99": self.loudness.quantile(0.99),
+            "min": self.loudness.min,
+            "xmin": xmin,
+            "xmax": xmax,
+            "duration": xmax - xmin,
+            "peaks": peaks,
+            "peak_voiced": peak_voiced,
+        }
+
+    def _pause_features(self, blocks, since=0.0):
+        contours = self._contours(blocks, since) if blocks else {"times": []}
+        if len(contours["times"]) < 2:
+            return {
+                "avg_pause_duration": np.nan,
+                "speech_rate": np.nan,
+                "articulation_rate": np.nan,
+            }
+        pause, speech = silence_sweep.sweep_contours(contours, self.pause_params).to_dict("records")
+        return {
+            "avg_pause_duration": pause["avg_pause_duration"],
+            "speech_rate": speech["speech_rate"],
+            "articulation_rate": speech["articulation_rate"],
+            "nsyll": speech["nsyll"],
+            "npause": speech["n_pauses"],
+            "speaking_time": speech["speaking_time"],
+            "duration": contours["duration"],
+            # adv_speech_metrics' phonation time: the span of the intensity frames
+            "phonation_time": len(contours["times"]) * (contours["times"][1] - contours["times"][0]),
+        }
+
+    def finalize(self):
+        """
+        Analyze the remaining audio and return whole-recording statistics.
+
+        Returns:
+            dict: fundamental_frequency and intensity as [mean, median, std, min, max],
+            harmonicity as [mean, std, min, max] and avg_pause_duration (as
+            calculate_audio_features), plus the speech-rate keys of adv_speech_metrics.
+        """
+        if not self.finalized:
+            end = self.buffer_start + self.buffered
+            if end > self.core_start:
+                self._analyze(end)
+            self.finalized = True
+        hnr = self.harmonicity.summary()
+        pauses = self._pause_features(self.history if self.keep_history else self.live)
+        nsyll = pauses.get("nsyll", 0)
+        speaking_time = pauses.get("speaking_time", 0.0)
+        duration = self.received_seconds
+        return {
+            "fundamental_frequency": self.f0.summary(),
+            "intensity": self.intensity.summary(),
+            "harmonicity": [hnr[0], hnr[2], hnr[3], hnr[4]],
+            "avg_pause_duration": pauses["avg_pause_duration"],
+            "nsyll": nsyll,
+            "npause": pauses.get("npause", 0),
+            "dur(s)": duration,
+            "phonationtime(s)": pauses.get("phonation_time", 0.0),
+            "speechrate(nsyll / dur)": nsyll / duration if duration else np.nan,
+            "articulation_rate(nsyll/phonationtime)": nsyll / speaking_time if speaking_time else 0,
+            "average_syllable_dur(speakingtime/nsyll)": speaking_time / nsyll if nsyll else 0,
+        }
+
+
+def stream_file(audio_path, chunk_seconds=0.1, **kwargs):
+    """
+    Feed an audio file through a StreamingExtractor in chunks, e.g. to compare the
+    live path with the batch features of the same file.
+
+    Returns:
+        tuple: (finalize() dict, pandas.DataFrame of the updates).
+    """
+    import soundfile as sf
+
+    updates = []
+    with sf.SoundFile(audio_path) as f:
+        extractor = StreamingExtractor(f.samplerate, **kwargs)
+        chunk = max(1, int(math.ceil(chunk_seconds * f.samplerate)))
+        for block in f.blocks(blocksize=chunk, dtype="float64", always_2d=True):
+            updates += extractor.push(block.T)
+    features = extractor.finalize()
+    return features, pd.DataFrame(updates)
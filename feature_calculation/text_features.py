@@ -131,6 +131,10 @@ def sentence_length(string):
 def calculate_text_features(text_path):
     with open(text_path, "r") as f:
         text = f.read()
+    return text_features_from_string(text)
+
+
+def text_features_from_string(text):
     text = text.lower()
     return {
         "avg_word_length": avg_word_length(text),
@@ -1,17 +1,361 @@
 import os
+import inspect
+import dataclasses
 
 import whisper
+import torch
 import json
 import parselmouth
+import numpy as np
 from parselmouth.praat import call
 import math
 
-model = whisper.load_model("base.en")
+# Decoding presets for model.transcribe. "greedy" and "beam" use temperature 0 only,
+# which disables Whisper's temperature fallback (re-decoding a segment up to 5 times).
+DECODING_PRESETS = {
+    "default": {},
+    "greedy": {"temperature": 0.0, "beam_size": None, "best_of": None},
+    "beam": {"temperature": 0.0, "beam_size": 5, "best_of": None},
+}
 
+# Options passed to every model.transcribe call; set through configure_inference
+DECODE_OPTIONS = {}
 
-def transcribe_audio(audio_path, text_dir=None):
+# Gaps between words shorter than this are not pauses; the same minimum as
+# audio_features.DEFAULT_MIN_PAUSE_SECONDS
+WORD_PAUSE_SECONDS = 0.3
+LONG_PAUSE_SECONDS = 1.0
+
+
+def _plain_linear_layers(module):
+    """
+    Replace whisper's Linear subclass with torch.nn.Linear (same weights) so that
+    dynamic quantization, which matches module types exactly, picks the layers up.
+    """
+    for name, child in module.named_children():
+        if isinstance(child, torch.nn.Linear) and type(child) is not torch.nn.Linear:
+            linear = torch.nn.Linear(
+                child.in_features, child.out_features, bias=child.bias is not None
+            )
+            linear.weight = child.weight
+            linear.bias = child.bias
+            setattr(module, name, linear)
+        else:
+            _plain_linear_layers(child)
+    return module
+
+
+def load_model(name="base.en", quantize=False, num_threads=None):
+    """
+    Load a Whisper model, optionally for fast CPU inference.
+
+    Args:
+        name (str): Whisper model name.
+        quantize (bool): Apply dynamic int8 quantization to all linear layers (CPU only).
+        num_threads (int, optional): Number of intra-op threads torch may use.
+
+    Returns:
+        whisper.model.Whisper: The model.
+    """
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+    if not quantize:
+        return whisper.load_model(name)
+    fp32_model = _plain_linear_layers(whisper.load_model(name, device="cpu"))
+    return torch.quantization.quantize_dynamic(
+        fp32_model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+model = load_model("base.en")
+
+
+def configure_inference(
+    name="base.en", quantize=False, num_threads=None, decoding="default", **decode_options
+):
+    """
+    Reload the module's Whisper model and set the decoding options used by all
+    transcription functions, e.g. configure_inference(quantize=True, num_threads=2,
+    decoding="greedy") for CPU-only nodes.
+
+    Args:
+        name (str): Whisper model name.
+        quantize (bool): Dynamic int8 quantization of the linear layers.
+        num_threads (int, optional): torch intra-op threads.
+        decoding (str): One of DECODING_PRESETS.
+        **decode_options: Extra options for model.transcribe, overriding the preset.
+    """
+    global model
+    model = load_model(name, quantize=quantize, num_threads=num_threads)
+    DECODE_OPTIONS.clear()
+    DECODE_OPTIONS.update(DECODING_PRESETS[decoding])
+    if quantize:
+        DECODE_OPTIONS["fp16"] = False
+    DECODE_OPTIONS.update(decode_options)
+
+
+def transcribe_text(audio):
+    """
+    Transcribe a path or a 16 kHz mono float32 array and return the text.
+    """
+    return model.transcribe(audio, **DECODE_OPTIONS)["text"]
+
+
+def transcribe_segments(audio):
+    """
+    Transcribe a path or a 16 kHz mono float32 array with word timestamps and
+    return the segments.
+    """
+    return model.transcribe(audio, word_timestamps=True, **DECODE_OPTIONS)["segments"]
+
+
+def _decoding_options(model):
+    """
+    whisper.DecodingOptions for one batched decode from DECODE_OPTIONS: the first
+    temperature of a fallback schedule. The language is left unset unless the caller
+    set it, so it is detected per clip as model.transcribe does.
+    """
+    fields = {f.name for f in dataclasses.fields(whisper.DecodingOptions)}
+    options = {k: v for k, v in DECODE_OPTIONS.items() if k in fields}
+    temperature = options.get("temperature", 0.0)
+    if isinstance(temperature, (list, tuple)):
+        temperature = temperature[0]
+    options["temperature"] = temperature
+    if model.device == torch.device("cpu"):
+        options["fp16"] = False
+    return whisper.DecodingOptions(**options)
+
+
+def _split_segments(tokens, result, tokenizer, duration, time_precision):
+    """
+    Split the tokens of one decoded 30 s window into segments at pairs of timestamp
+    tokens, as whisper.transcribe does for its first window.
+
+    Returns:
+        list or None: Segments, or None if the window ends in an unfinished segment
+        (transcribe would seek back and decode again).
+    """
+    tokens = torch.tensor(tokens)
+    timestamp_tokens = tokens.ge(tokenizer.timestamp_begin)
+    single_timestamp_ending = timestamp_tokens[-2:].tolist() == [False, True]
+    consecutive = (torch.where(timestamp_tokens[:-1] & timestamp_tokens[1:])[0] + 1).tolist()
+
+    def new_segment(start, end, segment_tokens):
+        segment_tokens = segment_tokens.tolist()
+        return {
+            "seek": 0,
+            "start": start,
+            "end": end,
+            "text": tokenizer.decode([t for t in segment_tokens if t < tokenizer.eot]),
+            "tokens": segment_tokens,
+            "temperature": result.temperature,
+            "avg_logprob": result.avg_logprob,
+            "compression_ratio": result.compression_ratio,
+            "no_speech_prob": result.no_speech_prob,
+        }
+
+    if consecutive:
+        if not single_timestamp_ending:
+            return None
+        segments = []
+        last_slice = 0
+        for current_slice in consecutive + [len(tokens)]:
+            sliced = tokens[last_slice:current_slice]
+            if len(sliced) == 0:
+                continue
+            start = (sliced[0].item() - tokenizer.timestamp_begin) * time_precision
+            end = (sliced[-1].item() - tokenizer.timestamp_begin) * time_precision
+            segments.append(new_segment(start, end, sliced))
+            last_slice = current_slice
+        return segments
+    timestamps = tokens[timestamp_tokens.nonzero().flatten()]
+    if len(timestamps) > 0 and timestamps[-1].item() != tokenizer.timestamp_begin:
+        duration = (timestamps[-1].item() - tokenizer.timestamp_begin) * time_precision
+    return [new_segment(0.0, duration, tokens)]
+
+
+def _batched_decoding_supported(model):
+    """
+    True if the installed whisper has what transcribe_batch reproduces transcribe
+    with: models with num_languages and log_mel_spectrogram with n_mels and padding
+    (openai-whisper 20231106 or later).
+    """
+    parameters = inspect.signature(whisper.log_mel_spectrogram).parameters
+    return hasattr(model, "num_languages") and "n_mels" in parameters and "padding" in parameters
+
+
+def _clip_languages(model, mel_batch, language):
+    """
+    The language of each clip: the caller's, English for English-only models, or
+    detected from the clip's first 30 s as model.transcribe does.
+    """
+    if language is not None:
+        return [language] * len(mel_batch)
+    if not model.is_multilingual:
+        return ["en"] * len(mel_batch)
+    _, probs = model.detect_language(mel_batch)
+    return [max(p, key=p.get) for p in probs]
+
+
+def transcribe_batch(audios, word_timestamps=True):
+    """
+    Transcribe several 16 kHz mono float32 arrays with one batched decoder pass.
+
+    Clips of up to 30 s are padded into one mel batch and decoded together, then word
+    timestamps are added per clip, giving the same text and segments as
+    model.transcribe. Clips that transcribe would treat differently (longer than 30 s,
+    ending in an unfinished segment, or failing the temperature-fallback thresholds)
+    are transcribed one at a time with model.transcribe instead, as are all clips
+    with a whisper older than _batched_decoding_supported requires. Unless a language
+    is set in DECODE_OPTIONS, each clip's language is detected as in transcribe and
+    clips are decoded in one batch per language.
+
+    Args:
+        audios (list): 16 kHz mono float32 arrays.
+        word_timestamps (bool): Add word-level timestamps to the segments.
+
+    Returns:
+        list: (text, segments) per array.
+    """
+    from whisper.audio import N_FRAMES, N_SAMPLES, HOP_LENGTH, SAMPLE_RATE
+    from whisper.timing import add_word_timestamps
+    from whisper.tokenizer import get_tokenizer
+
+    options = _decoding_options(model)
+    input_stride = N_FRAMES // model.dims.n_audio_ctx
+    time_precision = input_stride * HOP_LENGTH / SAMPLE_RATE
+    dtype = torch.float16 if options.fp16 else torch.float32
+
+    results = [None] * len(audios)
+    batched = _batched_decoding_supported(model)
+    batch, mels, n_frames = [], [], []
+    for i, audio in enumerate(audios):
+        if len(audio) > N_SAMPLES or not batched:
+            continue
+        # same mel window as transcribe: log-mel with 30 s of padding, cut to content
+        mel = whisper.log_mel_spectrogram(audio, model.dims.n_mels, padding=N_SAMPLES)
+        content_frames = mel.shape[-1] - N_FRAMES
+        batch.append(i)
+        mels.append(whisper.pad_or_trim(mel[:, :content_frames], N_FRAMES))
+        n_frames.append(content_frames)
+    languages = []
+    if mels:
+        mel_batch = torch.stack(mels).to(model.device).to(dtype)
+        languages = _clip_languages(model, mel_batch, options.language)
+    compression_threshold = DECODE_OPTIONS.get("compression_ratio_threshold", 2.4)
+    logprob_threshold = DECODE_OPTIONS.get("logprob_threshold", -1.0)
+    no_speech_threshold = DECODE_OPTIONS.get("no_speech_threshold", 0.6)
+    fallback = isinstance(DECODE_OPTIONS.get("temperature"), (list, tuple)) or (
+        "temperature" not in DECODE_OPTIONS
+    )
+    for language in sorted(set(languages)):
+        group = [j for j, clip_language in enumerate(languages) if clip_language == language]
+        tokenizer = get_tokenizer(
+            model.is_multilingual,
+            num_languages=model.num_languages,
+            language=language,
+            task=options.task,
+        )
+        decoded = model.decode(
+            mel_batch[group], dataclasses.replace(options, language=language)
+        )
+        for j, result in zip(group, decoded):
+            i, mel, frames = batch[j], mel_batch[j], n_frames[j]
+            silent = (
+                no_speech_threshold is not None
+                and result.no_speech_prob > no_speech_threshold
+                and not (logprob_threshold is not None and result.avg_logprob > logprob_threshold)
+            )
+            if silent:
+                results[i] = ("", [])
+                continue
+            needs_fallback = fallback and (
+                (compression_threshold is not None and result.compression_ratio > compression_threshold)
+                or (logprob_threshold is not None and result.avg_logprob < logprob_threshold)
+            )
+            duration = frames * HOP_LENGTH / SAMPLE_RATE
+            segments = _split_segments(
+                result.tokens, result, tokenizer, duration, time_precision
+            )
+            if needs_fallback or segments is None:
+                continue
+            if word_timestamps:
+                add_word_timestamps(
+                    segments=segments,
+                    model=model,
+                    tokenizer=tokenizer,
+                    mel=mel,
+                    num_frames=frames,
+                    last_speech_timestamp=0.0,
+                )
+            for segment in segments:
+                if segment["start"] == segment["end"] or segment["text"].strip() == "":
+                    segment["text"] = ""
+                    segment["tokens"] = []
+                    segment["words"] = []
+            segments = [{"id": k, **segment} for k, segment in enumerate(segments)]
+            text = tokenizer.decode(
+                [t for segment in segments for t in segment["tokens"] if t < tokenizer.eot]
+            )
+            results[i] = (text, segments)
+    for i, audio in enumerate(audios):
+        if results[i] is None:
+            result = model.transcribe(audio, word_timestamps=word_timestamps, **DECODE_OPTIONS)
+            results[i] = (result["text"], result["segments"])
+    return results
+
+
+def transcribe_files(audio_paths, text_dir=None, align_dir=None, audios=None, batch_size=8):
+    """
+    Batched counterpart of transcribe_audio and align_audio: writes the same
+    <name>.txt and <name>.json files, skipping files that already have both.
+
+    Args:
+        audio_paths (list): Paths naming the outputs (and read when audios is None).
+        text_dir (str, optional): Transcript directory.
+        align_dir (str, optional): Alignment directory.
+        audios (list, optional): 16 kHz mono float32 arrays matching audio_paths.
+        batch_size (int): Number of files decoded together.
+
+    Returns:
+        list: (text path, alignment path) per file.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if text_dir is None:
+        text_dir = os.path.join(script_dir, "Text Files")
+    if align_dir is None:
+        align_dir = os.path.join(script_dir, "Alignment Files")
+    os.makedirs(text_dir, exist_ok=True)
+    os.makedirs(align_dir, exist_ok=True)
+    outputs = []
+    pending = []
+    for i, audio_path in enumerate(audio_paths):
+        filename = os.path.basename(audio_path).replace(".wav", "")
+        text_path = os.path.join(text_dir, filename + ".txt")
+        alignment_path = os.path.join(align_dir, filename + ".json")
+        outputs.append((text_path, alignment_path))
+        if not (os.path.exists(text_path) and os.path.exists(alignment_path)):
+            pending.append(i)
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start : start + batch_size]
+        batch_audio = [
+            whisper.load_audio(audio_paths[i]) if audios is None else audios[i]
+            for i in chunk
+        ]
+        for i, (text, segments) in zip(chunk, transcribe_batch(batch_audio)):
+            text_path, alignment_path = outputs[i]
+            with open(text_path, "w") as f:
+                f.write(text)
+            with open(alignment_path, "w", encoding="utf-8") as f:
+                json.dump(segments, f, ensure_ascii=False, indent=2)
+    return outputs
+
+
+def transcribe_audio(audio_path, text_dir=None, audio=None):
     """
     Transcribe audio, using existing transcription file if available.
+    audio_path names the output; pass audio (16 kHz mono float32 array) to skip
+    decoding the file again with ffmpeg.
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
     if text_dir is None:
@@ -23,16 +367,18 @@ def transcribe_audio(audio_path, text_dir=None):
     if os.path.exists(output_path):
         return output_path
 
-    transcribed_audio = model.transcribe(audio_path)
+    text = transcribe_text(audio_path if audio is None else audio)
     with open(output_path, "w") as f:
-        f.write(transcribed_audio["text"])
+        f.write(text)
     return output_path
 
 
-def align_audio(audio_path, align_dir=None):
+def align_audio(audio_path, align_dir=None, audio=None):
     """
     Align audio with word timestamps using whisper, saving to a JSON file.
     Uses existing alignment file if available.
+    audio_path names the output; pass audio (16 kHz mono float32 array) to skip
+    decoding the file again with ffmpeg.
     """
     script_dir = os.path.dirname(os.path.abspath(__file__))
     if align_dir is None:
@@ -44,8 +390,7 @@ def align_audio(audio_path, align_dir=None):
     if os.path.exists(output_path):
         return output_path
 
-    result = model.transcribe(audio_path, word_timestamps=True)
-    segments = result["segments"]
+    segments = transcribe_segments(audio_path if audio is None else audio)
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(segments, f, ensure_ascii=False, indent=2)
 
@@ -72,23 +417,93 @@ def avg_pause_duration(pauses):
     return sum(pauses) / len(pauses) if pauses else 0
 
 
-def adv_speech_metrics(filename):
+def word_timing_features(
+    segments, min_pause=WORD_PAUSE_SECONDS, long_pause=LONG_PAUSE_SECONDS
+):
+    """
+    Pause, rate and word-duration features from Whisper word timestamps alone.
+
+    Args:
+        segments (list): Segments with "words" as returned by transcribe_segments.
+        min_pause (float): Shortest gap between words counted as a pause (s).
+        long_pause (float): Gaps at least this long are counted as long pauses (s).
+
+    Returns:
+        dict: n_words, words_per_minute (over the span from the first word's start to the
+        last word's end), avg_pause_duration (s, pauses above 3 SD removed, as
+        audio_features.calculate_interword_pauses), pause_median, pause_std, pause_p90,
+        n_pauses, long_pause_count, pause_rate (pauses per minute), pause_ratio (share of
+        the span spent in pauses), word_duration_mean, word_duration_median and
+        word_duration_std (s). Undefined values are NaN.
+    """
+    words = [w for segment in segments for w in segment.get("words", [])]
+    starts = np.array([w["start"] for w in words], dtype=float)
+    ends = np.array([w["end"] for w in words], dtype=float)
+    gaps = np.array(calculate_interword_pauses(segments), dtype=float)
+    pauses = gaps[gaps >= min_pause]
+    span = ends[-1] - starts[0] if len(words) else 0.0
+    minutes = span / 60
+    trimmed = pauses
+    if len(pauses):
+        trimmed = pauses[pauses < pauses.mean() + 3 * pauses.std()]
+    durations = ends - starts
+    nan = float("nan")
+    return {
+        "n_words": len(words),
+        "words_per_minute": len(words) / minutes if minutes > 0 else nan,
+        "avg_pause_duration": float(trimmed.mean()) if len(trimmed) else 0.0,
+        "pause_median": float(np.median(pauses)) if len(pauses) else nan,
+        "pause_std": float(np.std(pauses)) if len(pauses) else nan,
+        "pause_p90": float(np.percentile(pauses, 90)) if len(pauses) else nan,
+        "n_pauses": len(pauses),
+        "long_pause_count": int(np.sum(pauses >= long_pause)),
+        "pause_rate": len(pauses) / minutes if minutes > 0 else nan,
+        "pause_ratio": float(pauses.sum() / span) if span > 0 else nan,
+        "word_duration_mean": float(durations.mean()) if len(words) else nan,
+        "word_duration_median": float(np.median(durations)) if len(words) else nan,
+        "word_duration_std": float(durations.std()) if len(words) else nan,
+    }
+
+
+def adv_speech_metrics(filename, window_seconds=None, analysis_sample_rate=None, fidelity="full"):
     """
        Calculate speech rate, articulation rate, and average syllable duration from an audio file.
 
        Parameters:
-           filename (str): Path to the audio file.
+           filename (str or parselmouth.Sound): Path to the audio file, or an already decoded Sound.
+           window_seconds (float, optional): If given, analyze the file in overlapping
+               windows of this length with bounded memory (see windowed_analysis); needs
+               a path, no analysis_sample_rate and fidelity="full".
+           analysis_sample_rate (float, optional): Resample once to this rate before analysis.
+           fidelity (str, optional): "full" or "fast" (see audio_features.FIDELITY_PRESETS);
+               analysis_sample_rate, if given, overrides the tier's rate.
 
        Returns:
            dict: A dictionary containing the calculated speech metrics.
     from ANNAFAVARO/PARKCELEB
 
     """
+    if window_seconds is not None:
+        from feature_calculation import windowed_analysis
 
+        windowed_analysis.check_options(
+            filename,
+            analysis_sample_rate=(analysis_sample_rate, None),
+            fidelity=(fidelity, "full"),
+        )
+        return windowed_analysis.windowed_speech_metrics(filename, window_seconds)
+
+    from feature_calculation.audio_features import FIDELITY_PRESETS
+
+    settings = FIDELITY_PRESETS[fidelity]
+    if analysis_sample_rate is None:
+        analysis_sample_rate = settings["analysis_sample_rate"]
     silencedb = -25
     mindip = 2
     minpause = 0.1
-    sound = parselmouth.Sound(filename)
+    sound = filename if isinstance(filename, parselmouth.Sound) else parselmouth.Sound(filename)
+    if analysis_sample_rate is not None and sound.sampling_frequency > analysis_sample_rate:
+        sound = sound.resample(analysis_sample_rate)
     originaldur = sound.get_total_duration()
     intensity = sound.to_intensity(50)
     start = call(intensity, "Get time from frame number", 1)
@@ -177,7 +592,9 @@ def adv_speech_metrics(filename):
         currentint = call(intensity, "Get value at time", timepeaks[following], "Cubic")
 
     # Look for only voiced parts
-    pitch = sound.to_pitch_ac(0.02, 30, 4, False, 0.03, 0.25, 0.01, 0.35, 0.25, 450)
+    pitch = sound.to_pitch_ac(
+        settings["speech_pitch_time_step"], 30, 4, False, 0.03, 0.25, 0.01, 0.35, 0.25, 450
+    )
     voicedcount = 0
     voicedpeak = []
 
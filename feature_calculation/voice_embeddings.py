@@ -37,18 +37,21 @@ def get_embeddings(audio_path, aggregation="mean"):
         raise ValueError("Invalid aggregation method")
 
 
-def create_embedding_df(audio_dir, aggregation="mean"):
+def create_embedding_df(audio_dir, aggregation="mean", audio_files=None):
     """
     Given an audio directory, that are preprocessed
     (requires 'preprocessed' in filename), return a dataframe of the Whisper embeddings
     audio_dir: directory of the audio files
     aggregation: method of aggregation, default is mean
+    audio_files: explicit list of files (e.g. from corpus_manifest.select_files),
+    skips listing audio_dir
     """
-    audio_files = [
-        os.path.join(audio_dir, f)
-        for f in os.listdir(audio_dir)
-        if f.endswith(".wav") and "preprocessed" in f
-    ]
+    if audio_files is None:
+        audio_files = [
+            os.path.join(audio_dir, f)
+            for f in os.listdir(audio_dir)
+            if f.endswith(".wav") and "preprocessed" in f
+        ]
     embeddings = [get_embeddings(audio_file, aggregation) for audio_file in audio_files]
     df = pd.DataFrame(
         embeddings, columns=[f"embedding_{i}" for i in range(len(embeddings[0]))]
@@ -0,0 +1,100 @@
+"""
+Vowel-space metrics on NumPy arrays of (F1, F2) frames.
+
+The hull area is taken over cluster centers in Hz. When the formant outliers were
+removed with the Gaussian Mixture Model, its components are reused as the vowel
+clusters, so no second clustering is fitted; otherwise a single KMeans is fitted.
+"""
+import numpy as np
+from scipy.spatial import ConvexHull
+from sklearn.cluster import KMeans
+from sklearn.mixture import GaussianMixture
+from feature_calculation import audio_features
+
+# GMM components holding fewer frames than this fraction are not vowel targets
+MIN_COMPONENT_FRACTION = 0.02
+# share of highest-density frames spanning the density-weighted vowel space
+DENSITY_QUANTILE = 0.5
+
+
+def hull_area(points):
+    """
+    Area of the convex hull of 2D points, or NaN with fewer than 3 points.
+    """
+    if len(points) < 3:
+        return np.nan
+    # in 2D ConvexHull.volume is the area
+    return ConvexHull(points).volume
+
+
+def cluster_centers(hz, labels, min_fraction=0.0):
+    """
+    Mean Hz position of each cluster.
+
+    Args:
+        hz (numpy.ndarray): (n_frames, 2) array of F1, F2 in Hz.
+        labels (numpy.ndarray): Cluster label per frame.
+        min_fraction (float): Clusters with fewer frames than this fraction are dropped.
+
+    Returns:
+        numpy.ndarray: (n_clusters, 2) array of centers.
+    """
+    unique, counts = np.unique(labels, return_counts=True)
+    keep = unique[counts >= min_fraction * len(labels)]
+    return np.array([hz[labels == k].mean(axis=0) for k in keep])
+
+
+def kmeans_centers(hz, n_clusters=8):
+    """
+    Centers of one KMeans fit in Hz, as in audio_features.calculate_hull_area.
+    """
+    kmeans = KMeans(n_clusters=n_clusters, random_state=0, n_init="auto")
+    kmeans.fit(hz)
+    return kmeans.cluster_centers_, kmeans
+
+
+def density_weighted_vsa(hz, density, quantile=DENSITY_QUANTILE):
+    """
+    Density-weighted vowel space area: hull area of the frames whose density is in
+    the top (1 - quantile) share, which discards transitions between vowel targets.
+
+    Args:
+        hz (numpy.ndarray): (n_frames, 2) array of F1, F2 in Hz.
+        density (numpy.ndarray): Density (or log-density) estimate per frame.
+        quantile (float): Density quantile below which frames are ignored.
+
+    Returns:
+        float: The area in Hz^2.
+    """
+    return hull_area(hz[density >= np.quantile(density, quantile)])
+
+
+def vowel_space_metrics(hz, bark=None, model=None):
+    """
+    Compute AAVS, hull area and density-weighted VSA for one recording.
+
+    Args:
+        hz (numpy.ndarray): (n_frames, 2) inlying F1, F2 frames in Hz.
+        bark (numpy.ndarray, optional): The same frames in Bark, required to reuse a GMM.
+        model (optional): Outlier model returned by generate_formant_data(return_model=True).
+            A GaussianMixture is reused for the clusters and the density; anything else
+            falls back to one KMeans fit.
+
+    Returns:
+        dict: aavs, hull_area (hz^2), vsa_density (hz^2) and n_clusters.
+    """
+    hz = np.asarray(hz, dtype=float)
+    if isinstance(model, GaussianMixture) and bark is not None:
+        bark = np.asarray(bark, dtype=float)
+        centers = cluster_centers(hz, model.predict(bark), MIN_COMPONENT_FRACTION)
+        density = model.score_samples(bark)
+    else:
+        centers, kmeans = kmeans_centers(hz)
+        # closeness to the assigned centroid stands in for density
+        density = -np.min(kmeans.transform(hz), axis=1)
+    return {
+        "aavs": audio_features.calculate_aavs(hz),
+        "hull_area": hull_area(centers),
+        "vsa_density": density_weighted_vsa(hz, density),
+        "n_clusters": len(centers),
+    }
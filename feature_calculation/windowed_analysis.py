@@ -0,0 +1,434 @@
+"""
+Bounded-memory analysis of long recordings.
+
+The file is read in windows of window_seconds with overlap_seconds of context on
+each side. Every window is analyzed by Praat, but only the frames whose time falls
+inside the window's core [core_start, core_end) are kept, so no frame is counted
+twice and each frame is computed with (nearly) the same context as in whole-file
+analysis. Per-window features are emitted as soon as a window is done and global
+statistics are merged from running accumulators, so memory stays constant in the
+recording length (formant frames, which are needed for outlier removal, are the
+only per-frame data kept: ~24 bytes per 6.25 ms frame).
+
+Tolerance against whole-file analysis (with the default 2 s overlap):
+    - mean / std / min / max of F0, intensity and HNR frames: identical up to frames
+      within a few analysis windows of a core boundary, in practice < 0.5 % relative.
+      Pitch path finding is global in Praat, so octave decisions may differ at
+      boundaries.
+    - medians and the 0.99 intensity quantile: within one histogram bin
+      (0.5 Hz for F0, 0.01 dB for intensity and HNR).
+    - HNR min / max: frame extrema without Praat's parabolic interpolation (< 0.5 dB).
+    - pauses and speaking time: identical up to one intensity frame (10 ms) per core
+      boundary, as long as the overlap exceeds the longest pause crossing a boundary.
+    - syllable counts: within +/- 1 per core boundary.
+    - phonation time (the span of the intensity frames): within one frame per core
+      boundary.
+Jitter, shimmer, PPE and CPP depend on the whole period sequence and are only
+available from whole-file analysis.
+"""
+import os
+import numpy as np
+import pandas as pd
+import parselmouth
+import soundfile as sf
+from parselmouth.praat import call
+from feature_calculation import audio_features
+
+DEFAULT_WINDOW_SECONDS = 30.0
+DEFAULT_OVERLAP_SECONDS = 2.0
+
+
+class RunningStats:
+    """
+    Mergeable running statistics with constant memory.
+
+    Mean and variance are merged exactly (Chan et al.), minimum and maximum are
+    tracked directly and quantiles are read from a fixed-bin histogram, so their
+    error is bounded by the bin width (high - low) / bins.
+    """
+
+    def __init__(self, low, high, bins):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self.edges = np.linspace(low, high, bins + 1)
+        self.hist = np.zeros(bins, dtype=np.int64)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        n = len(values)
+        if n == 0:
+            return
+        mean = values.mean()
+        m2 = np.sum((values - mean) ** 2)
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta**2 * self.count * n / total
+        self.count = total
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        clipped = np.clip(values, self.edges[0], self.edges[-1])
+        self.hist += np.histogram(clipped, bins=self.edges)[0]
+
+    def merge(self, other):
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta**2 * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.hist += other.hist
+
+    @property
+    def std(self):
+        # population standard deviation, as np.std
+        return np.sqrt(self.m2 / self.count) if self.count else np.nan
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        cumulative = np.cumsum(self.hist)
+        target = q * self.count
+        i = int(np.searchsorted(cumulative, target))
+        i = min(i, len(self.hist) - 1)
+        below = cumulative[i - 1] if i > 0 else 0
+        fraction = (target - below) / self.hist[i] if self.hist[i] else 0.0
+        value = self.edges[i] + fraction * (self.edges[i + 1] - self.edges[i])
+        return float(np.clip(value, self.min, self.max))
+
+    def summary(self):
+        """
+        Returns:
+            list: [mean, median, std, min, max], the order used by calculate_fundamental_frequency.
+        """
+        if self.count == 0:
+            return [np.nan] * 5
+        return [self.mean, self.quantile(0.5), self.std, self.min, self.max]
+
+
+def f0_stats():
+    return RunningStats(0, 1000, 2000)
+
+
+def intensity_stats():
+    return RunningStats(-50, 150, 20000)
+
+
+def harmonicity_stats():
+    return RunningStats(-50, 100, 15000)
+
+
+def iter_windows(audio_path, window_seconds=DEFAULT_WINDOW_SECONDS, overlap_seconds=DEFAULT_OVERLAP_SECONDS):
+    """
+    Read an audio file window by window.
+
+    Args:
+        audio_path (str): Path to the audio file.
+        window_seconds (float): Length of each window's core.
+        overlap_seconds (float): Context read on both sides of the core.
+
+    Yields:
+        tuple: (parselmouth.Sound with absolute start time, core_start, core_end) in seconds.
+    """
+    with sf.SoundFile(audio_path) as f:
+        sr = f.samplerate
+        n = f.frames
+        hop = int(round(window_seconds * sr))
+        pad = int(round(overlap_seconds * sr))
+        boundaries = list(range(0, n, hop)) + [n]
+        # fold a short tail into the last window so Praat never sees a tiny core
+        if len(boundaries) > 2 and boundaries[-1] - boundaries[-2] < pad:
+            del boundaries[-2]
+        for core_start, core_end in zip(boundaries[:-1], boundaries[1:]):
+            start = max(0, core_start - pad)
+            end = min(n, core_end + pad)
+            f.seek(start)
+            samples = f.read(end - start, dtype="float64", always_2d=True).mean(axis=1)
+            sound = parselmouth.Sound(samples, sampling_frequency=sr, start_time=start / sr)
+            yield sound, core_start / sr, core_end / sr
+
+
+def check_options(audio_path, **options):
+    """
+    Reject what the windowed path cannot honor: it reads the file itself with
+    soundfile, so it needs a path, and it analyzes with the full-fidelity defaults.
+
+    Args:
+        audio_path: The input passed with window_seconds.
+        options: Option name -> (value, the only value the windowed path supports).
+
+    Raises:
+        TypeError: If audio_path is not a file path.
+        ValueError: Listing the unsupported options.
+    """
+    if not isinstance(audio_path, (str, os.PathLike)):
+        raise TypeError(
+            f"window_seconds needs an audio file path, not {type(audio_path).__name__}"
+        )
+    unsupported = [
+        f"{name}={value!r}" for name, (value, supported) in options.items() if value != supported
+    ]
+    if unsupported:
+        raise ValueError(f"window_seconds does not support {', '.join(unsupported)}")
+
+
+def _in_core(times, core_start, core_end):
+    return (times >= core_start) & (times < core_end)
+
+
+def _intervals(textgrid, label):
+    """
+    Return the (start, end) times of all intervals with the given label on tier 1.
+    """
+    tier = call(textgrid, "Extract tier", 1)
+    try:
+        table = call(tier, "Down to TableOfReal", label)
+    except parselmouth.PraatError:
+        return []
+    n = call(table, "Get number of rows")
+    return [(call(table, "Get value", i + 1, 1), call(table, "Get value", i + 1, 2)) for i in range(n)]
+
+
+def _append_clipped(merged, intervals, core_start, core_end):
+    """
+    Clip intervals to the core and append them, joining intervals that were split at
+    the previous core boundary.
+    """
+    for start, end in intervals:
+        start, end = max(start, core_start), min(end, core_end)
+        if end <= start:
+            continue
+        if merged and abs(merged[-1][1] - start) < 1e-9:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+
+
+def global_intensity_stats(audio_path, window_seconds=DEFAULT_WINDOW_SECONDS, overlap_seconds=DEFAULT_OVERLAP_SECONDS):
+    """
+    First pass: running statistics of the 50 Hz intensity contour used for silence thresholds.
+    """
+    stats = intensity_stats()
+    for sound, core_start, core_end in iter_windows(audio_path, window_seconds, overlap_seconds):
+        intensity = sound.to_intensity(50)
+        stats.update(intensity.values[0][_in_core(intensity.xs(), core_start, core_end)])
+    return stats
+
+
+def _silence_textgrid(intensity, absolute_threshold, min_silent, min_sounding):
+    # "To TextGrid (silences)" takes the threshold relative to the object's own maximum
+    relative_threshold = absolute_threshold - call(intensity, "Get maximum", 0, 0, "Parabolic")
+    return call(
+        intensity,
+        "To TextGrid (silences)",
+        relative_threshold,
+        min_silent,
+        min_sounding,
+        "silent",
+        "sounding",
+    )
+
+
+def windowed_audio_features(
+    audio_path,
+    window_seconds=DEFAULT_WINDOW_SECONDS,
+    overlap_seconds=DEFAULT_OVERLAP_SECONDS,
+    silencedb=audio_features.DEFAULT_SILENCE_DB,
+    min_pause=audio_features.DEFAULT_MIN_PAUSE_SECONDS,
+    silence_threshold=audio_features.DEFAULT_SILENCE_THRESHOLD,
+    on_window=None,
+):
+    """
+    Windowed counterpart of audio_features.calculate_audio_features.
+
+    Args:
+        audio_path (str): Path to the audio file.
+        window_seconds (float): Length of each window's core.
+        overlap_seconds (float): Context read on both sides of the core.
+        silencedb, min_pause, silence_threshold: As in calculate_interword_pauses.
+        on_window (callable, optional): Called with each window's feature dict as soon
+            as the window has been analyzed.
+
+    Returns:
+        dict: fundamental_frequency and intensity as [mean, median, std, min, max],
+        harmonicity as [mean, std, min, max], avg_pause_duration and a "windows"
+        DataFrame with one row per window.
+    """
+    loudness = global_intensity_stats(audio_path, window_seconds, overlap_seconds)
+    # same threshold as calculate_interword_pauses: silencedb below the 0.99 quantile
+    silence_level = loudness.quantile(0.99) + silencedb
+    f0 = f0_stats()
+    inten = intensity_stats()
+    hnr = harmonicity_stats()
+    pauses = []
+    windows = []
+    for sound, core_start, core_end in iter_windows(audio_path, window_seconds, overlap_seconds):
+        pitch = sound.to_pitch()
+        frequencies = pitch.selected_array["frequency"][_in_core(pitch.xs(), core_start, core_end)]
+        voiced = frequencies[frequencies > 0]
+        intensity = sound.to_intensity()
+        intensity_values = intensity.values[0][_in_core(intensity.xs(), core_start, core_end)]
+        harmonicity = call(sound, "To Harmonicity (cc)", 0.01, 75, 0.1, 1.0)
+        hnr_values = harmonicity.values[0][_in_core(harmonicity.xs(), core_start, core_end)]
+        # Praat's harmonicity statistics ignore unvoiced frames (-200 dB)
+        hnr_values = hnr_values[hnr_values > -200]
+        textgrid = _silence_textgrid(sound.to_intensity(50), silence_level, min_pause, silence_threshold)
+        n_before = len(pauses)
+        _append_clipped(pauses, _intervals(textgrid, "silent"), core_start, core_end)
+
+        f0.update(voiced)
+        inten.update(intensity_values)
+        hnr.update(hnr_values)
+        window = {
+            "start": core_start,
+            "end": core_end,
+            "f0_mean": np.mean(voiced) if len(voiced) else np.nan,
+            "f0_median": np.median(voiced) if len(voiced) else np.nan,
+            "f0_std": np.std(voiced) if len(voiced) else np.nan,
+            "intensity_mean": np.mean(intensity_values) if len(intensity_values) else np.nan,
+            "harmonicity_mean": np.mean(hnr_values) if len(hnr_values) else np.nan,
+            "n_pauses": len(pauses) - n_before,
+        }
+        windows.append(window)
+        if on_window is not None:
+            on_window(window)
+
+    durations = [end - start for start, end in pauses]
+    if durations:
+        # Remove extreme outliers (> 3 SD), as calculate_interword_pauses does
+        durations = [p for p in durations if p < np.mean(durations) + 3 * np.std(durations)]
+    hnr_summary = hnr.summary()
+    return {
+        "fundamental_frequency": f0.summary(),
+        "intensity": inten.summary(),
+        "harmonicity": [hnr_summary[0], hnr_summary[2], hnr_summary[3], hnr_summary[4]],
+        "avg_pause_duration": float(np.mean(durations)) if durations else 0.0,
+        "windows": pd.DataFrame(windows),
+    }
+
+
+def windowed_speech_metrics(
+    audio_path,
+    window_seconds=DEFAULT_WINDOW_SECONDS,
+    overlap_seconds=DEFAULT_OVERLAP_SECONDS,
+    silencedb=-25,
+    mindip=2,
+    minpause=0.1,
+    on_window=None,
+):
+    """
+    Windowed counterpart of transcription_functions.adv_speech_metrics.
+
+    Intensity thresholds are taken from a first pass over the whole file, so they are
+    the same as in whole-file analysis. Syllable nuclei are intensity peaks above the
+    threshold whose following dip exceeds mindip and which fall in a voiced, sounding
+    stretch; the dip between the last peak of one window and the first of the next is
+    measured on the part of the contour visible in the later window.
+
+    Returns:
+        dict: The keys returned by adv_speech_metrics, plus a "windows" DataFrame.
+    """
+    loudness = global_intensity_stats(audio_path, window_seconds, overlap_seconds)
+    max_99_intensity = loudness.quantile(0.99)
+    threshold = max(max_99_intensity + silencedb, loudness.min)
+    silence_level = max_99_intensity + silencedb
+
+    sounding = []
+    windows = []
+    voicedcount = 0
+    pending = None  # (time, intensity, voiced) of the last peak, not yet validated
+    duration = 0.0
+    # adv_speech_metrics' phonation time is the span of the intensity frames
+    phonation_time = 0.0
+    for sound, core_start, core_end in iter_windows(audio_path, window_seconds, overlap_seconds):
+        duration = max(duration, sound.xmax)
+        intensity = sound.to_intensity(50)
+        phonation_time += np.count_nonzero(_in_core(intensity.xs(), core_start, core_end)) * intensity.time_step
+        textgrid = _silence_textgrid(intensity, silence_level, minpause, 0.1)
+        n_before = len(sounding)
+        _append_clipped(sounding, _intervals(textgrid, "sounding"), core_start, core_end)
+
+        intensity_matrix = call(intensity, "Down to Matrix")
+        sound_from_intensity_matrix = call(intensity_matrix, "To Sound (slice)", 1)
+        point_process = call(
+            sound_from_intensity_matrix, "To PointProcess (extrema)", "Left", "yes", "no", "Sinc70"
+        )
+        numpeaks = call(point_process, "Get number of points")
+        pitch = sound.to_pitch_ac(0.02, 30, 4, False, 0.03, 0.25, 0.01, 0.35, 0.25, 450)
+        peaks = [] if pending is None else [pending]
+        for i in range(numpeaks):
+            t = call(point_process, "Get time from index", i + 1)
+            if not core_start <= t < core_end:
+                continue
+            value = call(sound_from_intensity_matrix, "Get value at time", t, "Cubic")
+            if value > threshold:
+                interval = call(textgrid, "Get interval at time", 1, t)
+                label = call(textgrid, "Get label of interval", 1, interval)
+                voiced = label == "sounding" and not np.isnan(pitch.get_value_at_time(t))
+                peaks.append((t, value, voiced))
+
+        window_syllables = 0
+        for (t, value, voiced), (next_t, _, _) in zip(peaks[:-1], peaks[1:]):
+            dip = call(intensity, "Get minimum", max(t, intensity.xmin), next_t, "None")
+            if abs(value - dip) > mindip and voiced:
+                window_syllables += 1
+        voicedcount += window_syllables
+        if peaks:
+            t, _, voiced = peaks[-1]
+            # as in adv_speech_metrics, later peaks use the contour value at the peak
+            pending = (t, call(intensity, "Get value at time", t, "Cubic"), voiced)
+
+        window = {
+            "start": core_start,
+            "end": core_end,
+            "nsyll": window_syllables,
+            "speakingtime(s)": sum(e - s for s, e in sounding[n_before:]),
+        }
+        windows.append(window)
+        if on_window is not None:
+            on_window(window)
+
+    speakingtot = sum(end - start for start, end in sounding)
+    return {
+        "tot_name": audio_path,
+        "nsyll": voicedcount,
+        "npause": len(sounding) - 1,
+        "dur(s)": duration,
+        "phonationtime(s)": phonation_time,
+        "speechrate(nsyll / dur)": voicedcount / duration,
+        "articulation_rate(nsyll/phonationtime)": voicedcount / speakingtot if speakingtot else 0,
+        "average_syllable_dur(speakingtime/nsyll)": speakingtot / voicedcount if voicedcount else 0,
+        "windows": pd.DataFrame(windows),
+    }
+
+
+def windowed_formant_data(
+    audio_path,
+    window_seconds=DEFAULT_WINDOW_SECONDS,
+    overlap_seconds=DEFAULT_OVERLAP_SECONDS,
+    outlier_method="gmm",
+    return_model=False,
+):
+    """
+    Windowed counterpart of audio_features.generate_formant_data. Formant frames are
+    collected per window and the outlier model is fitted once on all frames.
+    """
+    frames = []
+    for sound, core_start, core_end in iter_windows(audio_path, window_seconds, overlap_seconds):
+        formant = sound.to_formant_burg()
+        times = np.asarray(formant.xs())
+        times = times[_in_core(times, core_start, core_end)]
+        f1 = [formant.get_value_at_time(1, t) for t in times]
+        f2 = [formant.get_value_at_time(2, t) for t in times]
+        frames.append(pd.DataFrame({"Time(s)": times, "F1(Hz)": f1, "F2(Hz)": f2}))
+    raw_formant_df = pd.concat(frames, ignore_index=True)
+    return audio_features.filter_formant_outliers(
+        raw_formant_df, method=outlier_method, return_model=return_model
+    )
@@ -0,0 +1,346 @@
+"""
+Coordinator-free work queue for running build_csv on several machines that share
+a results directory (e.g. over NFS). Every process claims audio files by creating
+a lease file with O_CREAT | O_EXCL, writes one JSON result per file and the final
+CSV is assembled from those results by merge_results.
+"""
+import os
+import json
+import time
+import random
+import socket
+import argparse
+import threading
+import pandas as pd
+from feature_calculation import columnar_io
+
+LEASE_DIR = "Leases"
+METRICS_DIR = "Metrics"
+MERGE_LEASE = "merge.lease"
+DEFAULT_LEASE_TIMEOUT = 1800  # seconds without a heartbeat before a lease is stale
+DEFAULT_HEARTBEAT_INTERVAL = 60  # seconds between lease refreshes
+DEFAULT_POLL_INTERVAL = 30  # seconds between passes while other nodes hold leases
+# seconds between taking over a stale lease and reading it back; a competing node
+# that saw the same stale lease has replaced it by then
+CLAIM_SETTLE_SECONDS = 1.0
+# result key of files whose processing raised (as build_biomarker_csv.ERROR_COLUMN)
+ERROR_KEY = "error"
+
+
+def file_key(audio_path):
+    """
+    Return the key used for lease and result files of an audio file.
+
+    Args:
+        audio_path (str): Path to the audio file.
+
+    Returns:
+        str: The file name without directory and extension.
+    """
+    return os.path.splitext(os.path.basename(audio_path))[0]
+
+
+def worker_id():
+    """
+    Return an identifier that is unique across hosts and processes.
+    """
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def lease_path(results_dir, audio_path):
+    return os.path.join(results_dir, LEASE_DIR, file_key(audio_path) + ".lease")
+
+
+def result_path(results_dir, audio_path):
+    return os.path.join(results_dir, METRICS_DIR, file_key(audio_path) + ".json")
+
+
+def _is_stale(path, lease_timeout):
+    try:
+        return time.time() - os.stat(path).st_mtime > lease_timeout
+    except FileNotFoundError:
+        return False
+
+
+def _owner(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("owner")
+    except (FileNotFoundError, ValueError):
+        # missing, or created but not yet written
+        return None
+
+
+def try_claim(path, owner, lease_timeout=DEFAULT_LEASE_TIMEOUT):
+    """
+    Atomically claim a lease file.
+
+    A lease whose mtime is older than lease_timeout belongs to a crashed node. It is
+    taken over by writing a uniquely named lease and moving it over the stale one
+    with os.replace; live leases are never moved. Nodes racing for the same stale
+    lease all replace it, and after CLAIM_SETTLE_SECONDS only the one whose owner is
+    read back holds it.
+
+    Args:
+        path (str): Path to the lease file.
+        owner (str): Identifier written into the lease.
+        lease_timeout (float): Age in seconds after which a lease is considered stale.
+
+    Returns:
+        bool: True if the lease is now held by owner.
+    """
+    lease = {"owner": owner, "claimed": time.time()}
+    try:
+        fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        if not _is_stale(path, lease_timeout):
+            return False
+        tmp_path = f"{path}.claim-{owner}"
+        with open(tmp_path, "w") as f:
+            json.dump(lease, f)
+        if not _is_stale(path, lease_timeout):
+            # re-claimed (or refreshed) since we looked
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+        time.sleep(CLAIM_SETTLE_SECONDS)
+        return _owner(path) == owner
+    with os.fdopen(fd, "w") as f:
+        json.dump(lease, f)
+    return True
+
+
+def release(path, owner=None):
+    """
+    Remove a lease; with owner, only if it is still held by owner.
+    """
+    if owner is not None and _owner(path) != owner:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class _Heartbeat:
+    """
+    Refresh the mtime of a lease in a background thread while a file is processed.
+    """
+
+    def __init__(self, path, interval=DEFAULT_HEARTBEAT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def write_result(results_dir, audio_path, metrics):
+    """
+    Atomically write the metrics of one file. A None result (skipped file) is
+    recorded as well so that no node picks the file up again.
+    """
+    path = result_path(results_dir, audio_path)
+    tmp_path = f"{path}.tmp-{worker_id()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, default=float)
+    os.replace(tmp_path, path)
+
+
+def is_done(results_dir, audio_path):
+    return os.path.exists(result_path(results_dir, audio_path))
+
+
+def claim_and_process(
+    audio_path,
+    results_dir,
+    process_fn,
+    lease_timeout=DEFAULT_LEASE_TIMEOUT,
+    heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL,
+):
+    """
+    Claim a single audio file, process it and write its result.
+
+    Args:
+        audio_path (str): Path to the audio file.
+        results_dir (str): Shared results directory.
+        process_fn (callable): Called as process_fn(audio_path, results_dir).
+        lease_timeout (float): Age in seconds after which a lease is considered stale.
+        heartbeat_interval (float): Seconds between lease refreshes.
+
+    A file whose processing raises gets a result with the error under ERROR_KEY,
+    so it does not stop this node or every node that claims it after its lease expires.
+
+    Returns:
+        bool: True if this process handled the file, False if it was done or claimed elsewhere.
+    """
+    if is_done(results_dir, audio_path):
+        return False
+    path = lease_path(results_dir, audio_path)
+    owner = worker_id()
+    if not try_claim(path, owner, lease_timeout):
+        return False
+    try:
+        # Re-check after claiming: the previous owner may have finished just before expiring.
+        if is_done(results_dir, audio_path):
+            return False
+        with _Heartbeat(path, heartbeat_interval):
+            try:
+                metrics = process_fn(audio_path, results_dir)
+            except Exception as e:
+                print(f"Error processing {audio_path}: {e}")
+                metrics = {"filename": file_key(audio_path), ERROR_KEY: f"{type(e).__name__}: {e}"}
+        write_result(results_dir, audio_path, metrics)
+        return True
+    finally:
+        release(path, owner)
+
+
+def run_worker(
+    audio_files,
+    results_dir,
+    process_fn,
+    pool=None,
+    lease_timeout=DEFAULT_LEASE_TIMEOUT,
+    heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL,
+    poll_interval=DEFAULT_POLL_INTERVAL,
+):
+    """
+    Process audio files until every file has a result, cooperating with any number
+    of other run_worker calls on the same results directory.
+
+    Args:
+        audio_files (list): Paths to the audio files of the whole cohort.
+        results_dir (str): Shared results directory.
+        process_fn (callable): Called as process_fn(audio_path, results_dir); must be picklable.
+        pool (multiprocessing.Pool, optional): Pool used to process files on this host.
+        lease_timeout (float): Age in seconds after which a lease is considered stale.
+        heartbeat_interval (float): Seconds between lease refreshes.
+        poll_interval (float): Seconds to wait while the remaining files are leased elsewhere.
+
+    Returns:
+        int: Number of files processed by this call.
+    """
+    for d in [LEASE_DIR, METRICS_DIR]:
+        os.makedirs(os.path.join(results_dir, d), exist_ok=True)
+    task = _ClaimTask(results_dir, process_fn, lease_timeout, heartbeat_interval)
+    processed = 0
+    while True:
+        pending = [f for f in audio_files if not is_done(results_dir, f)]
+        if not pending:
+            return processed
+        # Shuffle so that nodes starting together do not contend for the same files.
+        random.shuffle(pending)
+        if pool is None:
+            handled = [task(f) for f in pending]
+        else:
+            handled = list(pool.imap_unordered(task, pending))
+        processed += sum(handled)
+        if not any(handled):
+            time.sleep(poll_interval)
+
+
+class _ClaimTask:
+    """
+    Picklable wrapper so claim_and_process can be mapped over a multiprocessing pool.
+    """
+
+    def __init__(self, results_dir, process_fn, lease_timeout, heartbeat_interval):
+        self.results_dir = results_dir
+        self.process_fn = process_fn
+        self.lease_timeout = lease_timeout
+        self.heartbeat_interval = heartbeat_interval
+
+    def __call__(self, audio_path):
+        return claim_and_process(
+            audio_path,
+            self.results_dir,
+            self.process_fn,
+            self.lease_timeout,
+            self.heartbeat_interval,
+        )
+
+
+def load_results(results_dir):
+    """
+    Load all per-file results written to the Metrics subfolder.
+
+    Returns:
+        dict: Mapping of filename to metrics dict, skipped files excluded.
+    """
+    metrics_dir = os.path.join(results_dir, METRICS_DIR)
+    all_metrics = {}
+    for f in sorted(os.listdir(metrics_dir)):
+        if not f.endswith(".json"):
+            continue
+        with open(os.path.join(metrics_dir, f), "r", encoding="utf-8") as fh:
+            r = json.load(fh)
+        if r:
+            all_metrics[r["filename"]] = r
+    return all_metrics
+
+
+def merge_results(results_dir, csv_path, partition_cols=None, labels=None):
+    """
+    Assemble the per-file results into the final CSV (or Parquet, see
+    columnar_io.write_metrics). Safe to call from every node: single-file outputs are
+    written to a temporary file and moved into place atomically, and a partitioned
+    dataset is written by whichever node holds the merge lease (writes replace
+    matching partitions, so a later node rewriting it does not duplicate rows).
+
+    Returns:
+        pandas.DataFrame or None: The merged metrics, or None if nothing was processed.
+    """
+    all_metrics = load_results(results_dir)
+    if not all_metrics:
+        return None
+    df = pd.DataFrame.from_dict(all_metrics, orient="index").reset_index(drop=True)
+    df = columnar_io.add_labels(df, labels)
+    if partition_cols:
+        path = os.path.join(results_dir, LEASE_DIR, MERGE_LEASE)
+        owner = worker_id()
+        if try_claim(path, owner):
+            try:
+                columnar_io.write_metrics(df, csv_path, partition_cols=partition_cols)
+            finally:
+                release(path, owner)
+        return df
+    root, ext = os.path.splitext(csv_path)
+    tmp_path = f"{root}.tmp-{worker_id()}{ext}"
+    columnar_io.write_metrics(df, tmp_path)
+    os.replace(tmp_path, csv_path)
+    return df
+
+
+if __name__ == "__main__":
+    # Start this several times (on one or many hosts) to test the distributed mode:
+    # python -m feature_calculation.work_queue out.csv --audio-dir "Audio Files" --results-dir /shared/Results-
+    from feature_calculation import build_biomarker_csv
+
+    parser = argparse.ArgumentParser(description="Distributed build_csv worker")
+    parser.add_argument("csv_path")
+    parser.add_argument("--audio-dir", default=None)
+    parser.add_argument("--results-dir", default=None)
+    parser.add_argument("--lease-timeout", type=float, default=DEFAULT_LEASE_TIMEOUT)
+    args = parser.parse_args()
+    build_biomarker_csv.build_csv(
+        args.csv_path,
+        audio_dir=args.audio_dir,
+        results_dir=args.results_dir,
+        distributed=True,
+        lease_timeout=args.lease_timeout,
+    )
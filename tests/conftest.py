@@ -0,0 +1,21 @@
+import os
+import sys
+import glob
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIO_DIR = os.path.join(ROOT, "Audio Files")
+
+# the packages live at the repository root, next to the notebooks
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def audio_files():
+    """
+    The bundled recordings in "Audio Files".
+    """
+    files = sorted(glob.glob(os.path.join(AUDIO_DIR, "*.wav")))
+    if not files:
+        pytest.skip("no bundled audio files")
+    return files
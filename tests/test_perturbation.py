@@ -0,0 +1,25 @@
+import pytest
+
+parselmouth = pytest.importorskip("parselmouth")
+audio_features = pytest.importorskip("feature_calculation.audio_features")
+import numpy as np  # noqa: E402
+from feature_calculation import perturbation  # noqa: E402
+
+
+def test_measures_match_praat(audio_files):
+    for audio_path in audio_files:
+        sound = parselmouth.Sound(audio_path)
+        f0 = audio_features.calculate_fundamental_frequency(sound)
+        measures = perturbation.perturbation_measures(sound, f0[3], f0[4])
+        np.testing.assert_allclose(
+            perturbation.jitter_list(measures),
+            audio_features.calculate_jitter(sound, f0),
+            rtol=perturbation.JITTER_RTOL,
+            err_msg=audio_path,
+        )
+        np.testing.assert_allclose(
+            perturbation.shimmer_list(measures),
+            audio_features.calculate_shimmer(sound, f0),
+            rtol=perturbation.SHIMMER_RTOL,
+            err_msg=audio_path,
+        )
@@ -0,0 +1,61 @@
+import math
+import pytest
+
+streaming = pytest.importorskip("feature_calculation.streaming")
+import soundfile as sf  # noqa: E402
+from feature_calculation import audio_features  # noqa: E402
+from feature_calculation import transcription_functions  # noqa: E402
+
+# tolerances of the module docstring
+RELATIVE = 0.005
+FRAME_SECONDS = 0.01
+# silence_sweep: nsyll may differ by a peak or two from the Praat path
+SWEEP_SYLLABLES = 2
+
+
+def _boundaries(audio_path):
+    return max(0, math.ceil(sf.info(audio_path).duration / streaming.DEFAULT_BLOCK_SECONDS) - 1)
+
+
+def test_finalize_matches_batch_features(audio_files):
+    for audio_path in audio_files:
+        frames = FRAME_SECONDS * (_boundaries(audio_path) + 1)
+        features, updates = streaming.stream_file(audio_path)
+        batch = audio_features.calculate_audio_features(audio_path)
+        for key, median_tolerance in [("fundamental_frequency", 0.5), ("intensity", 0.01)]:
+            mean, median, std, low, high = features[key]
+            b_mean, b_median, b_std, b_low, b_high = batch[key]
+            assert mean == pytest.approx(b_mean, rel=RELATIVE), (audio_path, key)
+            assert std == pytest.approx(b_std, rel=RELATIVE), (audio_path, key)
+            assert low == pytest.approx(b_low, rel=RELATIVE), (audio_path, key)
+            assert high == pytest.approx(b_high, rel=RELATIVE), (audio_path, key)
+            assert median == pytest.approx(b_median, rel=RELATIVE, abs=median_tolerance), (audio_path, key)
+        mean, std, low, high = features["harmonicity"]
+        b_mean, b_std, b_low, b_high = batch["harmonicity"]
+        assert mean == pytest.approx(b_mean, rel=RELATIVE), audio_path
+        assert std == pytest.approx(b_std, rel=RELATIVE), audio_path
+        assert low == pytest.approx(b_low, abs=0.5), audio_path
+        assert high == pytest.approx(b_high, abs=0.5), audio_path
+        assert features["avg_pause_duration"] == pytest.approx(
+            batch["avg_pause_duration"], abs=frames
+        ), audio_path
+        assert len(updates) >= 1
+
+
+def test_finalize_matches_batch_speech_metrics(audio_files):
+    for audio_path in audio_files:
+        boundaries = _boundaries(audio_path)
+        features, _ = streaming.stream_file(audio_path)
+        batch = transcription_functions.adv_speech_metrics(audio_path)
+        assert features["dur(s)"] == pytest.approx(batch["dur(s)"]), audio_path
+        assert features["phonationtime(s)"] == pytest.approx(
+            batch["phonationtime(s)"], abs=FRAME_SECONDS * (boundaries + 1)
+        ), audio_path
+        assert abs(features["nsyll"] - batch["nsyll"]) <= boundaries + SWEEP_SYLLABLES, audio_path
+
+
+def test_bounded_history_keeps_the_voice_statistics(audio_files):
+    features, _ = streaming.stream_file(audio_files[0])
+    bounded, _ = streaming.stream_file(audio_files[0], keep_history=False, horizon_seconds=2.0)
+    for key in ("fundamental_frequency", "intensity", "harmonicity"):
+        assert bounded[key] == pytest.approx(features[key], nan_ok=True)
@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("whisper")
+transcription_functions = pytest.importorskip("feature_calculation.transcription_functions")
+import whisper  # noqa: E402
+
+
+def test_batch_matches_transcribe(audio_files):
+    audios = [whisper.load_audio(path) for path in audio_files]
+    batched = transcription_functions.transcribe_batch(audios)
+    for path, audio, (text, segments) in zip(audio_files, audios, batched):
+        reference = transcription_functions.model.transcribe(
+            audio, word_timestamps=True, **transcription_functions.DECODE_OPTIONS
+        )
+        assert text.strip() == reference["text"].strip(), path
+        assert [s["text"] for s in segments] == [s["text"] for s in reference["segments"]], path
+        assert [t for s in segments for t in (s["start"], s["end"])] == pytest.approx(
+            [t for s in reference["segments"] for t in (s["start"], s["end"])]
+        ), path
+        words = [w["word"] for s in segments for w in s.get("words", [])]
+        assert words == [w["word"] for s in reference["segments"] for w in s.get("words", [])], path
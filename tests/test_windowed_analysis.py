@@ -0,0 +1,83 @@
+import math
+import pytest
+
+windowed_analysis = pytest.importorskip("feature_calculation.windowed_analysis")
+import numpy as np  # noqa: E402
+import soundfile as sf  # noqa: E402
+from feature_calculation import audio_features  # noqa: E402
+from feature_calculation import transcription_functions  # noqa: E402
+
+# short windows so the bundled recordings span several core boundaries
+WINDOW_SECONDS = 1.5
+# tolerances of the module docstring
+RELATIVE = 0.005
+FRAME_SECONDS = 0.01
+
+
+def _boundaries(audio_path):
+    return max(0, math.ceil(sf.info(audio_path).duration / WINDOW_SECONDS) - 1)
+
+
+def test_running_stats_match_numpy():
+    rng = np.random.default_rng(0)
+    values = rng.normal(200, 40, 10000)
+    merged = windowed_analysis.f0_stats()
+    for chunk in np.array_split(values, 7):
+        part = windowed_analysis.f0_stats()
+        part.update(chunk)
+        merged.merge(part)
+    streamed = windowed_analysis.f0_stats()
+    for chunk in np.array_split(values, 13):
+        streamed.update(chunk)
+    bin_width = 0.5
+    for stats in (merged, streamed):
+        assert stats.count == len(values)
+        assert stats.mean == pytest.approx(np.mean(values))
+        assert stats.std == pytest.approx(np.std(values))
+        assert stats.min == np.min(values)
+        assert stats.max == np.max(values)
+        for q in (0.05, 0.5, 0.99):
+            assert abs(stats.quantile(q) - np.quantile(values, q)) <= bin_width
+
+
+def test_running_stats_ignore_non_finite_values():
+    stats = windowed_analysis.intensity_stats()
+    stats.update([np.nan, 60.0, np.inf, 70.0])
+    assert stats.count == 2
+    assert stats.summary()[0] == pytest.approx(65.0)
+
+
+def test_windowed_features_match_whole_file(audio_files):
+    for audio_path in audio_files:
+        boundaries = _boundaries(audio_path)
+        batch = audio_features.calculate_audio_features(audio_path)
+        windowed = audio_features.calculate_audio_features(audio_path, window_seconds=WINDOW_SECONDS)
+        for key, median_tolerance in [("fundamental_frequency", 0.5), ("intensity", 0.01)]:
+            mean, median, std, low, high = windowed[key]
+            b_mean, b_median, b_std, b_low, b_high = batch[key]
+            assert mean == pytest.approx(b_mean, rel=RELATIVE), (audio_path, key)
+            assert std == pytest.approx(b_std, rel=RELATIVE), (audio_path, key)
+            assert low == pytest.approx(b_low, rel=RELATIVE), (audio_path, key)
+            assert high == pytest.approx(b_high, rel=RELATIVE), (audio_path, key)
+            assert median == pytest.approx(b_median, rel=RELATIVE, abs=median_tolerance), (audio_path, key)
+        mean, std, low, high = windowed["harmonicity"]
+        b_mean, b_std, b_low, b_high = batch["harmonicity"]
+        assert mean == pytest.approx(b_mean, rel=RELATIVE), audio_path
+        assert std == pytest.approx(b_std, rel=RELATIVE), audio_path
+        assert low == pytest.approx(b_low, abs=0.5), audio_path
+        assert high == pytest.approx(b_high, abs=0.5), audio_path
+        assert windowed["avg_pause_duration"] == pytest.approx(
+            batch["avg_pause_duration"], abs=FRAME_SECONDS * max(boundaries, 1)
+        ), audio_path
+
+
+def test_windowed_speech_metrics_match_whole_file(audio_files):
+    for audio_path in audio_files:
+        boundaries = _boundaries(audio_path)
+        batch = transcription_functions.adv_speech_metrics(audio_path)
+        windowed = transcription_functions.adv_speech_metrics(audio_path, window_seconds=WINDOW_SECONDS)
+        assert windowed["dur(s)"] == pytest.approx(batch["dur(s)"]), audio_path
+        assert windowed["phonationtime(s)"] == pytest.approx(
+            batch["phonationtime(s)"], abs=FRAME_SECONDS * max(boundaries, 1)
+        ), audio_path
+        assert abs(windowed["nsyll"] - batch["nsyll"]) <= boundaries, audio_path
@@ -0,0 +1,83 @@
+import os
+import json
+import time
+import multiprocessing
+import pytest
+
+work_queue = pytest.importorskip("feature_calculation.work_queue")
+
+N_FILES = 40
+N_WORKERS = 4
+
+
+def _record(audio_path, results_dir):
+    # one line per call, so files processed twice show up twice
+    with open(os.path.join(results_dir, "calls.log"), "a") as f:
+        f.write(work_queue.file_key(audio_path) + "\n")
+    time.sleep(0.01)
+    return {"filename": work_queue.file_key(audio_path)}
+
+
+def _fail_on_bad(audio_path, results_dir):
+    if "bad" in audio_path:
+        raise ValueError("cannot decode")
+    return {"filename": work_queue.file_key(audio_path)}
+
+
+def _run(audio_files, results_dir):
+    work_queue.run_worker(audio_files, results_dir, _record, poll_interval=0.05)
+
+
+def _claim(path, results):
+    results.put(work_queue.try_claim(path, work_queue.worker_id(), lease_timeout=60))
+
+
+def test_workers_process_each_file_once(tmp_path):
+    audio_files = [f"/audio/file_{i:03d}.wav" for i in range(N_FILES)]
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_run, args=(audio_files, str(tmp_path))) for _ in range(N_WORKERS)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(60)
+        assert w.exitcode == 0
+    with open(tmp_path / "calls.log") as f:
+        calls = f.read().split()
+    assert sorted(calls) == sorted(work_queue.file_key(a) for a in audio_files)
+    assert set(work_queue.load_results(str(tmp_path))) == set(calls)
+    assert not os.listdir(tmp_path / work_queue.LEASE_DIR)
+
+
+def test_one_node_takes_over_a_stale_lease(tmp_path):
+    path = str(tmp_path / "file.lease")
+    with open(path, "w") as f:
+        json.dump({"owner": "crashed-node"}, f)
+    old = time.time() - 3600
+    os.utime(path, (old, old))
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    claimers = [context.Process(target=_claim, args=(path, results)) for _ in range(N_WORKERS)]
+    for c in claimers:
+        c.start()
+    for c in claimers:
+        c.join(60)
+    assert sorted(results.get() for _ in claimers) == [False] * (N_WORKERS - 1) + [True]
+
+
+def test_live_lease_is_not_taken_or_released(tmp_path):
+    path = str(tmp_path / "file.lease")
+    assert work_queue.try_claim(path, "node-a")
+    assert not work_queue.try_claim(path, "node-b")
+    work_queue.release(path, "node-b")
+    assert os.path.exists(path)
+    work_queue.release(path, "node-a")
+    assert not os.path.exists(path)
+
+
+def test_failing_file_gets_an_error_result(tmp_path):
+    audio_files = ["/audio/good.wav", "/audio/bad.wav"]
+    assert work_queue.run_worker(audio_files, str(tmp_path), _fail_on_bad, poll_interval=0) == 2
+    with open(work_queue.result_path(str(tmp_path), "/audio/bad.wav")) as f:
+        result = json.load(f)
+    assert result["filename"] == "bad"
+    assert result[work_queue.ERROR_KEY].startswith("ValueError")